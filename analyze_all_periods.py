@@ -7,7 +7,7 @@ def analyze_period(days, label):
     print("="*100)
     
     # Obtener datos del API
-    url = f"http://localhost:8080/api/journal/broker/schwab?days={days}"
+    url = f"http://localhost:8080/api/journal/broker/schwab?days={days}&include_trades=true"
     response = requests.get(url)
     data = response.json()
     
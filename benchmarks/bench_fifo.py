@@ -0,0 +1,178 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Benchmark FIFO - Journal Engine a Escala               ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Mide el matcher de lotes (FIFO, LIFO, HIFO, costo promedio) con fills
+sintéticos estilo bot DCA:
+muchas micro-compras por símbolo seguidas de ventas grandes que
+consumen decenas de lotes de la cola.
+
+Uso:
+    python benchmarks/bench_fifo.py                       # 1M fills / 500 símbolos
+    python benchmarks/bench_fifo.py --fills 100000 --symbols 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from hub.journal.analytics import GROUP_BY, breakdown
+from hub.journal.closed_ops_table import ClosedOpsTable
+from hub.journal.fifo_ledger import FifoLedger, SymbolLedger
+from hub.journal.lot_matching import LOT_BOOKS
+from hub.journal.timestamps import to_epoch_us
+
+
+def generate_fills(n_fills: int, n_symbols: int, seed: int = 42) -> list:
+    """
+    Fills sintéticos ordenados por fecha
+
+    Cada símbolo alterna rachas de 20-80 micro-compras con una venta que
+    liquida la mayor parte de lo acumulado (peor caso para la cola FIFO).
+    """
+    rnd = random.Random(seed)
+    start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    symbols = [f"SYM{i:03d}-USD" for i in range(n_symbols)]
+    holdings = {s: 0.0 for s in symbols}
+    streak = {s: rnd.randint(20, 80) for s in symbols}
+
+    fills = []
+    for i in range(n_fills):
+        symbol = symbols[rnd.randrange(n_symbols)]
+        price = round(rnd.uniform(1, 500), 2)
+        if streak[symbol] > 0 or holdings[symbol] <= 0:
+            side = 'BUY'
+            qty = round(rnd.uniform(0.0001, 0.05), 8)
+            holdings[symbol] += qty
+            streak[symbol] -= 1
+        else:
+            side = 'SELL'
+            qty = round(holdings[symbol] * rnd.uniform(0.5, 1.0), 8)
+            holdings[symbol] -= qty
+            streak[symbol] = rnd.randint(20, 80)
+        fill_time = start + timedelta(seconds=i * 30)
+        fills.append({
+            'id': str(i),
+            'datetime': fill_time.isoformat(),
+            'ts_us': to_epoch_us(fill_time),
+            'symbol': symbol,
+            'side': side,
+            'quantity': qty,
+            'price': price,
+            'fee': round(qty * price * 0.006, 8),
+            'amount': round(qty * price, 2),
+            'broker': 'coinbase'
+        })
+    return fills
+
+
+def bench_symbol_fifo(fills: list, method: str = 'fifo') -> float:
+    """Tiempo del matcher puro (SymbolLedger.apply) sobre todos los símbolos"""
+    by_symbol = {}
+    for fill in fills:
+        by_symbol.setdefault(fill['symbol'], []).append(fill)
+
+    t0 = time.perf_counter()
+    for symbol, symbol_fills in by_symbol.items():
+        ledger = SymbolLedger(symbol, method=method)
+        for fill in symbol_fills:
+            ledger.apply(fill)
+    return time.perf_counter() - t0
+
+
+def bench_ledger_sync(fills: list, new_fills: int, workers: int = 0) -> tuple:
+    """Tiempo de sync completo y de un sync incremental con new_fills nuevos"""
+    history = fills[:-new_fills]
+
+    # workers > 0: FIFO en procesos para el sync completo
+    ledger = FifoLedger(parallel_min_fills=1, max_workers=workers) if workers else FifoLedger()
+    t0 = time.perf_counter()
+    ledger.sync(history)
+    full = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ledger.sync(fills)
+    incremental = time.perf_counter() - t0
+    return full, incremental
+
+
+def bench_multi_window(fills: list) -> float:
+    """Tiempo de agregar 12 slices (7/30/90/todo x 3 brokers) sobre un ledger ya sincronizado"""
+    ledger = FifoLedger()
+    ledger.sync(fills)
+    cutoffs = [time.time() - days * 86400 for days in (7, 30, 90)] + [None]
+
+    t0 = time.perf_counter()
+    for broker in (None, 'schwab', 'coinbase'):
+        for cutoff in cutoffs:
+            ledger.closed_stats(cutoff, broker=broker)
+    return time.perf_counter() - t0
+
+
+def bench_breakdowns(n_ops: int, n_symbols: int, seed: int = 42) -> dict:
+    """Tiempo de cada desglose (analytics) sobre n_ops operaciones cerradas sintéticas"""
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(n_ops, dtype=ClosedOpsTable.DTYPE)
+    start = to_epoch_us(datetime(2022, 1, 1, tzinfo=timezone.utc))
+    rows['sell_ts'] = np.sort(start + rng.integers(0, 3 * 365 * 86_400_000_000, n_ops))
+    rows['pl_usd'] = rng.normal(2.0, 50.0, n_ops)
+    rows['cost_basis'] = rng.uniform(10, 1000, n_ops)
+    rows['holding_us'] = rng.exponential(5 * 86_400_000_000, n_ops).astype(np.int64)
+    rows['symbol'] = rng.integers(0, n_symbols, n_ops)
+    rows['broker'] = rng.integers(0, 2, n_ops)
+    symbol_names = [f"SYM{i:03d}-USD" for i in range(n_symbols)]
+
+    timings = {}
+    for by in GROUP_BY:
+        t0 = time.perf_counter()
+        breakdown(rows, by, symbol_names, ['schwab', 'coinbase'], tz='America/New_York')
+        timings[by] = time.perf_counter() - t0
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del matcher FIFO del journal")
+    parser.add_argument('--fills', type=int, default=1_000_000)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--new-fills', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Procesos para el FIFO paralelo (0 = solo serie)")
+    parser.add_argument('--ops', type=int, default=1_000_000,
+                        help="Operaciones cerradas sintéticas para los desgloses")
+    args = parser.parse_args()
+
+    print(f"Generando {args.fills:,} fills en {args.symbols} símbolos...")
+    fills = generate_fills(args.fills, args.symbols, seed=args.seed)
+
+    for method in LOT_BOOKS:
+        method_s = bench_symbol_fifo(fills, method)
+        print(f"  {method.upper():7} por símbolo:  {method_s:8.3f}s  ({args.fills / method_s:,.0f} fills/s)")
+
+    full_s, incr_s = bench_ledger_sync(fills, args.new_fills)
+    print(f"  FifoLedger sync full: {full_s:8.3f}s")
+    print(f"  FifoLedger +{args.new_fills} fills: {incr_s:8.3f}s")
+
+    if args.workers:
+        par_s, _ = bench_ledger_sync(fills, args.new_fills, workers=args.workers)
+        print(f"  FifoLedger paralelo ({args.workers} procesos): {par_s:8.3f}s")
+
+    agg_s = bench_multi_window(fills)
+    print(f"  Agregados 12 slices:  {agg_s:8.3f}s")
+
+    for by, by_s in bench_breakdowns(args.ops, args.symbols, seed=args.seed).items():
+        print(f"  Desglose {by:8} ({args.ops:,} ops): {by_s:8.3f}s")
+
+
+if __name__ == '__main__':
+    main()
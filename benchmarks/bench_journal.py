@@ -0,0 +1,191 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Benchmark Journal - Suite del Hot Path                 ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Mide el camino caliente del journal con fills sintéticos de ambos
+brokers (ver synthetic.py) a varias escalas:
+- compute_metrics: cálculo completo (ledger efímero)
+- compute_metrics_incremental: +100 fills sobre un ledger persistente
+- process_symbol_fifo: _process_symbol_fifo por cada símbolo
+- windowing: compute_metrics_multi (7/30/90/todo x all/schwab/coinbase)
+- serialization: metrics_to_dict + json.dumps de la respuesta completa
+
+Salida legible por stdout y, con --output, JSON con metadata (versiones,
+commit) para comparar corridas. --baseline compara contra un JSON previo
+y sale con código 1 si algún caso es más lento que --max-ratio veces.
+
+Uso:
+    python benchmarks/bench_journal.py                          # 1k, 100k, 1M
+    python benchmarks/bench_journal.py --sizes 1k,100k,1M,10M --output bench.json
+    python benchmarks/bench_journal.py --sizes 1k,100k --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from hub.journal.journal_manager import JournalManager
+from hub.journal.records import metrics_to_dict
+from synthetic import generate_fills
+
+WINDOWS = [7, 30, 90, None]
+BROKERS = ['all', 'schwab', 'coinbase']
+
+
+def parse_size(text: str) -> int:
+    """'1k' → 1000, '1M' → 1000000, '250000' → 250000"""
+    text = text.strip()
+    multiplier = {'k': 1_000, 'K': 1_000, 'm': 1_000_000, 'M': 1_000_000}.get(text[-1:])
+    return int(float(text[:-1]) * multiplier) if multiplier else int(text)
+
+
+def make_manager() -> JournalManager:
+    """JournalManager sin adapters ni memo (sin credenciales, sin red)"""
+    with patch('hub.journal.schwab_adapter.SchwabAdapter', side_effect=ImportError), \
+         patch('hub.journal.coinbase_adapter.CoinbaseAdapter', side_effect=ImportError):
+        return JournalManager(capital_initial=5000.0, memo_size=0)
+
+
+def best_of(repeat: int, run: Callable[[], float]) -> float:
+    """Mínimo de repeat corridas (run devuelve sus segundos)"""
+    return min(run() for _ in range(repeat))
+
+
+def timed(fn: Callable, *args, **kwargs) -> float:
+    t0 = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def bench_size(fills: List[Dict], repeat: int, new_fills: int = 100) -> Dict[str, float]:
+    """Segundos de cada caso de la suite sobre un set de fills"""
+    manager = make_manager()
+    timings = {}
+
+    timings['compute_metrics'] = best_of(repeat, lambda: timed(
+        manager.compute_metrics, fills, as_records=True))
+
+    def incremental() -> float:
+        key = f"bench-{time.perf_counter_ns()}"
+        manager.compute_metrics(fills[:-new_fills], ledger_key=key, as_records=True)
+        seconds = timed(manager.compute_metrics, fills, ledger_key=key, as_records=True)
+        manager._ledgers.pop(key, None)
+        return seconds
+    timings['compute_metrics_incremental'] = best_of(repeat, incremental)
+
+    by_symbol: Dict[str, List[Dict]] = {}
+    for fill in fills:
+        by_symbol.setdefault(fill['symbol'], []).append(fill)
+
+    def process_symbols() -> float:
+        t0 = time.perf_counter()
+        for symbol, symbol_fills in by_symbol.items():
+            manager._process_symbol_fifo(symbol, symbol_fills)
+        return time.perf_counter() - t0
+    timings['process_symbol_fifo'] = best_of(repeat, process_symbols)
+
+    # Ledger ya sincronizado: solo se mide la agregación de los 12 slices
+    manager.compute_metrics_multi(fills, WINDOWS, BROKERS, ledger_key='bench', as_records=True)
+    timings['windowing'] = best_of(repeat, lambda: timed(
+        manager.compute_metrics_multi, fills, WINDOWS, BROKERS, ledger_key='bench',
+        as_records=True))
+
+    result = manager.compute_metrics(fills, ledger_key='bench', as_records=True)
+    timings['serialization'] = best_of(repeat, lambda: timed(
+        lambda: json.dumps(metrics_to_dict(result), default=str)))
+    return timings
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline_path: str, max_ratio: float) -> List[str]:
+    """Casos más lentos que max_ratio x baseline (mismo caso y tamaño)"""
+    with open(baseline_path) as f:
+        baseline = {(r['case'], r['fills']): r['seconds'] for r in json.load(f)['results']}
+
+    regressions = []
+    for r in results:
+        before = baseline.get((r['case'], r['fills']))
+        if not before:
+            continue
+        ratio = r['seconds'] / before
+        if ratio > max_ratio:
+            regressions.append(f"{r['case']} @ {r['fills']:,}: {before:.4f}s → "
+                               f"{r['seconds']:.4f}s (x{ratio:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del hot path del journal")
+    parser.add_argument('--sizes', default='1k,100k,1M',
+                        help="Tamaños separados por coma (ej. 1k,100k,1M,10M)")
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Corridas por caso (se reporta la mínima)")
+    parser.add_argument('--output', help="Archivo JSON de resultados")
+    parser.add_argument('--baseline', help="JSON de una corrida previa para detectar regresiones")
+    parser.add_argument('--max-ratio', type=float, default=1.25,
+                        help="Factor de lentitud vs baseline considerado regresión")
+    args = parser.parse_args()
+
+    results = []
+    for size in [parse_size(s) for s in args.sizes.split(',') if s.strip()]:
+        print(f"Generando {size:,} fills en {args.symbols} símbolos...")
+        fills = generate_fills(size, args.symbols, seed=args.seed)
+        for case, seconds in bench_size(fills, args.repeat).items():
+            results.append({'case': case, 'fills': size, 'seconds': round(seconds, 6),
+                            'fills_per_sec': round(size / seconds) if seconds else None})
+            print(f"  {case:28} {seconds:9.4f}s  ({size / seconds:,.0f} fills/s)")
+        del fills
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'symbols': args.symbols,
+            'seed': args.seed,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados: {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_ratio)
+        for line in regressions:
+            print(f"  REGRESIÓN {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"Sin regresiones vs {args.baseline} (máx x{args.max_ratio})")
+
+
+if __name__ == '__main__':
+    main()
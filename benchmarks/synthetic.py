@@ -0,0 +1,159 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Synthetic Fills - Generador Determinístico             ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Genera fills normalizados (mismo formato que SchwabAdapter y
+CoinbaseAdapter) para benchmarks y pruebas de escala:
+- Acciones Schwab (ids numéricos, cantidades enteras o fraccionales,
+  'status') y crypto Coinbase (ids UUID, 8 decimales, fee)
+- Órdenes partidas en varios fills (partial fills) con el mismo precio
+- Polvo: compras de 1e-8..1e-6 unidades y ventas que dejan residuos
+- Precios con random walk por símbolo; fechas repartidas en los
+  últimos `days` días (las ventanas 7/30/90 tienen datos)
+
+Mismo seed → mismos fills (salvo el desplazamiento de fechas a "ahora").
+
+Uso:
+    from synthetic import generate_fills
+    fills = generate_fills(100_000, n_symbols=50, seed=42)
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import random
+import uuid
+
+import os
+import sys
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hub.journal.timestamps import to_epoch_us
+
+
+def _schwab_fill(i: int, ts_us: int, symbol: str, side: str, qty: float,
+                 price: float) -> Dict:
+    return {
+        'id': str(90_000_000_000 + i),
+        'ts_us': ts_us,
+        'symbol': symbol,
+        'side': side,
+        'quantity': qty,
+        'price': price,
+        'fee': 0.0,
+        'amount': round(qty * price, 2),
+        'status': 'VALID',
+        'broker': 'schwab'
+    }
+
+
+def _coinbase_fill(rnd: random.Random, ts_us: int, symbol: str, side: str, qty: float,
+                   price: float) -> Dict:
+    return {
+        'id': str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+        'ts_us': ts_us,
+        'symbol': symbol,
+        'side': side,
+        'quantity': qty,
+        'price': price,
+        'fee': round(qty * price * 0.006, 8),
+        'amount': round(qty * price, 2),
+        'broker': 'coinbase'
+    }
+
+
+def generate_fills(n_fills: int, n_symbols: int = 50, seed: int = 42, days: int = 365,
+                   end: Optional[datetime] = None, crypto_share: float = 0.5,
+                   partial_prob: float = 0.15, dust_prob: float = 0.02) -> List[Dict]:
+    """
+    Fills sintéticos de ambos brokers, ordenados por fecha
+
+    Args:
+        n_fills: Cantidad exacta de fills
+        n_symbols: Símbolos distintos (crypto_share de ellos son crypto Coinbase)
+        seed: Semilla (determinístico)
+        days: Rango de fechas hacia atrás desde end
+        end: Fecha del último fill (None = ahora)
+        crypto_share: Fracción de símbolos crypto
+        partial_prob: Probabilidad de que una orden se parta en 2-5 fills
+        dust_prob: Probabilidad de una orden crypto de polvo (o venta que deja polvo)
+
+    Returns:
+        Lista de trades normalizados (con ts_us)
+    """
+    rnd = random.Random(seed)
+    end = end or datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(days=days)
+    step_us = 1_000_000
+
+    n_crypto = int(round(n_symbols * crypto_share))
+    symbols = [f"C{i:03d}-USD" for i in range(n_crypto)] + \
+              [f"STK{i:03d}" for i in range(n_symbols - n_crypto)]
+    price = {s: rnd.uniform(0.01, 500) if s.endswith('-USD') else rnd.uniform(5, 800)
+             for s in symbols}
+    holdings = {s: 0.0 for s in symbols}
+
+    fills: List[Dict] = []
+    elapsed_us = 0
+    while len(fills) < n_fills:
+        symbol = symbols[rnd.randrange(n_symbols)]
+        crypto = symbol.endswith('-USD')
+        price[symbol] = max(price[symbol] * (1 + rnd.gauss(0, 0.01)), 1e-6)
+        fill_price = round(price[symbol], 8 if crypto else 2)
+
+        dust = crypto and rnd.random() < dust_prob
+        if holdings[symbol] <= 0 or rnd.random() < 0.55:
+            side = 'BUY'
+            if dust:
+                qty = round(rnd.uniform(1e-8, 1e-6), 8)
+            elif crypto:
+                qty = round(rnd.uniform(0.0001, 2.0), 8)
+            elif rnd.random() < 0.2:
+                qty = round(rnd.uniform(0.01, 5), 4)          # Fraccional
+            else:
+                qty = float(rnd.randint(1, 50))
+        else:
+            side = 'SELL'
+            if dust:
+                # Vende casi todo: queda un residuo de polvo abierto
+                qty = round(holdings[symbol] - rnd.uniform(1e-8, 1e-6), 8)
+            elif rnd.random() < 0.4:
+                qty = round(holdings[symbol], 8 if crypto else 4)   # Cierre total
+            else:
+                qty = round(holdings[symbol] * rnd.uniform(0.1, 0.9), 8 if crypto else 4)
+            if qty <= 0:
+                continue
+
+        # Orden partida en varios fills (mismo precio, fechas consecutivas)
+        parts = rnd.randint(2, 5) if rnd.random() < partial_prob else 1
+        parts = min(parts, n_fills - len(fills))
+        decimals = 8 if crypto else 4
+        splits = [round(qty / parts, decimals)] * (parts - 1)
+        splits.append(round(qty - sum(splits), decimals))
+
+        for part_qty in splits:
+            if part_qty <= 0:
+                continue
+            elapsed_us += rnd.randint(1, 2 * step_us)
+            if crypto:
+                fills.append(_coinbase_fill(rnd, elapsed_us, symbol, side, part_qty, fill_price))
+            else:
+                fills.append(_schwab_fill(len(fills), elapsed_us, symbol, side, part_qty, fill_price))
+            holdings[symbol] += part_qty if side == 'BUY' else -part_qty
+
+    # Tiempo acumulado → fechas re-escaladas al rango [start, end]
+    # (Schwab reporta segundos enteros, Coinbase microsegundos)
+    scale = days * 86_400_000_000 / max(elapsed_us, 1)
+    start_us = to_epoch_us(start)
+    for fill in fills:
+        ts = start_us + int(fill['ts_us'] * scale)
+        if fill['broker'] == 'schwab':
+            ts -= ts % 1_000_000
+        when = datetime.fromtimestamp(ts // 1_000_000, timezone.utc) + \
+            timedelta(microseconds=ts % 1_000_000)
+        fill['ts_us'] = ts
+        fill['datetime'] = when.isoformat()
+    return fills
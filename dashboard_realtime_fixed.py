@@ -58,6 +58,8 @@ async def stream_schwab_websocket():
             logger.info("[SCHWAB] Iniciando conexión...")
             
             from hub.managers.schwab_websocket_manager import SchwabWebSocketManager
+            from hub.managers.request_scheduler import (Priority, backoff_seconds, get_scheduler,
+                                                        retry_after_seconds)
             import requests
             
             mgr = SchwabWebSocketManager(config_path="hub")
@@ -128,21 +130,32 @@ async def stream_schwab_websocket():
             
             # TAREA 2: Obtener datos reales de REST API cada 2 segundos
             async def fetch_account_data():
-                last_update = 0
+                next_update = 0
+                throttled_in_a_row = 0
                 while state["schwab"]["connected"]:
                     try:
                         current_time = datetime.now().timestamp()
                         
-                        # Hacer REST API call cada 2 segundos
-                        if current_time - last_update >= 2.0:
+                        # Hacer REST API call cada 2 segundos (más espaciado tras un 429)
+                        if current_time >= next_update:
+                            interval = 2.0
                             headers = {"Authorization": f"Bearer {mgr.access_token}"}
                             
-                            # Obtener cuentas
+                            # Obtener cuentas (turno compartido con el journal y los quotes)
+                            scheduler = get_scheduler()
+                            await scheduler.acquire_async("schwab", "accounts", Priority.ACCOUNT)
                             resp = requests.get(
                                 "https://api.schwabapi.com/trader/v1/accounts",
                                 headers=headers,
                                 timeout=5
                             )
+                            if resp.status_code == 429:
+                                # Pausa el cupo compartido y espacia este loop (Retry-After, backoff)
+                                throttled_in_a_row += 1
+                                scheduler.throttled("schwab", retry_after_seconds(resp.headers))
+                                interval = backoff_seconds(resp.headers, throttled_in_a_row)
+                            else:
+                                throttled_in_a_row = 0
                             
                             if resp.status_code == 200:
                                 data = resp.json()
@@ -177,7 +190,7 @@ async def stream_schwab_websocket():
                                         except:
                                             schwab_clients.discard(client)
                             
-                            last_update = current_time
+                            next_update = current_time + interval
                         
                         await asyncio.sleep(0.2)
                     
@@ -247,11 +260,16 @@ async def stream_coinbase_websocket():
             async def fetch_account_data():
                 try:
                     from hub.managers.coinbase_jwt_manager import CoinbaseJWTManager
+                    from hub.managers.request_scheduler import (Priority, backoff_seconds, get_scheduler,
+                                                                retry_after_seconds)
                     
                     jwt_mgr = CoinbaseJWTManager(config_path="hub")
+                    scheduler = get_scheduler()
+                    throttled_in_a_row = 0
                     
                     while state["coinbase"]["connected"] and ws and not ws.closed:
                         try:
+                            delay = 3
                             # Generar JWT para REST API
                             jwt_token = jwt_mgr.generate_jwt_for_endpoint(
                                 method='GET',
@@ -264,12 +282,19 @@ async def stream_coinbase_websocket():
                                 "Content-Type": "application/json"
                             }
                             
+                            await scheduler.acquire_async("coinbase", "accounts", Priority.ACCOUNT)
                             async with aiohttp.ClientSession() as session:
                                 async with session.get(
                                     "https://api.coinbase.com/api/v3/brokerage/accounts",
                                     headers=headers,
                                     timeout=aiohttp.ClientTimeout(total=5)
                                 ) as resp:
+                                    if resp.status == 429:
+                                        throttled_in_a_row += 1
+                                        scheduler.throttled("coinbase", retry_after_seconds(resp.headers))
+                                        delay = backoff_seconds(resp.headers, throttled_in_a_row)
+                                    else:
+                                        throttled_in_a_row = 0
                                     if resp.status == 200:
                                         data = await resp.json()
                                         state["coinbase"]["account_data"] = data
@@ -278,7 +303,7 @@ async def stream_coinbase_websocket():
                                     else:
                                         logger.debug(f"[COINBASE] REST Error {resp.status}")
                             
-                            await asyncio.sleep(3)  # Actualizar cada 3 segundos
+                            await asyncio.sleep(delay)  # Actualizar cada 3 segundos
                         except Exception as e:
                             logger.debug(f"[COINBASE] fetch_account_data: {e}")
                             await asyncio.sleep(3)
@@ -5,7 +5,7 @@ print("Diagnosticando problema en journal...")
 print("="*70)
 
 try:
-    response = requests.get('http://localhost:8080/api/journal?days=30', timeout=30)
+    response = requests.get('http://localhost:8080/api/journal?days=30&include_trades=true', timeout=30)
     data = response.json()
     
     print(f"\n📊 DATOS DEL API (30 días):")
@@ -16,6 +16,11 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'hub'))
 
 from managers.coinbase_jwt_manager import CoinbaseJWTManager
+from journal.json_stream import STREAM_CHUNK_SIZE, iter_json_array
+
+# Órdenes/fills que se guardan completas para la muestra; el resto solo
+# suma a los agregados (el historial se decodifica en streaming)
+SAMPLE_SIZE = 10
 
 
 def extract_accounts_data():
@@ -106,22 +111,25 @@ def extract_orders_data():
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=headers, timeout=10, stream=True)
         
         if response.status_code == 200:
-            data = response.json()
-            orders = data.get('orders', [])
+            # Agrupar por estado a medida que llegan las órdenes
+            orders = []
+            states = {}
+            total_orders = 0
+            with response:
+                for order in iter_json_array(response.iter_content(STREAM_CHUNK_SIZE), key='orders'):
+                    total_orders += 1
+                    if len(orders) < SAMPLE_SIZE:
+                        orders.append(order)
+                    state = order.get('order_type', 'UNKNOWN')
+                    if state not in states:
+                        states[state] = 0
+                    states[state] += 1
             
             print(f"\n✅ Conexión exitosa - HTTP 200")
-            print(f"📊 Total de órdenes: {len(orders)}\n")
-            
-            # Agrupar por estado
-            states = {}
-            for order in orders:
-                state = order.get('order_type', 'UNKNOWN')
-                if state not in states:
-                    states[state] = 0
-                states[state] += 1
+            print(f"📊 Total de órdenes: {total_orders}\n")
             
             print("📊 ÓRDENES POR TIPO:")
             for state, count in sorted(states.items()):
@@ -139,7 +147,7 @@ def extract_orders_data():
             
             return {
                 'status': 'success',
-                'total_orders': len(orders),
+                'total_orders': total_orders,
                 'order_types': states,
                 'orders_sample': [
                     {
@@ -149,7 +157,7 @@ def extract_orders_data():
                         'created_time': o.get('created_time'),
                         'id': o.get('id')
                     }
-                    for o in orders[:10]
+                    for o in orders
                 ]
             }
         else:
@@ -180,35 +188,38 @@ def extract_fills_data():
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=headers, timeout=10, stream=True)
         
         if response.status_code == 200:
-            data = response.json()
-            fills = data.get('fills', [])
-            
-            print(f"\n✅ Conexión exitosa - HTTP 200")
-            print(f"💵 Total de fills/transacciones: {len(fills)}\n")
-            
-            # Agrupar por producto
+            # Agrupar por producto a medida que llegan los fills
+            fills = []
             products = {}
+            total_fills = 0
             total_value = 0
-            for fill in fills:
-                product = fill.get('product_id', 'UNKNOWN')
-                if product not in products:
-                    products[product] = []
-                products[product].append(fill)
-                
-                # Sumar valor total
-                try:
-                    price = float(fill.get('price', 0))
-                    size = float(fill.get('size', 0))
-                    total_value += price * size
-                except:
-                    pass
+            with response:
+                for fill in iter_json_array(response.iter_content(STREAM_CHUNK_SIZE), key='fills'):
+                    total_fills += 1
+                    if len(fills) < SAMPLE_SIZE:
+                        fills.append(fill)
+                    product = fill.get('product_id', 'UNKNOWN')
+                    if product not in products:
+                        products[product] = 0
+                    products[product] += 1
+                    
+                    # Sumar valor total
+                    try:
+                        price = float(fill.get('price', 0))
+                        size = float(fill.get('size', 0))
+                        total_value += price * size
+                    except:
+                        pass
+            
+            print(f"\n✅ Conexión exitosa - HTTP 200")
+            print(f"💵 Total de fills/transacciones: {total_fills}\n")
             
             print("📊 FILLS POR PRODUCTO:")
-            for product, fills_list in sorted(products.items()):
-                print(f"   {product:15s}: {len(fills_list):3d} transacciones")
+            for product, count in sorted(products.items()):
+                print(f"   {product:15s}: {count:3d} transacciones")
             
             print(f"\n💰 VOLUMEN TOTAL ESTIMADO: ${total_value:,.2f}")
             
@@ -224,8 +235,8 @@ def extract_fills_data():
             
             return {
                 'status': 'success',
-                'total_fills': len(fills),
-                'products': {k: len(v) for k, v in products.items()},
+                'total_fills': total_fills,
+                'products': products,
                 'total_value': total_value,
                 'fills_sample': [
                     {
@@ -235,7 +246,7 @@ def extract_fills_data():
                         'size': f.get('size'),
                         'created_at': f.get('created_at')
                     }
-                    for f in fills[:10]
+                    for f in fills
                 ]
             }
         else:
@@ -0,0 +1,176 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Analytics - Desgloses Agrupados de Ops Cerradas        ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- P&L por símbolo, broker, hora del día, día de la semana y tiempo de
+  tenencia sobre las filas de la ClosedOpsTable
+- Group-by vectorizado: cada dimensión se reduce a un código entero
+  por fila y los agregados salen de np.bincount (una pasada por
+  columna, sin loops de Python por operación)
+- Reemplaza los scripts ad-hoc (analyze_all_trades.py,
+  analyze_all_periods.py) que bajaban /api/journal y recorrían trades
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import logging
+
+import numpy as np
+
+from .equity_curve import US_PER_DAY
+
+logger = logging.getLogger(__name__)
+
+US_PER_HOUR = 3_600 * 1_000_000
+_ONE_US = timedelta(microseconds=1)
+
+GROUP_BY = ('symbol', 'broker', 'hour', 'weekday', 'holding')
+
+WEEKDAY_NAMES = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+# Rangos de tenencia: (etiqueta, límite superior exclusivo en µs)
+HOLDING_BUCKETS: List[Tuple[str, float]] = [
+    ('<1h', US_PER_HOUR),
+    ('1h-1d', US_PER_DAY),
+    ('1d-1w', 7 * US_PER_DAY),
+    ('1w-1m', 30 * US_PER_DAY),
+    ('1m-1y', 365 * US_PER_DAY),
+    ('>1y', np.inf),
+]
+
+
+def local_ts(ts: np.ndarray, tz: Optional[str] = None) -> np.ndarray:
+    """
+    Epoch µs desplazado a la hora local de tz (None = UTC)
+
+    El offset (con horario de verano) se calcula una vez por día
+    distinto, no por fila; solo las filas de días con cambio de horario
+    se resuelven una por una.
+
+    Raises:
+        ValueError: Zona horaria desconocida
+    """
+    if not tz or len(ts) == 0:
+        return ts
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Zona horaria desconocida: {tz}") from e
+
+    def offset(seconds: int) -> int:
+        return datetime.fromtimestamp(seconds, zone).utcoffset() // _ONE_US
+
+    days, inverse = np.unique(ts // US_PER_DAY, return_inverse=True)
+    day_start = np.array([offset(day * 86_400) for day in days.tolist()], dtype=np.int64)
+    day_end = np.array([offset(day * 86_400 + 86_399) for day in days.tolist()], dtype=np.int64)
+    offsets = day_start[inverse]
+
+    changed = np.flatnonzero(day_start != day_end)
+    if len(changed):
+        idx = np.flatnonzero(np.isin(inverse, changed))
+        offsets[idx] = [offset(t // 1_000_000) for t in ts[idx].tolist()]
+    return ts + offsets
+
+
+def group_codes(rows: np.ndarray, by: str, symbol_names: List[str], broker_names: List[str],
+                tz: Optional[str] = None) -> Tuple[np.ndarray, List[str]]:
+    """
+    Código de grupo por fila y etiqueta de cada código
+
+    Raises:
+        ValueError: Dimensión desconocida
+    """
+    if by == 'symbol':
+        return rows['symbol'].astype(np.int64), list(symbol_names)
+    if by == 'broker':
+        return rows['broker'].astype(np.int64), list(broker_names)
+    if by == 'hour':
+        return (local_ts(rows['sell_ts'], tz) // US_PER_HOUR) % 24, [f"{h:02d}" for h in range(24)]
+    if by == 'weekday':
+        # 1970-01-01 fue jueves (lunes = 0)
+        return (local_ts(rows['sell_ts'], tz) // US_PER_DAY + 3) % 7, list(WEEKDAY_NAMES)
+    if by == 'holding':
+        limits = np.array([limit for _, limit in HOLDING_BUCKETS[:-1]])
+        return np.searchsorted(limits, rows['holding_us'], side='right'), \
+            [label for label, _ in HOLDING_BUCKETS]
+    raise ValueError(f"Agrupación desconocida: {by} (usar {', '.join(GROUP_BY)})")
+
+
+def grouped_stats(codes: np.ndarray, pl: np.ndarray, cost_basis: np.ndarray,
+                  holding_us: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+    """Agregados por código de grupo (arrays de largo n_groups)"""
+    win = pl > 0
+    count = np.bincount(codes, minlength=n_groups)
+    wins = np.bincount(codes, weights=win, minlength=n_groups)
+    total_pl = np.bincount(codes, weights=pl, minlength=n_groups)
+    return {
+        'count': count,
+        'wins': wins.astype(np.int64),
+        'pl_realized_usd': total_pl,
+        'total_wins_usd': np.bincount(codes, weights=np.where(win, pl, 0.0), minlength=n_groups),
+        'total_losses_usd': np.bincount(codes, weights=np.where(win, 0.0, -pl), minlength=n_groups),
+        'cost_basis': np.bincount(codes, weights=cost_basis, minlength=n_groups),
+        'holding_us': np.bincount(codes, weights=holding_us, minlength=n_groups),
+    }
+
+
+def breakdown(rows: np.ndarray, by: str, symbol_names: List[str], broker_names: List[str],
+              tz: Optional[str] = None) -> List[Dict]:
+    """
+    Desglose de operaciones cerradas por una dimensión
+
+    Args:
+        rows: Filas de ClosedOpsTable (ver ClosedOpsTable.select)
+        by: 'symbol', 'broker', 'hour', 'weekday' o 'holding'
+        symbol_names / broker_names: Nombres de los códigos de la tabla
+        tz: Zona horaria para hour/weekday (ej. 'America/New_York'; None = UTC)
+
+    Returns:
+        Lista de grupos con operaciones: {'group', 'count', 'wins', 'losses',
+        'win_rate', 'profit_factor', 'avg_pl_usd', 'pl_realized_usd',
+        'total_wins_usd', 'total_losses_usd', 'cost_basis', 'avg_holding_days'}.
+        symbol/broker ordenados por P&L (mayor primero); el resto en su
+        orden natural (hora, lunes→domingo, tenencia creciente).
+
+    Raises:
+        ValueError: Dimensión o zona horaria desconocida
+    """
+    codes, labels = group_codes(rows, by, symbol_names, broker_names, tz)
+    stats = grouped_stats(codes, rows['pl_usd'], rows['cost_basis'], rows['holding_us'],
+                          len(labels))
+
+    count = stats['count']
+    present = np.flatnonzero(count)
+    if by in ('symbol', 'broker'):
+        present = present[np.argsort(-stats['pl_realized_usd'][present], kind='stable')]
+
+    wins = stats['wins']
+    losses_usd = stats['total_losses_usd']
+    safe_count = np.maximum(count, 1)
+    win_rate = wins / safe_count * 100
+    # Misma convención que el resumen: 999.99 = sin pérdidas
+    profit_factor = np.where(
+        losses_usd > 0, stats['total_wins_usd'] / np.where(losses_usd > 0, losses_usd, 1.0),
+        np.where(stats['total_wins_usd'] > 0, 999.99, 0.0))
+    avg_pl = stats['pl_realized_usd'] / safe_count
+    avg_holding_days = stats['holding_us'] / safe_count / US_PER_DAY
+
+    return [{
+        'group': labels[i],
+        'count': int(count[i]),
+        'wins': int(wins[i]),
+        'losses': int(count[i] - wins[i]),
+        'win_rate': round(float(win_rate[i]), 2),
+        'profit_factor': round(float(profit_factor[i]), 2),
+        'avg_pl_usd': round(float(avg_pl[i]), 2),
+        'pl_realized_usd': round(float(stats['pl_realized_usd'][i]), 2),
+        'total_wins_usd': round(float(stats['total_wins_usd'][i]), 2),
+        'total_losses_usd': round(float(losses_usd[i]), 2),
+        'cost_basis': round(float(stats['cost_basis'][i]), 2),
+        'avg_holding_days': round(float(avg_holding_days[i]), 2)
+    } for i in present.tolist()]
+
@@ -0,0 +1,284 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Async Adapters - Schwab / Coinbase sobre asyncio       ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Variantes async de SchwabAdapter y CoinbaseAdapter: mismo store,
+  watermark y normalización (heredados), I/O con aiohttp sobre el
+  pool compartido de async_http
+- Los métodos *_async corren en el event loop sin saltar a threads;
+  los métodos sync heredados siguen disponibles
+- Callers concurrentes comparten syncs y quotes en vuelo (SingleFlight,
+  mismo criterio de cobertura que el sync)
+- Concurrencia acotada con semáforos (bloques de backfill Schwab,
+  metadata de productos Coinbase); cada request pasa por el
+  RequestScheduler compartido con las mismas prioridades que el sync
+"""
+
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import operator
+
+import aiohttp
+
+from .async_http import HTTP_ERRORS, Params, Priority, get_json, iter_json_items
+from .coinbase_adapter import CoinbaseAdapter
+from .schwab_adapter import SchwabAdapter
+from .trade_store import TradeStore
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSchwabAdapter(SchwabAdapter):
+    """SchwabAdapter con transacciones y quotes async"""
+
+    def __init__(self, store: Optional[TradeStore] = None):
+        super().__init__(store)
+        self._async_lock = asyncio.Lock()
+
+    async def _get_json(self, url: str, params: Params = None, endpoint: Optional[str] = None,
+                        priority: Priority = Priority.JOURNAL) -> Any:
+        return await get_json(url, headers=self._get_headers(), params=params,
+                              broker=self.BROKER, endpoint=endpoint, priority=priority)
+
+    def _iter_json(self, url: str, params: Params = None, endpoint: Optional[str] = None,
+                   priority: Priority = Priority.JOURNAL) -> AsyncIterator[Any]:
+        """Ver _get_json: elementos del array de la respuesta a medida que llegan"""
+        return iter_json_items(url, headers=self._get_headers(), params=params,
+                               broker=self.BROKER, endpoint=endpoint, priority=priority)
+
+    async def _get_account_hash_async(self, refresh: bool = False) -> str:
+        """Ver SchwabAdapter._get_account_hash"""
+        if self.account_hash and not refresh:
+            return self.account_hash
+        accounts = await self._get_json(f"{self.BASE_URL}/trader/v1/accounts/accountNumbers",
+                                        endpoint="accounts")
+        return self._store_account_hash(accounts)
+
+    async def get_transactions_async(self, days: int = 7) -> List[Dict]:
+        """Ver SchwabAdapter.get_transactions"""
+        logger.info(f"Obteniendo transacciones Schwab async (últimos {days} días)")
+        start_ts = self._window_start(days)
+
+        try:
+            await self._flights.do_async(
+                "transactions", lambda: self._sync_transactions_serialized(start_ts), start_ts, operator.le)
+        except HTTP_ERRORS as e:
+            # No lanzar excepción, usar lo guardado para no romper el journal
+            logger.error(f"Error REST en Schwab API: {e}")
+        except Exception as e:
+            logger.error(f"Error inesperado obteniendo transacciones: {e}")
+
+        with self._sync_lock:
+            return self._stored_transactions(start_ts)
+
+    async def _sync_transactions_serialized(self, start_ts: int) -> int:
+        async with self._async_lock:
+            return await self.sync_transactions_async(start_ts)
+
+    async def sync_transactions_async(self, start_ts: int) -> int:
+        """
+        Ver SchwabAdapter.sync_transactions (bloques con asyncio.gather)
+
+        Raises:
+            aiohttp.ClientError / asyncio.TimeoutError: Error en la API REST
+        """
+        now = datetime.now(timezone.utc)
+        ranges = self._plan_ranges(start_ts, now)
+
+        account_hash = await self._get_account_hash_async()
+        try:
+            chunks = await self._fetch_chunks_async(account_hash, ranges)
+        except aiohttp.ClientResponseError as e:
+            if e.status not in (400, 404):
+                raise
+            # Hash cacheado inválido (cuenta cambiada): pedirlo de nuevo una vez
+            logger.warning("Account hash rechazado - renovando")
+            chunks = await self._fetch_chunks_async(
+                await self._get_account_hash_async(refresh=True), ranges)
+
+        with self._sync_lock:
+            return self._commit_chunks(chunks, start_ts, now)
+
+    async def _fetch_chunks_async(self, account_hash: str,
+                                  ranges: List[Tuple[datetime, datetime]]) -> List[List[Dict]]:
+        """Pide los rangos concurrentemente (hasta MAX_CONCURRENT_CHUNKS a la vez)"""
+        url = f"{self.BASE_URL}{self.ENDPOINT.format(account_hash=account_hash)}"
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CHUNKS)
+
+        async def fetch(start: datetime, end: datetime, priority: Priority) -> List[Dict]:
+            async with semaphore:
+                # Normaliza cada transacción a medida que llega (sin el body entero)
+                normalized = []
+                async for tx in self._iter_json(url, self._range_params(start, end),
+                                                "transactions", priority):
+                    tx = self._normalize_or_skip(tx)
+                    if tx:
+                        normalized.append(tx)
+                return normalized
+
+        return list(await asyncio.gather(*(
+            fetch(start, end, priority)
+            for (start, end), priority in zip(ranges, self._range_priorities(ranges)))))
+
+    async def get_quotes_async(self, symbols: List[str]) -> Dict[str, float]:
+        """Ver SchwabAdapter.get_quotes"""
+        if not symbols:
+            return {}
+        wanted = frozenset(symbols)
+        prices = await self._flights.do_async("quotes", lambda: self._fetch_quotes_async(symbols),
+                                              wanted, frozenset.issuperset)
+        return {symbol: price for symbol, price in prices.items() if symbol in wanted}
+
+    async def _fetch_quotes_async(self, symbols: List[str]) -> Dict[str, float]:
+        try:
+            data = await self._get_json(f"{self.BASE_URL}/marketdata/v1/quotes",
+                                        {"symbols": ",".join(symbols)}, "quotes", Priority.QUOTES)
+            prices = self._parse_quotes(data)
+            logger.info(f"Quotes obtenidos para {len(prices)} símbolos")
+            return prices
+        except Exception as e:
+            logger.error(f"Error obteniendo quotes: {e}")
+            return {}
+
+
+class AsyncCoinbaseAdapter(CoinbaseAdapter):
+    """CoinbaseAdapter con fills y quotes async"""
+
+    def __init__(self, store: Optional[TradeStore] = None):
+        super().__init__(store)
+        self._async_lock = asyncio.Lock()
+
+    async def _get_json(self, path: str, params: Params = None, endpoint: Optional[str] = None,
+                        priority: Priority = Priority.JOURNAL) -> Any:
+        """GET con JWT firmado para el path del endpoint"""
+        jwt = self.jwt_manager.generate_jwt_for_endpoint(method='GET', path=path)
+        headers = {
+            "Authorization": f"Bearer {jwt}",
+            "Accept": "application/json"
+        }
+        return await get_json(f"{self.BASE_URL}{path}", headers=headers, params=params,
+                              broker=self.BROKER, endpoint=endpoint, priority=priority)
+
+    async def get_fills_async(self, days: int = 7) -> List[Dict]:
+        """Ver CoinbaseAdapter.get_fills"""
+        logger.info(f"Obteniendo fills Coinbase async (últimos {days} días)")
+        start_ts = self._window_start(days)
+
+        try:
+            await self._flights.do_async("fills", lambda: self._sync_fills_serialized(start_ts),
+                                         start_ts, operator.le)
+        except HTTP_ERRORS as e:
+            # No lanzar excepción, usar lo guardado para no romper el journal
+            logger.error(f"Error REST en Coinbase API: {e}")
+        except Exception as e:
+            logger.error(f"Error inesperado obteniendo fills: {e}")
+
+        with self._sync_lock:
+            fills = self._stored_fills(start_ts)
+        await self.load_products_async(fill["symbol"] for fill in fills)
+        return fills
+
+    async def load_products_async(self, symbols: Iterable[str]) -> Dict[str, int]:
+        """Ver CoinbaseAdapter.load_products"""
+        missing = self._missing_products(symbols)
+        if missing:
+            await self._fetch_products_async(missing)
+        return self.qty_scales
+
+    async def _sync_fills_serialized(self, start_ts: int) -> int:
+        async with self._async_lock:
+            return await self.sync_fills_async(start_ts)
+
+    async def sync_fills_async(self, start_ts: int) -> int:
+        """
+        Ver CoinbaseAdapter.sync_fills
+
+        Raises:
+            aiohttp.ClientError / asyncio.TimeoutError: Error en la API REST
+            ValueError: Datos inválidos en la respuesta
+        """
+        walk = self._begin_walk(start_ts)
+        for _ in range(self.MAX_PAGES):
+            data = await self._get_json(self.ENDPOINT, self._page_params(walk),
+                                        "fills", self._walk_priority(walk))
+            if not self._walk_page(walk, data):
+                break
+        else:
+            logger.warning(f"Sync Coinbase cortado en {self.MAX_PAGES} páginas")
+
+        with self._sync_lock:
+            return self._finish_walk(walk)
+
+    async def get_quotes_async(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Ver CoinbaseAdapter.get_quotes
+
+        La metadata de productos nuevos y los lotes de best_bid_ask se
+        piden al mismo tiempo.
+        """
+        if not symbols:
+            return {}
+        wanted = frozenset(symbols)
+        prices = await self._flights.do_async("quotes", lambda: self._fetch_quotes_async(symbols),
+                                              wanted, frozenset.issuperset)
+        return {symbol: price for symbol, price in prices.items() if symbol in wanted}
+
+    async def _fetch_quotes_async(self, symbols: List[str]) -> Dict[str, float]:
+        try:
+            symbols = list(dict.fromkeys(symbols))
+
+            products, prices = await asyncio.gather(
+                self._fetch_products_async([s for s in symbols if s not in self.quote_increments]),
+                self._get_best_bid_ask_async(symbols),
+                return_exceptions=True)
+            if isinstance(prices, BaseException):
+                logger.warning(f"best_bid_ask falló, usando precios por producto: {prices}")
+                prices = {}
+            if isinstance(products, BaseException):
+                raise products
+
+            missing = [s for s in symbols if s not in prices and s not in products]
+            products.update(await self._fetch_products_async(missing))
+            self._merge_product_prices(symbols, prices, products)
+
+            logger.info(f"Quotes obtenidos para {len(prices)} símbolos de Coinbase")
+            return prices
+
+        except Exception as e:
+            logger.error(f"Error obteniendo quotes de Coinbase: {e}")
+            return {}
+
+    async def _get_best_bid_ask_async(self, symbols: List[str]) -> Dict[str, float]:
+        """Lotes de QUOTES_BATCH productos pedidos concurrentemente"""
+        batches = [symbols[i:i + self.QUOTES_BATCH] for i in range(0, len(symbols), self.QUOTES_BATCH)]
+        books = await asyncio.gather(*(
+            self._get_json(self.QUOTES_ENDPOINT, [("product_ids", s) for s in batch],
+                           "best_bid_ask", Priority.QUOTES)
+            for batch in batches))
+
+        prices = {}
+        for data in books:
+            prices.update(self._book_prices(data))
+        return prices
+
+    async def _fetch_products_async(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Datos de producto con hasta MAX_CONCURRENT_REQUESTS requests a la vez"""
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+
+        async def fetch(symbol: str) -> Optional[Dict]:
+            async with semaphore:
+                try:
+                    data = await self._get_json(self.PRODUCT_ENDPOINT.format(product_id=symbol),
+                                                endpoint="products", priority=Priority.QUOTES)
+                    return self._store_product(symbol, data)
+                except Exception as e:
+                    logger.error(f"Error obteniendo producto {symbol}: {e}")
+                    return None
+
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        return {symbol: data for symbol, data in zip(symbols, results) if data}
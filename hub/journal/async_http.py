@@ -0,0 +1,127 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Async HTTP - Pool de Conexiones Compartido             ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Una aiohttp.ClientSession por event loop, compartida por los
+  adapters async de ambos brokers (keep-alive, pool TCP acotado)
+- GET → JSON con timeout y raise_for_status; con broker, cada request
+  espera su turno en el RequestScheduler compartido con el código sync
+- GET → elementos de un array JSON a medida que llegan (json_stream),
+  para respuestas grandes que no conviene tener enteras en memoria
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
+import logging
+
+import aiohttp
+
+from .json_stream import STREAM_CHUNK_SIZE, aiter_json_array
+
+try:
+    from ..managers.request_scheduler import Priority, get_scheduler, retry_after_seconds
+except ImportError:
+    # Importado como paquete 'journal' (scripts con hub/ en sys.path)
+    from managers.request_scheduler import Priority, get_scheduler, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = 20
+MAX_CONNECTIONS_PER_HOST = 8
+REQUEST_TIMEOUT = 10
+
+# Errores de red/API que los adapters tratan como "usar el cache"
+HTTP_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+Params = Union[Dict[str, Any], List[Tuple[str, Any]], None]
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """ClientSession compartida del event loop actual (se crea al primer uso)"""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS,
+                                         limit_per_host=MAX_CONNECTIONS_PER_HOST)
+        _session = aiohttp.ClientSession(connector=connector,
+                                         timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+        _session_loop = loop
+        logger.info(f"🌐 Pool HTTP async iniciado ({MAX_CONNECTIONS} conexiones)")
+    return _session
+
+
+@asynccontextmanager
+async def _scheduled_get(url: str, headers: Optional[Dict[str, str]], params: Params,
+                         broker: Optional[str], endpoint: Optional[str],
+                         priority: Priority) -> AsyncIterator[aiohttp.ClientResponse]:
+    """
+    Response ya validada (raise_for_status) de un GET con la sesión compartida
+
+    Con broker, el request espera turno en el scheduler (como
+    request_scheduler.scheduled_get: un 429 pausa al broker y se
+    reintenta una vez)
+    """
+    scheduler = get_scheduler() if broker else None
+    for attempt in range(2):
+        if scheduler:
+            await scheduler.acquire_async(broker, endpoint, priority)
+        async with get_session().get(url, headers=headers, params=params) as response:
+            if response.status == 429 and scheduler and attempt == 0:
+                scheduler.throttled(broker, retry_after_seconds(response.headers))
+                continue
+            response.raise_for_status()
+            yield response
+            return
+
+
+async def get_json(url: str, headers: Optional[Dict[str, str]] = None,
+                   params: Params = None, broker: Optional[str] = None,
+                   endpoint: Optional[str] = None, priority: Priority = Priority.JOURNAL) -> Any:
+    """
+    GET con la sesión compartida
+
+    Args:
+        broker: Si se indica, el request espera turno en el scheduler
+        endpoint / priority: Bucket del endpoint y prioridad en la cola
+
+    Raises:
+        aiohttp.ClientResponseError: Status HTTP de error
+        aiohttp.ClientError / asyncio.TimeoutError: Error de red
+        RateLimitTimeout: Sin turno en el scheduler
+    """
+    async with _scheduled_get(url, headers, params, broker, endpoint, priority) as response:
+        return await response.json(content_type=None)
+
+
+async def iter_json_items(url: str, headers: Optional[Dict[str, str]] = None,
+                          params: Params = None, key: Optional[str] = None,
+                          broker: Optional[str] = None, endpoint: Optional[str] = None,
+                          priority: Priority = Priority.JOURNAL) -> AsyncIterator[Any]:
+    """
+    Ver get_json: elementos del array de la respuesta a medida que llegan
+
+    Args:
+        key: Clave del objeto raíz con el array (None = la respuesta es el array)
+
+    Raises:
+        Los de get_json, más ValueError si el JSON llega truncado o inválido
+    """
+    async with _scheduled_get(url, headers, params, broker, endpoint, priority) as response:
+        async for item in aiter_json_array(response.content.iter_chunked(STREAM_CHUNK_SIZE), key):
+            yield item
+
+
+async def close_session():
+    """Cierra la sesión compartida (al apagar el servidor)"""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
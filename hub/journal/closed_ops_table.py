@@ -0,0 +1,183 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Closed Ops Table - Operaciones Cerradas Columnar        ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Almacena las operaciones cerradas en un record array de NumPy,
+  ordenado por fecha de venta
+- Calcula agregados (wins, losses, profit factor, P&L, capital) por
+  ventana / broker / símbolo con reducciones vectorizadas sobre máscaras
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ClosedOpsTable:
+    """
+    Tabla columnar de operaciones cerradas
+
+    Filas: (sell_ts, pl_usd, cost_basis, sell_proceeds, qty, holding_us, symbol, broker)
+    symbol y broker se guardan como códigos enteros (ver symbol_names/broker_names).
+    """
+
+    DTYPE = np.dtype([
+        ('sell_ts', 'i8'),        # Epoch µs de la venta
+        ('pl_usd', 'f8'),
+        ('cost_basis', 'f8'),
+        ('sell_proceeds', 'f8'),
+        ('qty', 'f8'),
+        ('holding_us', 'i8'),     # Tenencia promedio ponderada por qty
+        ('symbol', 'i4'),
+        ('broker', 'i2'),
+    ])
+
+    def __init__(self, capacity: int = 1024):
+        self._data = np.zeros(capacity, dtype=self.DTYPE)
+        self._size = 0
+        self.symbol_names: List[str] = []
+        self.broker_names: List[str] = []
+        self._symbol_codes: Dict[str, int] = {}
+        self._broker_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def data(self) -> np.ndarray:
+        """Vista de las filas válidas (ordenadas por sell_ts)"""
+        return self._data[:self._size]
+
+    # ------------------------------------------------------------------
+    # Códigos de símbolo / broker
+    # ------------------------------------------------------------------
+
+    def symbol_code(self, symbol: str) -> int:
+        code = self._symbol_codes.get(symbol)
+        if code is None:
+            code = self._symbol_codes[symbol] = len(self.symbol_names)
+            self.symbol_names.append(symbol)
+        return code
+
+    def broker_code(self, broker: str) -> int:
+        code = self._broker_codes.get(broker)
+        if code is None:
+            code = self._broker_codes[broker] = len(self.broker_names)
+            self.broker_names.append(broker)
+        return code
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def row(self, sell_ts: int, op) -> Tuple:
+        """Convierte una op cerrada (ClosedOp de SymbolLedger) a fila de la tabla"""
+        return (sell_ts, op.pl_usd, op.cost_basis, op.sell_proceeds, op.qty, op.holding_us,
+                self.symbol_code(op.symbol), self.broker_code(op.broker))
+
+    def extend(self, rows: List[Tuple]) -> bool:
+        """
+        Agrega filas ordenadas por sell_ts
+
+        Caso común (todas posteriores a la última fila): copia al final con
+        crecimiento amortizado. Si no, reordena con argsort estable.
+
+        Returns:
+            True si las filas quedaron al final (sin reordenar)
+        """
+        if not rows:
+            return True
+        new = np.array(rows, dtype=self.DTYPE)
+        in_order = self._size == 0 or new['sell_ts'][0] >= self._data['sell_ts'][self._size - 1]
+
+        needed = self._size + len(new)
+        if needed > len(self._data):
+            grown = np.zeros(max(needed, 2 * len(self._data)), dtype=self.DTYPE)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+
+        self._data[self._size:needed] = new
+        self._size = needed
+
+        if not in_order:
+            valid = self._data[:self._size]
+            order = np.argsort(valid['sell_ts'], kind='stable')
+            self._data[:self._size] = valid[order]
+        return in_order
+
+    def remove_symbols(self, symbols: Iterable[str]) -> int:
+        """Elimina todas las filas de los símbolos dados; retorna cuántas"""
+        codes = [self._symbol_codes[s] for s in symbols if s in self._symbol_codes]
+        if not codes or self._size == 0:
+            return 0
+        valid = self._data[:self._size]
+        keep = ~np.isin(valid['symbol'], codes)
+        kept = valid[keep]
+        removed = self._size - len(kept)
+        self._data[:len(kept)] = kept
+        self._size = len(kept)
+        return removed
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def select(self, cutoff: Optional[int] = None, broker: Optional[str] = None,
+               symbol: Optional[str] = None) -> np.ndarray:
+        """
+        Filas con sell_ts >= cutoff filtradas por broker/símbolo
+
+        El corte por fecha es un searchsorted (la tabla está ordenada);
+        broker y símbolo se aplican como máscaras.
+        """
+        rows = self.data
+        if cutoff is not None:
+            rows = rows[np.searchsorted(rows['sell_ts'], cutoff, side='left'):]
+
+        mask = None
+        if broker is not None:
+            code = self._broker_codes.get(broker)
+            if code is None:
+                return rows[:0]
+            mask = rows['broker'] == code
+        if symbol is not None:
+            code = self._symbol_codes.get(symbol)
+            if code is None:
+                return rows[:0]
+            symbol_mask = rows['symbol'] == code
+            mask = symbol_mask if mask is None else (mask & symbol_mask)
+
+        return rows if mask is None else rows[mask]
+
+    @staticmethod
+    def aggregate_rows(rows: np.ndarray) -> Dict:
+        """
+        Agregados de un conjunto de filas (reducciones vectorizadas)
+
+        Returns:
+            {'count', 'wins', 'losses', 'total_wins_usd', 'total_losses_usd',
+             'pl_realized_usd', 'cost_basis'} con tipos nativos de Python
+        """
+        pl = rows['pl_usd']
+        win_mask = pl > 0
+        wins = int(np.count_nonzero(win_mask))
+        return {
+            'count': int(len(rows)),
+            'wins': wins,
+            'losses': int(len(rows) - wins),
+            'total_wins_usd': float(pl[win_mask].sum()),
+            'total_losses_usd': float(abs(pl[~win_mask].sum())),
+            'pl_realized_usd': float(pl.sum()),
+            'cost_basis': float(rows['cost_basis'].sum())
+        }
+
+    def aggregate(self, cutoff: Optional[int] = None, broker: Optional[str] = None,
+                  symbol: Optional[str] = None) -> Dict:
+        """Agregados de las filas seleccionadas (ver select / aggregate_rows)"""
+        return self.aggregate_rows(self.select(cutoff, broker=broker, symbol=symbol))
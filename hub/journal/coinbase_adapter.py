@@ -5,27 +5,71 @@
 ╚═══════════════════════════════════════════════════════════════╝
 
 Responsabilidad Única:
-- Obtiene fills de Coinbase API
+- Obtiene fills de Coinbase API (paginación por cursor, sync
+  incremental desde un high-watermark persistido en el TradeStore)
 - Normaliza a formato común
 - Maneja errores específicos de Coinbase
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import logging
+import operator
+import sqlite3
+import threading
 import requests
 
+from .fixed_point import increment_scale
+from .single_flight import SingleFlight
+from .timestamps import to_epoch_us
+from .trade_store import TradeStore, get_default_store
+
+try:
+    from ..managers.request_scheduler import Priority, scheduled_get
+except ImportError:
+    # Importado como paquete 'journal' (scripts con hub/ en sys.path)
+    from managers.request_scheduler import Priority, scheduled_get
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class FillsWalk:
+    """Estado de una pasada de paginación (de más nuevo a más viejo)"""
+    start_ts: int
+    mark_ts: Optional[int]
+    mark_id: Optional[str]
+    backfill: bool
+    cursor: Optional[str] = None
+    fetched: Dict[str, Dict] = field(default_factory=dict)
+    oldest_ts: Optional[int] = None
+    reached_mark: bool = False
+    exhausted: bool = False
+
+
 class CoinbaseAdapter:
     """Adaptador exclusivo para Coinbase - obtiene y normaliza fills"""
     
     BASE_URL = "https://api.coinbase.com"
     ENDPOINT = "/api/v3/brokerage/orders/historical/fills"
+    QUOTES_ENDPOINT = "/api/v3/brokerage/best_bid_ask"
+    PRODUCT_ENDPOINT = "/api/v3/brokerage/products/{product_id}"
+    QUOTES_BATCH = 100
+    MAX_CONCURRENT_REQUESTS = 8
+    PAGE_LIMIT = 100
+    MAX_PAGES = 500
+    BROKER = "coinbase"
     
-    def __init__(self):
-        """Inicializa el adaptador con JWT manager"""
+    def __init__(self, store: Optional[TradeStore] = None):
+        """
+        Inicializa el adaptador con JWT manager
+        
+        Args:
+            store: TradeStore donde se persisten fills + watermark
+                   (default el store compartido, ver get_default_store)
+        """
         try:
             # Importar desde hub.managers
             import sys
@@ -40,6 +84,11 @@ class CoinbaseAdapter:
             
             # Cache de quote_increment por símbolo para formateo correcto
             self.quote_increments: Dict[str, str] = {}
+            # Unidades base por unidad de cantidad (base_increment) para el FIFO entero
+            self.qty_scales: Dict[str, int] = {}
+            
+            # Fills ya sincronizados + high-watermark (sync incremental)
+            self._init_sync_state(store)
         except ImportError as e:
             logger.error(f"Error importando CoinbaseJWTManager: {e}")
             raise
@@ -64,71 +113,213 @@ class CoinbaseAdapter:
         """
         Obtiene y normaliza fills de Coinbase
         
+        Sincroniza primero los fills nuevos (ver sync_fills) y devuelve los
+        de la ventana desde el TradeStore. Ante un error de la API
+        devuelve lo ya guardado. Antes de devolverlos completa la metadata
+        de los productos nuevos (ver load_products).
+        
         Args:
             days: Número de días hacia atrás a consultar
             
         Returns:
-            Lista de fills normalizados
-            
-        Raises:
-            requests.RequestException: Error en la API REST
-            ValueError: Datos inválidos en la respuesta
+            Lista de fills normalizados (más recientes primero)
         """
+        logger.info(f"Obteniendo fills Coinbase (últimos {days} días)")
+        start_ts = self._window_start(days)
+        
         try:
-            logger.info(f"Obteniendo fills Coinbase (últimos {days} días)")
-            
-            # Calcular fecha de inicio con timezone UTC
-            start_date = datetime.now(datetime.now().astimezone().tzinfo) - timedelta(days=days)
-            
-            # URL del endpoint (SIN start_sequence_timestamp que causa 401)
-            url = f"{self.BASE_URL}{self.ENDPOINT}"
-            
-            # Parámetros: solo limit (Coinbase devuelve los más recientes primero)
-            params = {
-                "limit": 100  # Coinbase máximo por página
-            }
-            
-            # Request con JWT fresco
-            headers = self._get_headers()
-            response = self.session.get(url, headers=headers, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            fills = data.get("fills", [])
-            
-            if not isinstance(fills, list):
-                logger.warning(f"Fills no es lista: {type(fills)}")
-                return []
-            
-            # Filtrar por fecha y normalizar
-            normalized = []
-            for fill in fills:
-                try:
-                    # Verificar fecha antes de normalizar
-                    trade_time = fill.get("trade_time", "")
-                    if trade_time:
-                        fill_date = datetime.fromisoformat(trade_time.replace("Z", "+00:00"))
-                        if fill_date < start_date:
-                            continue  # Saltar fills antiguos
-                    
-                    normalized_fill = self._normalize_fill(fill)
-                    if normalized_fill:
-                        normalized.append(normalized_fill)
-                except Exception as e:
-                    logger.warning(f"Fill individual rechazado: {e}")
-                    continue
-            
-            logger.info(f"✅ {len(normalized)} fills normalizados de Coinbase")
-            return normalized
-            
+            # Un sync en vuelo desde start_ts o antes también cubre esta ventana
+            self._flights.do("fills", lambda: self._sync_fills_locked(start_ts), start_ts, operator.le)
         except requests.RequestException as e:
+            # No lanzar excepción, usar lo guardado para no romper el journal
             logger.error(f"Error REST en Coinbase API: {e}")
-            # No lanzar excepción, devolver lista vacía para no romper el journal
-            return []
         except Exception as e:
             logger.error(f"Error inesperado obteniendo fills: {e}")
-            # No lanzar excepción, devolver lista vacía para no romper el journal
+        
+        with self._sync_lock:
+            fills = self._stored_fills(start_ts)
+        self.load_products(fill["symbol"] for fill in fills)
+        return fills
+    
+    def load_products(self, symbols: Iterable[str]) -> Dict[str, int]:
+        """
+        Pide la metadata (increments) de los productos que todavía no tiene
+        
+        Aparte de las quotes: la escala de cantidad del FIFO entero no
+        depende de que el símbolo pase por get_quotes (un hit del
+        QuoteCache lo salta). En estado estable no hace requests.
+        
+        Returns:
+            qty_scales {symbol: unidades base por unidad}
+        """
+        self._fetch_products(self._missing_products(symbols))
+        return self.qty_scales
+    
+    def _missing_products(self, symbols: Iterable[str]) -> List[str]:
+        return [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.qty_scales]
+    
+    def sync_fills(self, start_ts: int) -> int:
+        """
+        Descarga los fills posteriores al high-watermark (paginación por cursor)
+        
+        Coinbase devuelve los más recientes primero: se pagina hasta
+        alcanzar el watermark (estado estable: una sola página). Si el
+        historial guardado no llega hasta start_ts se sigue paginando hasta
+        cubrirlo. El store y el watermark se actualizan solo al terminar la
+        pasada (juntos, en una transacción): un error a mitad de camino no
+        deja huecos.
+        
+        Args:
+            start_ts: Epoch µs desde el que se necesita historial completo
+        
+        Returns:
+            Cantidad de fills nuevos
+        
+        Raises:
+            requests.RequestException: Error en la API REST
+            ValueError: Datos inválidos en la respuesta
+        """
+        # URL del endpoint (SIN start_sequence_timestamp que causa 401)
+        url = f"{self.BASE_URL}{self.ENDPOINT}"
+        walk = self._begin_walk(start_ts)
+        for _ in range(self.MAX_PAGES):
+            # Request con JWT fresco
+            response = scheduled_get(self.session, self.BROKER, "fills", url, self._walk_priority(walk),
+                                     headers=self._get_headers(),
+                                     params=self._page_params(walk), timeout=10)
+            response.raise_for_status()
+            if not self._walk_page(walk, response.json()):
+                break
+        else:
+            logger.warning(f"Sync Coinbase cortado en {self.MAX_PAGES} páginas")
+        return self._finish_walk(walk)
+    
+    def _sync_fills_locked(self, start_ts: int) -> int:
+        with self._sync_lock:
+            return self.sync_fills(start_ts)
+    
+    # Pasos de la paginación compartidos con AsyncCoinbaseAdapter
+    
+    @staticmethod
+    def _window_start(days: int) -> int:
+        """Epoch µs de inicio de la ventana de days días"""
+        return to_epoch_us(datetime.now().astimezone() - timedelta(days=days))
+    
+    def _stored_fills(self, start_ts: int) -> List[Dict]:
+        """Fills guardados desde start_ts, más recientes primero (índice broker+fecha del store)"""
+        try:
+            normalized = self.store.trades(self.BROKER, since_us=start_ts)
+        except sqlite3.Error as e:
+            logger.error(f"No se pudo leer fills Coinbase del store: {e}")
             return []
+        logger.info(f"✅ {len(normalized)} fills normalizados de Coinbase")
+        return normalized
+    
+    def _begin_walk(self, start_ts: int) -> FillsWalk:
+        return FillsWalk(
+            start_ts=start_ts,
+            mark_ts=self.watermark["ts_us"] if self.watermark else None,
+            mark_id=self.watermark["trade_id"] if self.watermark else None,
+            backfill=self.covered_from_us is None or start_ts < self.covered_from_us
+        )
+    
+    @staticmethod
+    def _walk_priority(walk: FillsWalk) -> Priority:
+        """Completar historial viejo cede el turno a quotes y syncs al día"""
+        return Priority.BACKFILL if walk.backfill else Priority.JOURNAL
+    
+    def _page_params(self, walk: FillsWalk) -> Dict:
+        params = {"limit": self.PAGE_LIMIT}  # Coinbase máximo por página
+        if walk.cursor:
+            params["cursor"] = walk.cursor
+        return params
+    
+    def _walk_page(self, walk: FillsWalk, data: Dict) -> bool:
+        """
+        Acumula una página en la pasada
+        
+        Returns:
+            True si hay que pedir la página siguiente
+        
+        Raises:
+            ValueError: Datos inválidos en la respuesta
+        """
+        fills = data.get("fills", [])
+        if not isinstance(fills, list):
+            raise ValueError(f"Fills no es lista: {type(fills)}")
+        
+        for fill in fills:
+            normalized_fill = self._normalize_fill(fill)
+            if not normalized_fill:
+                continue
+            ts = normalized_fill["ts_us"]
+            walk.fetched[normalized_fill["id"]] = normalized_fill
+            walk.oldest_ts = ts if walk.oldest_ts is None else min(walk.oldest_ts, ts)
+            if walk.mark_ts is not None and (ts < walk.mark_ts or normalized_fill["id"] == walk.mark_id):
+                walk.reached_mark = True
+        
+        walk.cursor = data.get("cursor")
+        if not fills or not walk.cursor:
+            walk.exhausted = True
+            return False
+        if walk.backfill:
+            return walk.oldest_ts is None or walk.oldest_ts >= walk.start_ts
+        return not walk.reached_mark
+    
+    def _finish_walk(self, walk: FillsWalk) -> int:
+        """
+        Persiste la pasada + watermark; devuelve los fills nuevos
+        
+        Si el store falla, el watermark y la cobertura no avanzan: el
+        sync siguiente vuelve a pedir esos fills.
+        """
+        fetched = walk.fetched
+        watermark, covered_from_us = self.watermark, self.covered_from_us
+        
+        # Watermark/cobertura solo si la pasada empalmó con lo ya guardado
+        if walk.exhausted or walk.reached_mark or walk.mark_ts is None:
+            if fetched:
+                newest = max(fetched.values(), key=lambda fill: fill["ts_us"])
+                if walk.mark_ts is None or newest["ts_us"] >= walk.mark_ts:
+                    watermark = {"trade_time": newest["datetime"], "trade_id": newest["id"],
+                                 "ts_us": newest["ts_us"]}
+            if walk.exhausted:
+                covered_from_us = 0
+            elif walk.oldest_ts is not None:
+                covered_from_us = walk.oldest_ts if covered_from_us is None \
+                    else min(covered_from_us, walk.oldest_ts)
+        
+        new_count = 0
+        if fetched:
+            new_count = self._save_state(fetched.values(), {"watermark": watermark,
+                                                            "covered_from_us": covered_from_us})
+            if new_count is None:
+                return 0
+        self.watermark, self.covered_from_us = watermark, covered_from_us
+        logger.debug(f"Sync Coinbase: {new_count} fills nuevos, watermark {self.watermark}")
+        return new_count
+    
+    def _init_sync_state(self, store: Optional[TradeStore] = None):
+        """Watermark hidratado desde el TradeStore (los fills se leen del store por ventana)"""
+        self.store = store or get_default_store()
+        state = self.store.get_state(self.BROKER) or {}
+        # Último fill sincronizado: {'trade_time', 'trade_id', 'ts_us'}
+        self.watermark: Optional[Dict] = state.get("watermark")
+        # Epoch µs desde el que el store tiene todos los fills (0 = historial completo)
+        self.covered_from_us: Optional[int] = state.get("covered_from_us")
+        self._sync_lock = threading.Lock()
+        # Syncs/quotes en vuelo compartidos por callers concurrentes
+        self._flights = SingleFlight()
+        if self.watermark:
+            logger.info(f"Coinbase desde el store: watermark {self.watermark}")
+    
+    def _save_state(self, fills: Iterable[Dict], state: Dict) -> Optional[int]:
+        """Persiste los fills de la pasada + watermark en una transacción del store (None si falla)"""
+        try:
+            return self.store.commit_sync(self.BROKER, fills, state)
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo guardar fills Coinbase en el store: {e}")
+            return None
     
     def _normalize_fill(self, fill: Dict) -> Optional[Dict]:
         """
@@ -174,10 +365,11 @@ class CoinbaseAdapter:
                 datetime_obj = datetime.now()
                 logger.debug(f"Fecha no válida: {date_str}, usando ahora")
             
-            # Formato normalizado
+            # Formato normalizado (ts_us: epoch µs para ordenar/filtrar sin parsear)
             return {
                 "id": trade_id,
                 "datetime": datetime_obj.isoformat(),
+                "ts_us": to_epoch_us(datetime_obj),
                 "symbol": product_id,
                 "side": side,  # BUY o SELL
                 "quantity": size,
@@ -196,7 +388,16 @@ class CoinbaseAdapter:
     
     def get_quotes(self, symbols: List[str]) -> Dict[str, float]:
         """
-        Obtiene cotizaciones actuales de Coinbase Products API
+        Obtiene cotizaciones actuales de Coinbase
+        
+        Precios en lote con best_bid_ask (punto medio bid/ask, un request
+        por cada QUOTES_BATCH símbolos). La metadata de producto
+        (quote_increment, base_increment) se pide una sola vez por símbolo,
+        en paralelo (hasta MAX_CONCURRENT_REQUESTS); los símbolos sin
+        precio en el lote usan el precio de esa misma consulta por producto.
+        
+        Callers concurrentes comparten la consulta en vuelo si sus símbolos
+        están incluidos en ella (ver SingleFlight).
         
         Args:
             symbols: Lista de símbolos (ej: ["BTC-USD", "ETH-USD"])
@@ -205,47 +406,32 @@ class CoinbaseAdapter:
             Dict con symbol: precio actual
             Ejemplo: {"BTC-USD": 76234.50, "ETH-USD": 3456.78}
         """
+        if not symbols:
+            return {}
+        wanted = frozenset(symbols)
+        prices = self._flights.do("quotes", lambda: self._fetch_quotes(symbols),
+                                  wanted, frozenset.issuperset)
+        return {symbol: price for symbol, price in prices.items() if symbol in wanted}
+    
+    def _fetch_quotes(self, symbols: List[str]) -> Dict[str, float]:
+        """Ver get_quotes (una consulta, sin coalescing)"""
         try:
             if not symbols:
                 return {}
+            symbols = list(dict.fromkeys(symbols))
+            
+            # Metadata cacheada aparte de los precios: solo productos nuevos
+            products = self._fetch_products([s for s in symbols if s not in self.quote_increments])
             
-            prices = {}
+            try:
+                prices = self._get_best_bid_ask(symbols)
+            except Exception as e:
+                logger.warning(f"best_bid_ask falló, usando precios por producto: {e}")
+                prices = {}
             
-            # Coinbase requiere requests individuales por producto
-            for symbol in symbols:
-                try:
-                    # GET /api/v3/brokerage/products/{product_id}
-                    endpoint = f"/api/v3/brokerage/products/{symbol}"
-                    jwt = self.jwt_manager.generate_jwt_for_endpoint(
-                        method='GET',
-                        path=endpoint
-                    )
-                    
-                    headers = {
-                        "Authorization": f"Bearer {jwt}",
-                        "Accept": "application/json"
-                    }
-                    
-                    url = f"{self.BASE_URL}{endpoint}"
-                    response = self.session.get(url, headers=headers, timeout=10)
-                    response.raise_for_status()
-                    
-                    data = response.json()
-                    
-                    # El precio está en data['price']
-                    if 'price' in data:
-                        prices[symbol] = float(data['price'])
-                        
-                        # Guardar quote_increment para formateo correcto
-                        if 'quote_increment' in data:
-                            self.quote_increments[symbol] = data['quote_increment']
-                            logger.debug(f"{symbol} quote_increment: {data['quote_increment']}")
-                    else:
-                        logger.warning(f"No se encontró precio para {symbol}")
-                        
-                except Exception as e:
-                    logger.error(f"Error obteniendo quote para {symbol}: {e}")
-                    continue
+            missing = [s for s in symbols if s not in prices and s not in products]
+            products.update(self._fetch_products(missing))
+            self._merge_product_prices(symbols, prices, products)
             
             logger.info(f"Quotes obtenidos para {len(prices)} símbolos de Coinbase")
             return prices
@@ -254,6 +440,88 @@ class CoinbaseAdapter:
             logger.error(f"Error obteniendo quotes de Coinbase: {e}")
             return {}
     
+    def _get_best_bid_ask(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Punto medio bid/ask de varios productos por request
+        
+        Raises:
+            requests.RequestException: Error en la API REST
+        """
+        prices = {}
+        for i in range(0, len(symbols), self.QUOTES_BATCH):
+            batch = symbols[i:i + self.QUOTES_BATCH]
+            jwt = self.jwt_manager.generate_jwt_for_endpoint(method='GET', path=self.QUOTES_ENDPOINT)
+            headers = {
+                "Authorization": f"Bearer {jwt}",
+                "Accept": "application/json"
+            }
+            response = scheduled_get(self.session, self.BROKER, "best_bid_ask",
+                                     f"{self.BASE_URL}{self.QUOTES_ENDPOINT}", Priority.QUOTES,
+                                     headers=headers, params={"product_ids": batch}, timeout=10)
+            response.raise_for_status()
+            prices.update(self._book_prices(response.json()))
+        return prices
+    
+    @staticmethod
+    def _book_prices(data: Dict) -> Dict[str, float]:
+        """Punto medio bid/ask de cada pricebook (solo un lado si el otro está vacío)"""
+        prices = {}
+        for book in data.get("pricebooks", []):
+            bids, asks = book.get("bids") or [], book.get("asks") or []
+            sides = [float(level[0]["price"]) for level in (bids, asks) if level]
+            if book.get("product_id") and sides:
+                prices[book["product_id"]] = sum(sides) / len(sides)
+        return prices
+    
+    @staticmethod
+    def _merge_product_prices(symbols: List[str], prices: Dict[str, float],
+                              products: Dict[str, Dict]):
+        """Completa prices con el precio de producto de los símbolos sin libro"""
+        for symbol in symbols:
+            if symbol not in prices and 'price' in products.get(symbol, {}):
+                prices[symbol] = float(products[symbol]['price'])
+            elif symbol not in prices:
+                logger.warning(f"No se encontró precio para {symbol}")
+    
+    def _fetch_products(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Datos de producto en paralelo (acotado); cachea los increments"""
+        if not symbols:
+            return {}
+        workers = min(len(symbols), self.MAX_CONCURRENT_REQUESTS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = dict(zip(symbols, pool.map(self._get_product, symbols)))
+        return {symbol: data for symbol, data in results.items() if data}
+    
+    def _get_product(self, symbol: str) -> Optional[Dict]:
+        """GET /api/v3/brokerage/products/{product_id} (None si falla)"""
+        try:
+            endpoint = self.PRODUCT_ENDPOINT.format(product_id=symbol)
+            jwt = self.jwt_manager.generate_jwt_for_endpoint(
+                method='GET',
+                path=endpoint
+            )
+            headers = {
+                "Authorization": f"Bearer {jwt}",
+                "Accept": "application/json"
+            }
+            response = scheduled_get(self.session, self.BROKER, "products", f"{self.BASE_URL}{endpoint}",
+                                     Priority.QUOTES, headers=headers, timeout=10)
+            response.raise_for_status()
+            return self._store_product(symbol, response.json())
+        except Exception as e:
+            logger.error(f"Error obteniendo producto {symbol}: {e}")
+            return None
+    
+    def _store_product(self, symbol: str, data: Dict) -> Dict:
+        """Cachea los increments de un producto (metadata, aparte de los precios)"""
+        # Guardar quote_increment para formateo correcto
+        if 'quote_increment' in data:
+            self.quote_increments[symbol] = data['quote_increment']
+            logger.debug(f"{symbol} quote_increment: {data['quote_increment']}")
+        if 'base_increment' in data:
+            self.qty_scales[symbol] = increment_scale(data['base_increment'])
+        return data
+    
     def get_decimals_for_symbol(self, symbol: str) -> int:
         """
         Determina el número de decimales correcto para un símbolo basado en quote_increment
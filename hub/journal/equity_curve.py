@@ -0,0 +1,204 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Equity Curve - P&L Realizado Acumulado y Drawdown      ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Serie temporal del P&L realizado acumulado (una fila por operación
+  cerrada, en orden de venta) con pico corriente y drawdown
+- Se extiende en O(k) desde el último estado cuando el FifoLedger
+  agrega k operaciones cerradas al final; solo se reconstruye
+  (vectorizado) si el historial cerrado cambió hacia atrás
+- Responde gráficos y estadísticas de drawdown por ventana sin volver
+  a los trades crudos
+- Guarda también sumas acumuladas de wins y ganancia bruta: junto con
+  la equity (P&L acumulado) permiten métricas rolling en O(1) por punto
+  (ver rolling_metrics)
+"""
+
+from typing import Dict, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+US_PER_DAY = 86_400 * 1_000_000
+
+
+def running_peak(ts: np.ndarray, equity: np.ndarray, peak0: float,
+                 peak_ts0: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pico corriente y fecha del pico para una serie de equity
+
+    Args:
+        ts: Epoch µs de cada punto
+        equity: Equity acumulada en cada punto
+        peak0: Pico antes del primer punto (0 al inicio de la serie)
+        peak_ts0: Fecha de ese pico
+
+    Returns:
+        (peak, peak_ts) del mismo largo que equity
+    """
+    peak = np.maximum.accumulate(np.concatenate(([peak0], equity)))[1:]
+    at_peak = equity >= peak
+    idx = np.maximum.accumulate(np.where(at_peak, np.arange(len(equity)), -1))
+    peak_ts = np.where(idx >= 0, ts[np.maximum(idx, 0)], peak_ts0)
+    return peak, peak_ts
+
+
+class EquityCurve:
+    """
+    Curva de equity realizada de un conjunto de operaciones cerradas
+
+    Filas: (ts, equity, peak, peak_ts, wins, gross_win); drawdown = peak - equity.
+    """
+
+    DTYPE = np.dtype([
+        ('ts', 'i8'),          # Epoch µs de la venta
+        ('equity', 'f8'),      # P&L realizado acumulado
+        ('peak', 'f8'),        # Máximo de equity hasta este punto
+        ('peak_ts', 'i8'),     # Fecha en que se alcanzó ese máximo
+        ('wins', 'i8'),        # Operaciones ganadoras acumuladas
+        ('gross_win', 'f8'),   # Ganancia bruta acumulada (suma de P&L > 0)
+    ])
+
+    def __init__(self, capacity: int = 1024):
+        self._data = np.zeros(capacity, dtype=self.DTYPE)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def data(self) -> np.ndarray:
+        """Vista de las filas válidas (ordenadas por ts)"""
+        return self._data[:self._size]
+
+    def clear(self):
+        self._size = 0
+
+    def extend(self, ts: np.ndarray, pl: np.ndarray):
+        """
+        Agrega operaciones cerradas posteriores a la última fila
+
+        Continúa equity/pico desde el último punto: O(k) para k filas.
+        """
+        ts = np.asarray(ts, dtype=np.int64)
+        pl = np.asarray(pl, dtype=np.float64)
+        if len(ts) == 0:
+            return
+        if self._size:
+            last = self._data[self._size - 1]
+            equity0, peak0, peak_ts0 = float(last['equity']), float(last['peak']), int(last['peak_ts'])
+            wins0, gross_win0 = int(last['wins']), float(last['gross_win'])
+        else:
+            equity0, peak0, peak_ts0 = 0.0, 0.0, int(ts[0])
+            wins0, gross_win0 = 0, 0.0
+
+        equity = equity0 + np.cumsum(pl)
+        peak, peak_ts = running_peak(ts, equity, peak0, peak_ts0)
+        win = pl > 0
+
+        needed = self._size + len(ts)
+        if needed > len(self._data):
+            grown = np.zeros(max(needed, 2 * len(self._data)), dtype=self.DTYPE)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+
+        new = self._data[self._size:needed]
+        new['ts'] = ts
+        new['equity'] = equity
+        new['peak'] = peak
+        new['peak_ts'] = peak_ts
+        new['wins'] = wins0 + np.cumsum(win)
+        new['gross_win'] = gross_win0 + np.cumsum(np.where(win, pl, 0.0))
+        self._size = needed
+
+    def rebuild(self, ts: np.ndarray, pl: np.ndarray):
+        """Recalcula la curva completa (historial cerrado modificado)"""
+        self.clear()
+        self.extend(ts, pl)
+
+    def window(self, cutoff: Optional[int] = None) -> np.ndarray:
+        """
+        Filas con ts >= cutoff, con la equity re-basada a 0 en el corte
+
+        Sin cutoff retorna la curva almacenada; con cutoff el pico y su
+        fecha se recalculan dentro de la ventana (O(filas de la ventana)).
+        """
+        rows = self.data
+        if cutoff is None:
+            return rows
+        start = int(np.searchsorted(rows['ts'], cutoff, side='left'))
+        window = rows[start:].copy()
+        if len(window) == 0:
+            return window
+        base = float(rows['equity'][start - 1]) if start > 0 else 0.0
+        window['equity'] -= base
+        window['peak'], window['peak_ts'] = running_peak(window['ts'], window['equity'], 0.0, cutoff)
+        return window
+
+    @staticmethod
+    def drawdown_stats_rows(rows: np.ndarray, now: Optional[int] = None) -> Dict:
+        """
+        Estadísticas de drawdown de una serie (ver window)
+
+        La duración de un drawdown va desde el pico hasta la recuperación;
+        si sigue abierto, hasta now (o el último punto).
+
+        Returns:
+            {'max_drawdown_usd', 'max_drawdown_days',
+             'current_drawdown_usd', 'current_drawdown_days'} con tipos nativos
+        """
+        if len(rows) == 0:
+            return {'max_drawdown_usd': 0.0, 'max_drawdown_days': 0.0,
+                    'current_drawdown_usd': 0.0, 'current_drawdown_days': 0.0}
+
+        ts, equity, peak, peak_ts = rows['ts'], rows['equity'], rows['peak'], rows['peak_ts']
+        drawdown = peak - equity
+        in_dd = drawdown > 1e-9
+
+        # Duración al recuperar = fecha de recuperación - fecha del pico previo
+        prev_in_dd = np.concatenate(([False], in_dd[:-1]))
+        prev_peak_ts = np.concatenate((peak_ts[:1], peak_ts[:-1]))
+        durations = (ts - prev_peak_ts)[in_dd | prev_in_dd]
+        max_duration = int(durations.max()) if len(durations) else 0
+
+        current_usd, current_duration = 0.0, 0
+        if in_dd[-1]:
+            current_usd = float(drawdown[-1])
+            current_duration = max(int(now if now is not None else ts[-1]) - int(peak_ts[-1]), 0)
+            max_duration = max(max_duration, current_duration)
+
+        return {
+            'max_drawdown_usd': round(float(drawdown.max()), 2),
+            'max_drawdown_days': round(max_duration / US_PER_DAY, 2),
+            'current_drawdown_usd': round(current_usd, 2),
+            'current_drawdown_days': round(current_duration / US_PER_DAY, 2)
+        }
+
+    def drawdown_stats(self, cutoff: Optional[int] = None, now: Optional[int] = None) -> Dict:
+        """Estadísticas de drawdown de la ventana (ver drawdown_stats_rows)"""
+        return self.drawdown_stats_rows(self.window(cutoff), now)
+
+    def series(self, cutoff: Optional[int] = None, max_points: Optional[int] = None) -> Dict:
+        """
+        Serie para gráficos: listas paralelas t (epoch ms), equity, peak, drawdown
+
+        Con max_points se submuestrea uniformemente conservando el primer
+        y último punto y el de mayor drawdown.
+        """
+        rows = self.window(cutoff)
+        if max_points and len(rows) > max_points:
+            idx = np.linspace(0, len(rows) - 1, max_points).astype(np.int64)
+            trough = int(np.argmax(rows['peak'] - rows['equity']))
+            rows = rows[np.union1d(idx, [trough])]
+
+        return {
+            't': (rows['ts'] // 1000).tolist(),
+            'equity': np.round(rows['equity'], 2).tolist(),
+            'peak': np.round(rows['peak'], 2).tolist(),
+            'drawdown': np.round(rows['peak'] - rows['equity'], 2).tolist()
+        }
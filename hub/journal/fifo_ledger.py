@@ -0,0 +1,594 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       FIFO Ledger - Libro de Lotes Incremental               ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Mantiene el estado de lotes por símbolo entre refrescos del journal
+  (FIFO por defecto; LIFO/HIFO/costo promedio vía lot_matching)
+- Aplica solo los fills NUEVOS (clave: broker + id)
+- Re-procesa únicamente los símbolos afectados por fills fuera de
+  orden o por trades que salen de la ventana consultada
+- Índices ordenados por fecha con sumas acumuladas para responder
+  estadísticas de período sin recorrer el historial completo
+- Curva de equity realizada (total y por broker) extendida con cada
+  operación cerrada nueva
+- Desgloses agrupados de las operaciones cerradas (ver analytics)
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import threading
+
+import numpy as np
+
+from .analytics import breakdown
+from .closed_ops_table import ClosedOpsTable
+from .equity_curve import EquityCurve
+from .fixed_point import DEFAULT_QTY_SCALE, from_units, to_units
+from .lot_matching import DEFAULT_METHOD, LotBook, make_lot_book
+from .records import ClosedOp, OpenPosition, TradeRecord
+from .timestamps import trade_epoch_us
+
+logger = logging.getLogger(__name__)
+
+# Posiciones dentro de un lote abierto: [qty en unidades base (int), cost, buy_ts]
+LOT_QTY = 0
+LOT_COST = 1
+LOT_TS = 2
+
+# Códigos de lado para el núcleo numérico del matcher
+SIDE_BUY = 1
+SIDE_SELL = -1
+SIDE_OTHER = 0
+_SIDE_CODES = {'BUY': SIDE_BUY, 'SELL': SIDE_SELL}
+
+
+def trade_numbers(trade: Dict) -> Tuple[int, float, float, float]:
+    """(side, qty, total, fee) numéricos de un trade normalizado"""
+    qty = float(trade['quantity'])
+    price = float(trade['price'])
+    total = float(trade.get('total', qty * price))
+    fee = float(trade.get('fee', 0))
+    return _SIDE_CODES.get(trade['side'].upper(), SIDE_OTHER), qty, total, fee
+
+
+def _trade_key(trade: Dict) -> Tuple[str, str]:
+    """Clave única de un trade normalizado (broker, id)"""
+    return (trade.get('broker', ''), str(trade['id']))
+
+
+class SymbolLedger:
+    """Estado de lotes de un solo símbolo: lotes abiertos, ops cerradas y trades"""
+
+    def __init__(self, symbol: str, broker: str = '', method: str = DEFAULT_METHOD,
+                 scale: int = DEFAULT_QTY_SCALE):
+        """
+        Args:
+            symbol: Símbolo
+            broker: Broker del símbolo
+            method: Método de matching de lotes ('fifo', 'lifo', 'hifo', 'average')
+            scale: Unidades base por unidad de cantidad (ver fixed_point)
+        """
+        self.symbol = symbol
+        self.broker = broker
+        self.scale = scale
+        self.raw: List[Tuple[int, Dict]] = []   # (ts_us, trade original) en orden de aplicación
+        self.lots: LotBook = make_lot_book(method)   # Lotes abiertos [units, cost]
+        self.closed_operations: List[ClosedOp] = []
+        self.trades: List[TradeRecord] = []     # Trades con metadata de P&L
+        self.last_ts: Optional[int] = None      # Epoch µs del último trade aplicado
+
+        # Totales de la posición abierta (evita sumar la cola en cada consulta)
+        self.open_units = 0
+        self.open_cost = 0.0
+
+    @property
+    def open_qty(self) -> float:
+        """Cantidad abierta (float) a partir de las unidades base"""
+        return from_units(self.open_units, self.scale)
+
+    def apply(self, trade: Dict, ts: Optional[int] = None) -> Tuple[TradeRecord, Optional[ClosedOp]]:
+        """
+        Aplica un trade al libro de lotes
+
+        Args:
+            trade: Trade normalizado
+            ts: Epoch µs del trade (si None, se toma de 'ts_us' o se parsea)
+
+        Returns:
+            (trade_meta, closed_op o None)
+        """
+        if ts is None:
+            ts = trade_epoch_us(trade)
+        side, qty, total, fee = trade_numbers(trade)
+        return self.record(trade, ts, self.match(side, to_units(qty, self.scale), total, fee, ts))
+
+    def match(self, side: int, units: int, total: float, fee: float, ts: int = 0) -> Tuple:
+        """
+        Núcleo numérico (sin dicts): actualiza el libro de lotes
+
+        Args:
+            side: SIDE_BUY, SIDE_SELL u otro (se ignora)
+            units: Cantidad en unidades base enteras (ver fixed_point)
+            ts: Epoch µs del fill (fecha de compra del lote / de la venta)
+
+        Returns:
+            (cost_basis o None, pl_usd, pl_percent, is_closed, holding_us)
+            holding_us: tiempo de tenencia promedio (ponderado por qty) de
+            los lotes consumidos por una venta
+        """
+        if side == SIDE_BUY:
+            # Agregar lote abierto
+            cost = total + fee
+            self.lots.push([units, cost, ts])
+            self.open_units += units
+            self.open_cost += cost
+            return cost, 0.0, 0.0, False, 0
+
+        if side != SIDE_SELL:
+            return None, 0.0, 0.0, False, 0
+
+        # Hacer match con los lotes en el orden del método (FIFO, LIFO, HIFO...)
+        # Cantidades enteras: comparación y resta exactas, sin épsilon
+        units_remaining = units
+        sell_proceeds = total - fee
+        total_cost_basis = 0.0
+        held = 0          # Σ unidades * (venta - compra), para la tenencia promedio
+        lots = self.lots
+
+        while units_remaining > 0 and lots:
+            lot = lots.peek()
+            lot_units = lot[LOT_QTY]
+
+            if lot_units <= units_remaining:
+                # Consumir compra completa - O(1) / O(log n) en HIFO
+                units_remaining -= lot_units
+                held += lot_units * (ts - lot[LOT_TS])
+                total_cost_basis += lot[LOT_COST]
+                self.open_units -= lot_units
+                self.open_cost -= lot[LOT_COST]
+                lots.pop()
+            else:
+                # Consumir parcial
+                cost_portion = (units_remaining / lot_units) * lot[LOT_COST]
+                total_cost_basis += cost_portion
+                held += units_remaining * (ts - lot[LOT_TS])
+                lot[LOT_QTY] = lot_units - units_remaining
+                lot[LOT_COST] -= cost_portion
+                self.open_units -= units_remaining
+                self.open_cost -= cost_portion
+                units_remaining = 0
+
+        if not lots:
+            # Libro vacío: descartar residuo de redondeo float del costo
+            self.open_cost = 0.0
+
+        # Operación cerrada SOLO si hubo match con compras
+        if total_cost_basis > 0:
+            pl_usd = sell_proceeds - total_cost_basis
+            matched = units - units_remaining
+            holding_us = held // matched if matched > 0 else 0
+            return total_cost_basis, pl_usd, pl_usd / total_cost_basis * 100, True, holding_us
+
+        return None, 0.0, 0.0, False, 0
+
+    def record(self, trade: Dict, ts: int, result: Tuple) -> Tuple[TradeRecord, Optional[ClosedOp]]:
+        """
+        Registra el resultado de match() como TradeRecord / ClosedOp
+
+        Separado de match() para que el matching pueda correr en otro
+        proceso (ver parallel_fifo) y aquí solo se construyan los records.
+        El trade original no se copia: TradeRecord lo referencia.
+        """
+        cost_basis, pl_usd, pl_percent, is_closed, holding_us = result
+
+        trade_meta = TradeRecord(trade, pl_usd, round(pl_percent, 2), is_closed, cost_basis)
+
+        closed_op = None
+        if is_closed:
+            side, qty, total, fee = trade_numbers(trade)
+            closed_op = ClosedOp(self.symbol, self.broker, pl_usd, pl_percent, cost_basis,
+                                 total - fee, qty, trade['datetime'], holding_us)
+            self.closed_operations.append(closed_op)
+        elif cost_basis is None and trade['side'].upper() == 'SELL':
+            # SELL sin BUY previo - ignorar (short o datos incompletos)
+            logger.warning(f"⚠️ SELL sin BUY previo para {self.symbol} - ignorando en P&L")
+
+        self.raw.append((ts, trade))
+        self.trades.append(trade_meta)
+        self.last_ts = ts
+        return trade_meta, closed_op
+
+    def open_position(self, current_prices: Optional[Dict[str, float]] = None) -> Optional[OpenPosition]:
+        """Posición abierta del símbolo (None si no quedan compras sin match)"""
+        if not self.lots:
+            return None
+
+        total_qty = self.open_qty
+        total_cost = self.open_cost
+        avg_price = total_cost / total_qty if total_qty > 0 else 0.0
+
+        # P&L no realizado
+        current_price = current_prices.get(self.symbol, avg_price) if current_prices else avg_price
+        current_value = total_qty * current_price
+        unrealized_pl = current_value - total_cost
+        unrealized_percent = (unrealized_pl / total_cost * 100) if total_cost > 0 else 0.0
+
+        return OpenPosition(
+            symbol=self.symbol,
+            qty=round(total_qty, 8),
+            avg_cost=round(avg_price, 2),
+            current_price=round(current_price, 2),
+            cost_basis=round(total_cost, 2),
+            current_value=round(current_value, 2),
+            unrealized_pl=round(unrealized_pl, 2),
+            unrealized_percent=round(unrealized_percent, 2),
+            entries=len(self.lots)
+        )
+
+
+class _TimeIndex:
+    """
+    Lista de trades ordenada por timestamp
+
+    Los fills nuevos casi siempre son los más recientes, así que el caso
+    común es un append O(k); las inserciones fuera de orden hacen un
+    merge estable.
+    """
+
+    def __init__(self):
+        self.keys: List[int] = []
+        self.items: List[TradeRecord] = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def extend(self, pairs: List[Tuple[int, TradeRecord]]):
+        """Agrega items (key, item); pairs debe venir ordenado por key"""
+        if not pairs:
+            return
+        if not self.keys or pairs[0][0] >= self.keys[-1]:
+            self.keys.extend(k for k, _ in pairs)
+            self.items.extend(it for _, it in pairs)
+        else:
+            merged = list(zip(self.keys, self.items)) + pairs
+            merged.sort(key=lambda pair: pair[0])
+            self.keys = [k for k, _ in merged]
+            self.items = [it for _, it in merged]
+
+    def remove_where(self, predicate) -> int:
+        """Elimina items que cumplen predicate; retorna cuántos se eliminaron"""
+        kept_keys, kept_items = [], []
+        for k, it in zip(self.keys, self.items):
+            if not predicate(it):
+                kept_keys.append(k)
+                kept_items.append(it)
+        removed = len(self.items) - len(kept_items)
+        if removed:
+            self.keys, self.items = kept_keys, kept_items
+        return removed
+
+    def start_index(self, cutoff: Optional[int]) -> int:
+        """Índice del primer item con key >= cutoff"""
+        if cutoff is None:
+            return 0
+        return bisect_left(self.keys, cutoff)
+
+
+class FifoLedger:
+    """
+    Libro FIFO persistente para un conjunto de trades que se consulta
+    repetidamente (ej. una clave del cache de server_fastapi)
+
+    Las operaciones cerradas viven en una ClosedOpsTable columnar y los
+    trades en índices por fecha (total y por broker), así una sola pasada
+    FIFO responde cualquier combinación de ventana y broker.
+
+    Uso:
+        ledger = FifoLedger()
+        ledger.sync(trades)                     # O(nuevos fills) + set de ids
+        ledger.add_fills(new_trades)            # solo el delta
+        ledger.evict_before(window_start)       # ventana que avanza
+        ledger.closed_stats(cutoff)             # agregados del período
+        ledger.closed_stats(cutoff, 'schwab')   # mismo período, un solo broker
+    """
+
+    def __init__(self, parallel_min_fills: Optional[int] = None, max_workers: Optional[int] = None,
+                 method: str = DEFAULT_METHOD, qty_scales: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            parallel_min_fills: Activa el FIFO en procesos cuando un sync debe
+                                procesar desde cero al menos esta cantidad de
+                                fills (None = siempre en serie)
+            max_workers: Procesos del pool paralelo (None = cpu_count)
+            method: Método de matching de lotes ('fifo', 'lifo', 'hifo', 'average')
+            qty_scales: {symbol: unidades base por unidad} (ej. del base_increment
+                        de Coinbase), sin entrada se usa DEFAULT_QTY_SCALE; un
+                        símbolo cuya escala cambia se reconstruye en el
+                        siguiente sync/add_fills
+        """
+        make_lot_book(method)   # Validar el método al crear el ledger
+        self.method = method
+        self.qty_scales = qty_scales if qty_scales is not None else {}
+        self.parallel_min_fills = parallel_min_fills
+        self.max_workers = max_workers
+        self.symbols: Dict[str, SymbolLedger] = {}
+        self._trade_index: Dict[Tuple[str, str], str] = {}   # (broker, id) -> symbol
+        self.closed = ClosedOpsTable()
+        self._trades: Dict[Optional[str], _TimeIndex] = {None: _TimeIndex()}
+        self._equity: Dict[Optional[str], EquityCurve] = {None: EquityCurve()}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._trade_index)
+
+    def sync(self, trades: Iterable[Dict]) -> List[str]:
+        """
+        Sincroniza el ledger con el conjunto actual de trades
+
+        - Trades nuevos posteriores al último del símbolo: se aplican en orden
+        - Trades nuevos anteriores (fuera de orden) o trades que ya no están
+          en el conjunto: el símbolo se reconstruye desde sus trades originales
+
+        Recorre todo el conjunto y todo el ledger; para una ventana que
+        avanza, add_fills + evict_before tocan solo lo que cambió.
+
+        Returns:
+            Lista de símbolos que cambiaron
+        """
+        incoming: Dict[Tuple[str, str], Dict] = {}
+        for trade in trades:
+            incoming[_trade_key(trade)] = trade
+
+        removed = [k for k in self._trade_index if k not in incoming]
+        new = {k: t for k, t in incoming.items() if k not in self._trade_index}
+        return self._update(new, removed)
+
+    def add_fills(self, trades: Iterable[Dict]) -> List[str]:
+        """
+        Aplica solo los trades que el ledger no tiene (delta)
+
+        Los ya aplicados se ignoran y nada sale del ledger (ver
+        evict_before); un fill tardío reconstruye solo su símbolo.
+
+        Returns:
+            Lista de símbolos que cambiaron
+        """
+        new: Dict[Tuple[str, str], Dict] = {}
+        for trade in trades:
+            key = _trade_key(trade)
+            if key not in self._trade_index:
+                new[key] = trade
+        return self._update(new, [])
+
+    def evict_before(self, cutoff: int) -> List[str]:
+        """
+        Saca los trades con fecha anterior a cutoff (epoch µs)
+
+        Solo se reconstruyen los símbolos que perdieron trades: en cada
+        uno se recorre el prefijo viejo de sus trades (ordenados por fecha).
+
+        Returns:
+            Lista de símbolos que cambiaron
+        """
+        removed = []
+        for symbol, ledger in self.symbols.items():
+            for ts, trade in ledger.raw:
+                if ts >= cutoff:
+                    break
+                key = _trade_key(trade)
+                if self._trade_index.get(key) == symbol:
+                    removed.append(key)
+        return self._update({}, removed) if removed else []
+
+    def _update(self, new: Dict[Tuple[str, str], Dict], removed: List[Tuple[str, str]]) -> List[str]:
+        """Aplica trades nuevos y quita los removidos (ver sync)"""
+        dirty = {self._trade_index[k] for k in removed}
+        # Escala de cantidad que llegó (o cambió) después de crear el símbolo
+        dirty.update(symbol for symbol, ledger in self.symbols.items()
+                     if ledger.scale != self.qty_scales.get(symbol, DEFAULT_QTY_SCALE))
+        for key in removed:
+            del self._trade_index[key]
+
+        # Agrupar los trades nuevos por símbolo como (ts_us, trade)
+        new_by_symbol: Dict[str, List[Tuple[int, Dict]]] = {}
+        for key, trade in new.items():
+            new_by_symbol.setdefault(trade['symbol'], []).append((trade_epoch_us(trade), trade))
+            self._trade_index[key] = trade['symbol']
+
+        # Símbolos con fills tardíos (anteriores al último aplicado) se reconstruyen
+        for symbol, new_trades in new_by_symbol.items():
+            new_trades.sort(key=lambda pair: pair[0])
+            ledger = self.symbols.get(symbol)
+            if ledger is not None and ledger.last_ts is not None \
+                    and new_trades[0][0] < ledger.last_ts:
+                dirty.add(symbol)
+
+        pending_trades: List[Tuple[int, TradeRecord]] = []
+        pending_closed: List[Tuple[int, ClosedOp]] = []
+
+        # Símbolos que se procesan desde cola vacía: nuevos o reconstruidos
+        scratch: Dict[str, List[Tuple[int, Dict]]] = {}
+
+        if dirty:
+            # Una sola pasada sobre los índices para todos los símbolos sucios
+            self.closed.remove_symbols(dirty)
+            for index in self._trades.values():
+                index.remove_where(lambda t: t.symbol in dirty)
+            for symbol in dirty:
+                merged = self._rebuild_trades(symbol, new_by_symbol.get(symbol, []))
+                if merged:
+                    scratch[symbol] = merged
+
+        for symbol, new_trades in new_by_symbol.items():
+            if symbol in dirty:
+                continue
+            ledger = self.symbols.get(symbol)
+            if ledger is None:
+                scratch[symbol] = new_trades
+                continue
+            for ts, trade in new_trades:
+                self._apply(ledger, ts, trade, pending_trades, pending_closed)
+
+        self._process_scratch(scratch, pending_trades, pending_closed)
+
+        # Orden global por fecha antes de volcar en los índices
+        self._extend_trade_indexes(pending_trades)
+        pending_closed.sort(key=lambda pair: pair[0])
+        closed_before = len(self.closed)
+        appended = self.closed.extend([self.closed.row(ts, op) for ts, op in pending_closed])
+        if dirty or not appended:
+            self._rebuild_equity()
+        else:
+            self._extend_equity(self.closed.data[closed_before:])
+
+        changed = list(new_by_symbol.keys() | dirty)
+        if changed:
+            logger.debug(f"FifoLedger: {len(changed)} símbolos actualizados, {len(self._trade_index)} trades")
+        return changed
+
+    def _extend_trade_indexes(self, pending: List[Tuple[int, TradeRecord]]):
+        """Vuelca pending en el índice total y en el de cada broker"""
+        if not pending:
+            return
+        indexes = self._trades
+        pending.sort(key=lambda pair: pair[0])
+        indexes[None].extend(pending)
+
+        by_broker: Dict[str, List[Tuple[int, TradeRecord]]] = {}
+        for pair in pending:
+            by_broker.setdefault(pair[1].broker, []).append(pair)
+        for broker, pairs in by_broker.items():
+            index = indexes.get(broker)
+            if index is None:
+                index = indexes[broker] = _TimeIndex()
+            index.extend(pairs)
+
+    def _extend_equity(self, rows):
+        """Extiende las curvas de equity con filas nuevas al final de la tabla"""
+        if len(rows) == 0:
+            return
+        self._equity[None].extend(rows['sell_ts'], rows['pl_usd'])
+        for code in np.unique(rows['broker']).tolist():
+            broker = self.closed.broker_names[code]
+            curve = self._equity.get(broker)
+            if curve is None:
+                curve = self._equity[broker] = EquityCurve()
+            mask = rows['broker'] == code
+            curve.extend(rows['sell_ts'][mask], rows['pl_usd'][mask])
+
+    def _rebuild_equity(self):
+        """Recalcula las curvas de equity desde la tabla de ops cerradas"""
+        self._equity = {None: EquityCurve()}
+        self._extend_equity(self.closed.data)
+
+    @staticmethod
+    def _apply(ledger: SymbolLedger, ts: int, trade: Dict,
+               pending_trades: List[Tuple[int, TradeRecord]],
+               pending_closed: List[Tuple[int, ClosedOp]]):
+        trade_meta, closed_op = ledger.apply(trade, ts)
+        pending_trades.append((ts, trade_meta))
+        if closed_op is not None:
+            pending_closed.append((ts, closed_op))
+
+    def _rebuild_trades(self, symbol: str, new_trades: List[Tuple[int, Dict]]) -> List[Tuple[int, Dict]]:
+        """Trades vigentes (ordenados) de un símbolo a reconstruir; lo quita del ledger"""
+        old = self.symbols.pop(symbol, None)
+        previous = []
+        if old is not None:
+            previous = [pair for pair in old.raw if self._trade_index.get(_trade_key(pair[1])) == symbol]
+
+        # new_trades ya fueron registrados en _trade_index; evitar duplicados
+        seen = {_trade_key(t) for _, t in previous}
+        merged = previous + [pair for pair in new_trades if _trade_key(pair[1]) not in seen]
+        merged.sort(key=lambda pair: pair[0])
+        return merged
+
+    def _process_scratch(self, scratch: Dict[str, List[Tuple[int, Dict]]],
+                         pending_trades: List[Tuple[int, TradeRecord]],
+                         pending_closed: List[Tuple[int, ClosedOp]]):
+        """
+        Procesa símbolos completos desde cola vacía
+
+        Si el modo paralelo está activo y hay suficientes fills, el
+        matching se reparte en procesos (ver parallel_fifo); si no, en serie.
+        """
+        total_fills = sum(len(pairs) for pairs in scratch.values())
+        if self.parallel_min_fills is not None and len(scratch) > 1 \
+                and total_fills >= self.parallel_min_fills:
+            from .parallel_fifo import process_symbols_parallel
+
+            logger.info(f"🧵 FIFO paralelo: {total_fills:,} fills en {len(scratch)} símbolos")
+            restored = process_symbols_parallel(scratch, max_workers=self.max_workers,
+                                                method=self.method, qty_scales=self.qty_scales)
+            for symbol, (ledger, records) in restored.items():
+                self.symbols[symbol] = ledger
+                for (ts, _), (trade_meta, closed_op) in zip(scratch[symbol], records):
+                    pending_trades.append((ts, trade_meta))
+                    if closed_op is not None:
+                        pending_closed.append((ts, closed_op))
+            return
+
+        for symbol, pairs in scratch.items():
+            ledger = SymbolLedger(symbol, pairs[0][1].get('broker', ''), self.method,
+                                  self.qty_scales.get(symbol, DEFAULT_QTY_SCALE))
+            self.symbols[symbol] = ledger
+            for ts, trade in pairs:
+                self._apply(ledger, ts, trade, pending_trades, pending_closed)
+
+    def brokers(self) -> List[str]:
+        """Brokers presentes en el ledger"""
+        return [b for b in self._trades if b is not None]
+
+    def closed_stats(self, cutoff: Optional[int] = None,
+                     broker: Optional[str] = None) -> Dict:
+        """
+        Agregados de las operaciones cerradas con venta >= cutoff
+
+        Args:
+            cutoff: Epoch µs mínimo de la venta (None = todas)
+            broker: Limitar a un broker (None = todos)
+
+        Returns:
+            {'count', 'wins', 'losses', 'total_wins_usd', 'total_losses_usd',
+             'pl_realized_usd', 'cost_basis'}
+        """
+        return self.closed.aggregate(cutoff, broker=broker)
+
+    def equity_curve(self, broker: Optional[str] = None) -> EquityCurve:
+        """Curva de equity realizada (todos los brokers o uno)"""
+        return self._equity.get(broker) or EquityCurve(capacity=1)
+
+    def drawdown_stats(self, cutoff: Optional[int] = None, broker: Optional[str] = None,
+                       now: Optional[int] = None) -> Dict:
+        """Drawdown de la curva de equity en la ventana (ver EquityCurve)"""
+        return self.equity_curve(broker).drawdown_stats(cutoff, now)
+
+    def breakdown(self, by: str, cutoff: Optional[int] = None, broker: Optional[str] = None,
+                  tz: Optional[str] = None) -> List[Dict]:
+        """Desglose de ops cerradas por símbolo/broker/hora/día/tenencia (ver analytics)"""
+        return breakdown(self.closed.select(cutoff, broker=broker), by,
+                         self.closed.symbol_names, self.closed.broker_names, tz)
+
+    def trades_since(self, cutoff: Optional[int] = None,
+                     broker: Optional[str] = None) -> List[TradeRecord]:
+        """Trades con metadata (orden cronológico) con fecha >= cutoff"""
+        index = self._trades.get(broker)
+        if index is None:
+            return []
+        return index.items[index.start_index(cutoff):]
+
+    def open_positions(self, current_prices: Optional[Dict[str, float]] = None,
+                       broker: Optional[str] = None) -> List[OpenPosition]:
+        """Posiciones abiertas de todos los símbolos (o de un broker)"""
+        positions = []
+        for ledger in self.symbols.values():
+            if broker is not None and ledger.broker != broker:
+                continue
+            position = ledger.open_position(current_prices)
+            if position:
+                positions.append(position)
+        return positions
@@ -0,0 +1,61 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Fixed Point - Cantidades en Unidades Base Enteras      ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Conversión de cantidades float a unidades base enteras por
+  instrumento (estilo satoshi: 1 BTC = 10^8 unidades)
+- La escala sale del base_increment del producto (Coinbase) o, sin
+  metadata, de QTY_DECIMALS: cubre las 8 decimales de crypto y las
+  acciones fraccionales de Schwab
+- Con enteros el matcher de lotes compara y resta cantidades de forma
+  exacta: sin épsilon y sin lotes "polvo" por redondeo float
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QTY_DECIMALS = 8
+DEFAULT_QTY_SCALE = 10 ** QTY_DECIMALS
+
+
+def increment_scale(increment: Optional[str]) -> int:
+    """
+    Unidades base por unidad de cantidad para un increment de producto
+
+    Ejemplos:
+        "0.00000001" -> 10^8 (BTC)
+        "0.01"       -> 100
+        "1"          -> 1 (SHIB: cantidades enteras, sin overflow en int64)
+        None         -> DEFAULT_QTY_SCALE
+    """
+    if not increment:
+        return DEFAULT_QTY_SCALE
+    try:
+        exponent = Decimal(str(increment)).normalize().as_tuple().exponent
+    except InvalidOperation:
+        logger.warning(f"Increment inválido: {increment} - usando {QTY_DECIMALS} decimales")
+        return DEFAULT_QTY_SCALE
+    return 10 ** max(-exponent, 0)
+
+
+def to_units(qty: float, scale: int = DEFAULT_QTY_SCALE) -> int:
+    """Cantidad float → unidades base (redondeo al entero más cercano)"""
+    return int(round(qty * scale))
+
+
+def to_units_array(qty: np.ndarray, scale: int = DEFAULT_QTY_SCALE) -> np.ndarray:
+    """Versión vectorizada de to_units (int64)"""
+    return np.rint(np.asarray(qty, dtype=np.float64) * scale).astype(np.int64)
+
+
+def from_units(units: int, scale: int = DEFAULT_QTY_SCALE) -> float:
+    """Unidades base → cantidad float"""
+    return units / scale
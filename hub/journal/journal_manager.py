@@ -16,9 +16,30 @@ CAMBIOS T0:
 """
 
 from typing import Dict, List, Optional, Tuple
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import threading
+
+from .analytics import GROUP_BY
+from .equity_curve import EquityCurve
+from .fifo_ledger import FifoLedger, SymbolLedger
+from .fixed_point import DEFAULT_QTY_SCALE
+from .lot_matching import DEFAULT_METHOD
+from .metrics_memo import (MEMO_MAX_SIZE, MEMO_TTL_SECONDS, MetricsMemo,
+                           prices_fingerprint, trades_fingerprint)
+from .open_positions import OpenPositionTable
+from .records import metrics_to_dict, records_to_dicts
+from .rolling_metrics import rolling_latest, rolling_series
+from .parallel_fifo import PARALLEL_MIN_FILLS
+from .timestamps import to_epoch_us, trade_epoch_us
+from .trade_store import TradeStore
+
+try:
+    from ..managers.quote_cache import QuoteCache, get_quote_cache
+except ImportError:
+    # Importado como paquete 'journal' (scripts con hub/ en sys.path)
+    from managers.quote_cache import QuoteCache, get_quote_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,24 +50,62 @@ class JournalManager:
     T0: Sin cambios en adapters, solo refactor de métricas
     """
     
-    def __init__(self, capital_initial: float = 5000.0):
+    def __init__(self, capital_initial: float = 5000.0, parallel_fifo: bool = False,
+                 parallel_min_fills: int = PARALLEL_MIN_FILLS, max_workers: Optional[int] = None,
+                 lot_method: str = DEFAULT_METHOD, memo_size: int = MEMO_MAX_SIZE,
+                 memo_ttl: Optional[float] = MEMO_TTL_SECONDS, async_adapters: bool = False,
+                 trade_store: Optional[TradeStore] = None, quote_cache: Optional[QuoteCache] = None):
         """
         Args:
             capital_initial: Capital base para cálculos (deprecado, usar balance real)
+            parallel_fifo: Repartir el FIFO por símbolo en procesos para historiales grandes
+            parallel_min_fills: Fills a procesar desde cero para activar el modo paralelo
+            max_workers: Procesos del pool paralelo (None = cpu_count)
+            lot_method: Matching de lotes: 'fifo', 'lifo', 'hifo' o 'average'
+            memo_size: Resultados de compute_metrics memorizados (0 = sin memo)
+            memo_ttl: Segundos que se reutiliza un resultado sin cambios
+            async_adapters: Usar AsyncSchwabAdapter/AsyncCoinbaseAdapter (aiohttp)
+                            para get_journal_multi_async
+            trade_store: TradeStore de los adapters (None = store compartido en
+                         hub/journal_trades.db)
+            quote_cache: Precios de los websockets (None = cache compartido con
+                         los stream managers); REST solo para los viejos
         """
         # Importar adapters
         try:
-            from .schwab_adapter import SchwabAdapter
-            from .coinbase_adapter import CoinbaseAdapter
-            self.schwab = SchwabAdapter()
-            self.coinbase = CoinbaseAdapter()
+            if async_adapters:
+                from .async_adapters import AsyncSchwabAdapter as SchwabAdapter
+                from .async_adapters import AsyncCoinbaseAdapter as CoinbaseAdapter
+            else:
+                from .schwab_adapter import SchwabAdapter
+                from .coinbase_adapter import CoinbaseAdapter
+            self.schwab = SchwabAdapter(store=trade_store)
+            self.coinbase = CoinbaseAdapter(store=trade_store)
         except ImportError:
             logger.warning("Adapters no disponibles en test mode")
             self.schwab = None
             self.coinbase = None
         
+        # Últimos precios de los streams (ver _get_current_prices)
+        self.quote_cache = quote_cache or get_quote_cache()
+        
         self.capital_initial = capital_initial
         self._real_balance_cache = None
+        
+        # Ledgers FIFO persistentes por clave de consulta (ver compute_metrics)
+        self.parallel_min_fills = parallel_min_fills if parallel_fifo else None
+        self.max_workers = max_workers
+        self.lot_method = lot_method
+        self._ledgers: Dict[str, FifoLedger] = {}
+        self._ledgers_lock = threading.Lock()
+        
+        # Memo LRU por huella de trades + precios (ciclos sin cambios = sin cálculo)
+        self.metrics_memo = MetricsMemo(maxsize=memo_size, ttl=memo_ttl)
+        
+        # Posiciones abiertas del último get_journal_multi (P&L no realizado por tick)
+        self.live_positions: Optional[OpenPositionTable] = None
+        self._live_ledger_key: Optional[str] = None
+        self._live_results: Optional[Dict[str, Dict]] = None
     
     # ========================================================================
     # FORMATEO CENTRALIZADO DE NÚMEROS
@@ -115,7 +174,8 @@ class JournalManager:
     # ========================================================================
     
     def compute_metrics(self, trades: List[Dict], days: Optional[int] = None, 
-                       current_prices: Optional[Dict[str, float]] = None) -> Dict:
+                       current_prices: Optional[Dict[str, float]] = None,
+                       ledger_key: Optional[str] = None, as_records: bool = False) -> Dict:
         """
         Calcula métricas completas con agrupación FIFO por símbolo
         
@@ -123,6 +183,11 @@ class JournalManager:
             trades: Lista de trades normalizados de ambos brokers
             days: Filtrar últimos N días (None = todos)
             current_prices: Dict {symbol: precio_actual} para P&L no realizado
+            ledger_key: Clave del ledger persistente. Con la misma clave, las
+                        llamadas siguientes solo procesan los fills nuevos
+            as_records: Dejar trades/open_detail como TradeRecord/OpenPosition
+                        (compartidos con el ledger); convertir con
+                        records.metrics_to_dict() en el borde de la API
         
         Returns:
             Dict con estructura completa para apijournal:
@@ -154,61 +219,132 @@ class JournalManager:
                 'trades': [...]  # Trades con P&L individual
             }
         """
-        from datetime import timezone
-        
-        # NO filtrar trades antes del FIFO - necesitamos todo el historial para calcular correctamente
-        # El filtro se aplicará DESPUÉS a las operaciones cerradas
-        cutoff = None
-        if days:
-            cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-        
         if not trades:
             return self._empty_metrics()
         
-        # Agrupar por símbolo
-        by_symbol = defaultdict(list)
-        for trade in trades:
-            by_symbol[trade['symbol']].append(trade)
+        # Mismos trades + mismos precios → mismo objeto resultado, sin recalcular
+        # (compartido entre callers: tratarlo como solo lectura)
+        # El inicio de la ventana (al día) invalida el memo aunque no cambien los trades
+        memo_key = ('single', ledger_key, days, self._window_start(days), as_records,
+                    trades_fingerprint(trades), prices_fingerprint(current_prices))
+        cached = self.metrics_memo.get(memo_key)
+        if cached is not None:
+            return cached
         
-        # Ordenar cada símbolo por fecha
-        for symbol in by_symbol:
-            by_symbol[symbol].sort(key=lambda t: t['datetime'])
+        # Ledger FIFO: persistente si hay ledger_key (solo aplica fills nuevos),
+        # efímero si no (equivale a recalcular todo)
+        ledger = self._get_ledger(ledger_key)
         
-        # Procesar cada símbolo con FIFO
-        open_positions = []
-        closed_operations = []
-        all_trades_processed = []
+        with ledger.lock:
+            self._feed_ledger(ledger, trades)
+            result = self._metrics_from_ledger(ledger, days, current_prices, as_records=as_records)
         
-        for symbol, symbol_trades in by_symbol.items():
-            result = self._process_symbol_fifo(symbol, symbol_trades, current_prices)
-            
-            if result['open_position']:
-                open_positions.append(result['open_position'])
-            
-            closed_operations.extend(result['closed_operations'])
-            all_trades_processed.extend(result['trades'])
+        self.metrics_memo.put(memo_key, result)
+        return result
+    
+    def compute_metrics_multi(self, trades: List[Dict], windows: Optional[List[Optional[int]]] = None,
+                              brokers: Optional[List[str]] = None,
+                              current_prices: Optional[Dict[str, float]] = None,
+                              ledger_key: Optional[str] = None,
+                              as_records: bool = False) -> Dict[str, Dict]:
+        """
+        Calcula métricas para varias ventanas y brokers con UNA sola pasada FIFO
+        
+        El FIFO corre sobre todo el historial recibido; cada ventana solo
+        filtra las operaciones cerradas (fecha de venta) y los trades, igual
+        que compute_metrics(days=N).
+        
+        Args:
+            trades: Lista de trades normalizados de ambos brokers
+            windows: Días de cada ventana (default [7, 30, 90]; None = todo)
+            brokers: 'all' y/o nombres de broker (default ['all', 'schwab', 'coinbase'])
+            current_prices: Dict {symbol: precio_actual} para P&L no realizado
+            ledger_key: Clave del ledger persistente (ver compute_metrics)
+            as_records: Ver compute_metrics (los slices comparten los mismos records)
+        
+        Returns:
+            Dict {f"{broker}_{days}": métricas}, ej. {'all_7': {...}, 'schwab_30': {...}}
+        """
+        windows = windows if windows is not None else [7, 30, 90]
+        brokers = brokers if brokers is not None else ['all', 'schwab', 'coinbase']
+        
+        if not trades:
+            empty = {}
+            for broker in brokers:
+                for days in windows:
+                    result = self._empty_metrics()
+                    if broker != 'all':
+                        result['broker'] = broker
+                    empty[f"{broker}_{days}"] = result
+            return empty
+        
+        memo_key = ('multi', ledger_key, tuple(windows), tuple(self._window_start(d) for d in windows),
+                    tuple(brokers), as_records,
+                    trades_fingerprint(trades), prices_fingerprint(current_prices))
+        cached = self.metrics_memo.get(memo_key)
+        if cached is not None:
+            return cached
+        
+        ledger = self._get_ledger(ledger_key)
+        results = {}
+        
+        with ledger.lock:
+            self._feed_ledger(ledger, trades)
+            for broker in brokers:
+                broker_filter = None if broker == 'all' else broker.lower()
+                for days in windows:
+                    result = self._metrics_from_ledger(ledger, days, current_prices, broker=broker_filter,
+                                                       as_records=True)
+                    if broker_filter is not None:
+                        result['broker'] = broker
+                    results[f"{broker}_{days}"] = result
+        
+        if not as_records:
+            # Un dict por trade compartido entre todos los slices
+            memo: Dict[int, Dict] = {}
+            results = {key: metrics_to_dict(result, memo) for key, result in results.items()}
+        
+        self.metrics_memo.put(memo_key, results)
+        return results
+    
+    def _metrics_from_ledger(self, ledger: FifoLedger, days: Optional[int],
+                             current_prices: Optional[Dict[str, float]] = None,
+                             broker: Optional[str] = None, as_records: bool = False) -> Dict:
+        """
+        Construye la respuesta de métricas a partir de un ledger ya sincronizado
+        
+        Args:
+            ledger: FifoLedger sincronizado (llamar con ledger.lock tomado)
+            days: Filtrar últimos N días (None = todos)
+            current_prices: Precios actuales para P&L no realizado
+            broker: Limitar a un broker (None = todos)
+            as_records: Ver compute_metrics
+        """
+        from datetime import timezone
+        
+        # NO filtrar trades antes del FIFO - necesitamos todo el historial para calcular correctamente
+        # El filtro se aplicará DESPUÉS a las operaciones cerradas (epoch µs, sin parsear strings)
+        cutoff = None
+        if days:
+            cutoff = to_epoch_us(datetime.now(timezone.utc) - timedelta(days=days))
         
         # FILTRAR operaciones cerradas por período (si se especificó)
         # El filtro se aplica a la fecha de la VENTA (cierre de la operación)
-        if cutoff:
-            closed_operations = [
-                op for op in closed_operations
-                if datetime.fromisoformat(op['sell_date'].replace('Z', '+00:00')) >= cutoff
-            ]
-            # Filtrar también los trades mostrados en la lista
-            all_trades_processed = [
-                t for t in all_trades_processed
-                if datetime.fromisoformat(t['datetime'].replace('Z', '+00:00')) >= cutoff
-            ]
-        
-        # Calcular métricas agregadas
-        wins = len([op for op in closed_operations if op['pl_usd'] > 0])
-        losses = len([op for op in closed_operations if op['pl_usd'] <= 0])
+        totals = ledger.closed_stats(cutoff, broker=broker)
+        closed_count = totals['count']
+        # Filtrar también los trades mostrados en la lista
+        all_trades_processed = ledger.trades_since(cutoff, broker=broker)
+        open_positions = ledger.open_positions(current_prices, broker=broker)
+        drawdown = ledger.drawdown_stats(cutoff, broker=broker, now=to_epoch_us(datetime.now(timezone.utc)))
+        
+        # Métricas agregadas (reducciones vectorizadas sobre la tabla de ops cerradas)
+        wins = totals['wins']
+        losses = totals['losses']
         
         win_rate = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0.0
         
-        total_wins_usd = sum([op['pl_usd'] for op in closed_operations if op['pl_usd'] > 0])
-        total_losses_usd = abs(sum([op['pl_usd'] for op in closed_operations if op['pl_usd'] <= 0]))
+        total_wins_usd = totals['total_wins_usd']
+        total_losses_usd = totals['total_losses_usd']
         
         # Profit Factor = Total Wins / Total Losses
         # Si no hay pérdidas, el Profit Factor es técnicamente infinito, pero usamos 999.99 como indicador
@@ -219,27 +355,30 @@ class JournalManager:
         else:
             profit_factor = 0.0  # No hay trades cerrados
         
-        pl_realized_usd = sum([op['pl_usd'] for op in closed_operations])
-        capital_invested_closed = sum([op['cost_basis'] for op in closed_operations])
+        pl_realized_usd = totals['pl_realized_usd']
+        capital_invested_closed = totals['cost_basis']
         pl_realized_percent = (pl_realized_usd / capital_invested_closed * 100) if capital_invested_closed > 0 else 0.0
         
         # DEBUG: Log de cálculos
-        logger.info(f"📊 P&L Realizado - Ops cerradas: {len(closed_operations)}, "
+        logger.info(f"📊 P&L Realizado - Ops cerradas: {closed_count}, "
                    f"PL USD: ${pl_realized_usd:.2f}, Capital invertido: ${capital_invested_closed:.2f}, "
                    f"PL %: {pl_realized_percent:.2f}%")
         
-        pl_unrealized_usd = sum([pos['unrealized_pl'] for pos in open_positions])
-        capital_invested_open = sum([pos['cost_basis'] for pos in open_positions])
+        pl_unrealized_usd = sum([pos.unrealized_pl for pos in open_positions])
+        capital_invested_open = sum([pos.cost_basis for pos in open_positions])
         pl_unrealized_percent = (pl_unrealized_usd / capital_invested_open * 100) if capital_invested_open > 0 else 0.0
         
         # Balance real
         current_balance = self.get_real_balance()
         pl_total = pl_realized_usd + pl_unrealized_usd
         
-        # Período - usar los trades FILTRADOS para calcular el rango de fechas
-        dates = sorted([t['datetime'][:10] for t in all_trades_processed])
-        period_from = dates[0] if dates else None
-        period_to = dates[-1] if dates else None
+        # Período - los trades FILTRADOS ya vienen en orden cronológico
+        period_from = all_trades_processed[0].datetime[:10] if all_trades_processed else None
+        period_to = all_trades_processed[-1].datetime[:10] if all_trades_processed else None
+        
+        if not as_records:
+            open_positions = records_to_dicts(open_positions)
+            all_trades_processed = records_to_dicts(all_trades_processed)
         
         return {
             'timestamp': datetime.now(timezone.utc).isoformat(),
@@ -257,11 +396,11 @@ class JournalManager:
             },
             'positions': {
                 'open_count': len(open_positions),
-                'closed_count': len(closed_operations),
+                'closed_count': closed_count,
                 'open_detail': open_positions
             },
             'stats': {
-                'total_ops': len(closed_operations),  # Solo operaciones cerradas
+                'total_ops': closed_count,  # Solo operaciones cerradas
                 'wins': wins,
                 'losses': losses,
                 'win_rate': round(win_rate, 2),
@@ -270,11 +409,56 @@ class JournalManager:
                 'pl_realized_percent': round(pl_realized_percent, 2),
                 'pl_unrealized_usd': round(pl_unrealized_usd, 2),
                 'pl_unrealized_percent': round(pl_unrealized_percent, 2),
-                'avg_pl_per_trade': round(pl_realized_usd / len(closed_operations), 2) if closed_operations else 0.0
+                'avg_pl_per_trade': round(pl_realized_usd / closed_count, 2) if closed_count else 0.0,
+                'max_drawdown_usd': drawdown['max_drawdown_usd'],
+                'max_drawdown_days': drawdown['max_drawdown_days']
             },
-            'trades': all_trades_processed
+            'trades': list(all_trades_processed)
         }
     
+    @staticmethod
+    def _window_start(days: Optional[int]) -> Optional[int]:
+        """Epoch µs del día (UTC) en que empieza la ventana de days días (None = todo)"""
+        if not days:
+            return None
+        start = datetime.now(timezone.utc) - timedelta(days=days)
+        return to_epoch_us(start.replace(hour=0, minute=0, second=0, microsecond=0))
+    
+    @staticmethod
+    def _feed_ledger(ledger: FifoLedger, trades: List[Dict]):
+        """
+        Lleva el ledger a la ventana de trades recibida tocando solo el delta
+
+        Saca lo anterior al trade más viejo (la ventana avanzó) y aplica los
+        fills nuevos. Los trades del store no se borran: un trade que falte
+        en medio de la ventana no se busca (usar FifoLedger.sync para eso).
+        """
+        ledger.evict_before(min(trade_epoch_us(trade) for trade in trades))
+        ledger.add_fills(trades)
+    
+    def _get_ledger(self, ledger_key: Optional[str] = None) -> FifoLedger:
+        """
+        Ledger FIFO asociado a una clave de consulta
+        
+        Args:
+            ledger_key: Clave estable del conjunto de trades (ej. 'all_30').
+                        None = ledger efímero (cálculo completo)
+        """
+        # Escala entera por símbolo del base_increment de Coinbase (la llena
+        # get_fills, ver CoinbaseAdapter.load_products); si cambia, el ledger
+        # reconstruye ese símbolo
+        qty_scales = self.coinbase.qty_scales if self.coinbase else None
+        if ledger_key is None:
+            return FifoLedger(self.parallel_min_fills, self.max_workers, self.lot_method, qty_scales)
+        
+        with self._ledgers_lock:
+            ledger = self._ledgers.get(ledger_key)
+            if ledger is None:
+                ledger = FifoLedger(self.parallel_min_fills, self.max_workers, self.lot_method,
+                                    qty_scales)
+                self._ledgers[ledger_key] = ledger
+            return ledger
+    
     def _format_metrics_response(self, metrics: Dict) -> Dict:
         """
         Formatea todos los números en la respuesta de métricas con formato correcto
@@ -291,9 +475,10 @@ class JournalManager:
         return metrics
     
     def _process_symbol_fifo(self, symbol: str, trades: List[Dict], 
-                            current_prices: Optional[Dict[str, float]] = None) -> Dict:
+                            current_prices: Optional[Dict[str, float]] = None,
+                            method: Optional[str] = None) -> Dict:
         """
-        Procesa un símbolo con matching FIFO correcto
+        Procesa un símbolo con matching de lotes (FIFO salvo lot_method/method)
         
         Returns:
             {
@@ -302,114 +487,17 @@ class JournalManager:
                 'trades': [trades con metadata]
             }
         """
-        buy_queue = []  # Cola FIFO de compras
-        closed_ops = []
-        trades_meta = []
-        
+        scale = self.coinbase.qty_scales.get(symbol, DEFAULT_QTY_SCALE) if self.coinbase \
+            else DEFAULT_QTY_SCALE
+        ledger = SymbolLedger(symbol, method=method or self.lot_method, scale=scale)
         for trade in trades:
-            side = trade['side'].upper()
-            qty = float(trade['quantity'])
-            price = float(trade['price'])
-            total = float(trade.get('total', qty * price))
-            fee = float(trade.get('fee', 0))
-            
-            trade_meta = trade.copy()
-            trade_meta['pl_usd'] = 0.0
-            trade_meta['pl_percent'] = 0.0
-            trade_meta['is_closed'] = False
-            
-            if side == 'BUY':
-                # Agregar a cola FIFO
-                buy_queue.append({
-                    'qty': qty,
-                    'price': price,
-                    'cost': total + fee,
-                    'trade_id': trade['id'],
-                    'datetime': trade['datetime']
-                })
-                trade_meta['cost_basis'] = total + fee
-            
-            elif side == 'SELL':
-                # Hacer match con compras FIFO
-                qty_remaining = qty
-                sell_proceeds = total - fee
-                total_cost_basis = 0.0
-                
-                while qty_remaining > 0.0001 and buy_queue:
-                    buy = buy_queue[0]
-                    
-                    if buy['qty'] <= qty_remaining:
-                        # Consumir compra completa
-                        matched_qty = buy['qty']
-                        qty_remaining -= matched_qty
-                        total_cost_basis += buy['cost']
-                        buy_queue.pop(0)
-                    else:
-                        # Consumir parcial
-                        matched_qty = qty_remaining
-                        cost_portion = (matched_qty / buy['qty']) * buy['cost']
-                        total_cost_basis += cost_portion
-                        buy['qty'] -= matched_qty
-                        buy['cost'] -= cost_portion
-                        qty_remaining = 0.0
-                
-                # Crear operación cerrada SOLO si hubo match con compras
-                if total_cost_basis > 0:
-                    pl_usd = sell_proceeds - total_cost_basis
-                    pl_percent = (pl_usd / total_cost_basis * 100)
-                    
-                    closed_ops.append({
-                        'symbol': symbol,
-                        'pl_usd': pl_usd,
-                        'pl_percent': pl_percent,
-                        'cost_basis': total_cost_basis,
-                        'sell_proceeds': sell_proceeds,
-                        'qty': qty,
-                        'sell_date': trade['datetime']
-                    })
-                    
-                    trade_meta['pl_usd'] = pl_usd
-                    trade_meta['pl_percent'] = round(pl_percent, 2)
-                    trade_meta['cost_basis'] = total_cost_basis
-                    trade_meta['is_closed'] = True
-                else:
-                    # SELL sin BUY previo - ignorar (short o datos incompletos)
-                    logger.warning(f"⚠️ SELL sin BUY previo para {symbol} - ignorando en P&L")
-                    trade_meta['pl_usd'] = 0.0
-                    trade_meta['pl_percent'] = 0.0
-                    trade_meta['is_closed'] = False
-            
-            trades_meta.append(trade_meta)
-        
-        # Calcular posición abierta si hay compras sin match
-        open_position = None
-        if buy_queue:
-            total_qty = sum([b['qty'] for b in buy_queue])
-            total_cost = sum([b['cost'] for b in buy_queue])
-            avg_price = total_cost / total_qty if total_qty > 0 else 0.0
-            
-            # P&L no realizado
-            current_price = current_prices.get(symbol, avg_price) if current_prices else avg_price
-            current_value = total_qty * current_price
-            unrealized_pl = current_value - total_cost
-            unrealized_percent = (unrealized_pl / total_cost * 100) if total_cost > 0 else 0.0
-            
-            open_position = {
-                'symbol': symbol,
-                'qty': round(total_qty, 8),
-                'avg_cost': round(avg_price, 2),
-                'current_price': round(current_price, 2),
-                'cost_basis': round(total_cost, 2),
-                'current_value': round(current_value, 2),
-                'unrealized_pl': round(unrealized_pl, 2),
-                'unrealized_percent': round(unrealized_percent, 2),
-                'entries': len(buy_queue)
-            }
+            ledger.apply(trade)
         
+        position = ledger.open_position(current_prices)
         return {
-            'open_position': open_position,
-            'closed_operations': closed_ops,
-            'trades': trades_meta
+            'open_position': position.dict() if position else None,
+            'closed_operations': records_to_dicts(ledger.closed_operations),
+            'trades': records_to_dicts(ledger.trades)
         }
     
     def _empty_metrics(self) -> Dict:
@@ -438,7 +526,9 @@ class JournalManager:
                 'pl_realized_usd': 0.0,
                 'pl_realized_percent': 0.0,
                 'pl_unrealized_usd': 0.0,
-                'avg_pl_per_trade': 0.0
+                'avg_pl_per_trade': 0.0,
+                'max_drawdown_usd': 0.0,
+                'max_drawdown_days': 0.0
             },
             'trades': []
         }
@@ -484,13 +574,278 @@ class JournalManager:
         if current_prices is None and all_trades:
             current_prices = self._get_current_prices(all_trades)
         
-        # Aplicar compute_metrics con precios actuales
-        return self.compute_metrics(all_trades, days=days, current_prices=current_prices)
+        # Aplicar compute_metrics con precios actuales (ledger persistente por período)
+        return self.compute_metrics(all_trades, days=days, current_prices=current_prices,
+                                    ledger_key=f"all_{days}")
+    
+    def get_journal_multi(self, windows: Optional[List[int]] = None,
+                          brokers: Optional[List[str]] = None,
+                          current_prices: Optional[Dict[str, float]] = None,
+                          as_records: bool = False) -> Dict[str, Dict]:
+        """
+        Journal para varias ventanas y brokers con un solo fetch por broker
+        
+        Descarga la ventana más larga una vez, obtiene precios una vez y
+        aplica compute_metrics_multi(). Reemplaza N llamadas a
+        get_combined_journal() + get_trades_by_broker().
+        
+        Args:
+            windows: Días de cada ventana (default [7, 30, 90])
+            brokers: 'all' y/o nombres de broker (default ['all', 'schwab', 'coinbase'])
+            current_prices: Precios actuales (si None, se obtienen automáticamente)
+            as_records: Ver compute_metrics (server_fastapi cachea records)
+        
+        Returns:
+            Dict {f"{broker}_{days}": métricas}
+        """
+        windows = windows if windows is not None else [7, 30, 90]
+        brokers = brokers if brokers is not None else ['all', 'schwab', 'coinbase']
+        fetch_days = max([d for d in windows if d] or [90])
+        wanted = {b.lower() for b in brokers}
+        
+        all_trades = []
+        
+        # Obtener trades de Schwab
+        try:
+            if self.schwab and wanted & {'all', 'schwab'}:
+                schwab_trades = self.schwab.get_transactions(days=fetch_days)
+                all_trades.extend(schwab_trades)
+                logger.info(f"Schwab: {len(schwab_trades)} trades obtenidos")
+        except Exception as e:
+            logger.error(f"Error obteniendo Schwab: {e}")
+        
+        # Obtener trades de Coinbase
+        try:
+            if self.coinbase and wanted & {'all', 'coinbase'}:
+                coinbase_fills = self.coinbase.get_fills(days=fetch_days)
+                all_trades.extend(coinbase_fills)
+                logger.info(f"Coinbase: {len(coinbase_fills)} fills obtenidos")
+        except Exception as e:
+            logger.error(f"Error obteniendo Coinbase: {e}")
+        
+        if current_prices is None and all_trades:
+            current_prices = self._get_current_prices(all_trades)
+        
+        return self._journal_multi_from_trades(all_trades, windows, brokers, fetch_days,
+                                               current_prices, as_records)
+    
+    async def get_journal_multi_async(self, windows: Optional[List[int]] = None,
+                                      brokers: Optional[List[str]] = None,
+                                      current_prices: Optional[Dict[str, float]] = None,
+                                      as_records: bool = False) -> Dict[str, Dict]:
+        """
+        Versión async de get_journal_multi (ver async_adapters)
+        
+        Con adapters async los fetch de ambos brokers y luego sus quotes
+        corren concurrentemente en el event loop; solo el cálculo FIFO va
+        a un thread. Con adapters sync delega todo a get_journal_multi en
+        el executor.
+        """
+        loop = asyncio.get_running_loop()
+        if not any(hasattr(adapter, 'get_quotes_async') for adapter in (self.schwab, self.coinbase)):
+            return await loop.run_in_executor(
+                None, lambda: self.get_journal_multi(windows, brokers, current_prices, as_records))
+        
+        windows = windows if windows is not None else [7, 30, 90]
+        brokers = brokers if brokers is not None else ['all', 'schwab', 'coinbase']
+        fetch_days = max([d for d in windows if d] or [90])
+        wanted = {b.lower() for b in brokers}
+        
+        fetches = {}
+        if self.schwab and wanted & {'all', 'schwab'}:
+            fetches['Schwab'] = self.schwab.get_transactions_async(days=fetch_days)
+        if self.coinbase and wanted & {'all', 'coinbase'}:
+            fetches['Coinbase'] = self.coinbase.get_fills_async(days=fetch_days)
+        
+        all_trades = []
+        results = await asyncio.gather(*fetches.values(), return_exceptions=True)
+        for name, trades in zip(fetches, results):
+            if isinstance(trades, BaseException):
+                logger.error(f"Error obteniendo {name}: {trades}")
+                continue
+            all_trades.extend(trades)
+            logger.info(f"{name}: {len(trades)} trades obtenidos")
+        
+        if current_prices is None and all_trades:
+            current_prices = await self._get_current_prices_async(all_trades)
+        
+        return await loop.run_in_executor(
+            None, self._journal_multi_from_trades, all_trades, windows, brokers, fetch_days,
+            current_prices, as_records)
+    
+    def _journal_multi_from_trades(self, all_trades: List[Dict], windows: List[Optional[int]],
+                                   brokers: List[str], fetch_days: int,
+                                   current_prices: Optional[Dict[str, float]],
+                                   as_records: bool) -> Dict[str, Dict]:
+        """compute_metrics_multi + tabla de posiciones vivas (parte común sync/async)"""
+        ledger_key = f"multi_{fetch_days}"
+        results = self.compute_metrics_multi(all_trades, windows=windows, brokers=brokers,
+                                             current_prices=current_prices, ledger_key=ledger_key,
+                                             as_records=as_records)
+        
+        # Resultado memorizado (sin cambios): la tabla viva ya está al día
+        if results is self._live_results and ledger_key == self._live_ledger_key:
+            return results
+        
+        # Las posiciones abiertas no dependen de la ventana: una tabla para todos los slices
+        ledger = self._get_ledger(ledger_key)
+        with ledger.lock:
+            self.live_positions = OpenPositionTable.from_ledgers(ledger.symbols.values(),
+                                                                 current_prices)
+        self._live_ledger_key = ledger_key
+        self._live_results = results
+        return results
+    
+    def equity_curve(self, broker: str = 'all', days: Optional[int] = None,
+                     max_points: Optional[int] = None) -> Dict:
+        """
+        Curva de equity realizada y drawdown del último get_journal_multi
+        
+        Se sirve desde la curva que el ledger mantiene al agregar
+        operaciones cerradas; no recalcula desde los trades.
+        
+        Args:
+            broker: 'all', 'schwab' o 'coinbase'
+            days: Últimos N días (None = todo el historial cargado)
+            max_points: Submuestreo para el gráfico (None = todos los puntos)
+        
+        Returns:
+            {'broker', 'days', 'points', 't', 'equity', 'peak', 'drawdown', 'stats'}
+        """
+        from datetime import timezone
+        
+        now_dt = datetime.now(timezone.utc)
+        now = to_epoch_us(now_dt)
+        cutoff = to_epoch_us(now_dt - timedelta(days=days)) if days else None
+        broker_filter = None if broker == 'all' else broker.lower()
+        
+        result = {'broker': broker, 'days': days}
+        if self._live_ledger_key is None:
+            empty = EquityCurve(capacity=1)
+            result.update(empty.series())
+            result['stats'] = empty.drawdown_stats()
+        else:
+            ledger = self._get_ledger(self._live_ledger_key)
+            with ledger.lock:
+                curve = ledger.equity_curve(broker_filter)
+                result.update(curve.series(cutoff, max_points))
+                result['stats'] = curve.drawdown_stats(cutoff, now)
+        result['points'] = len(result['t'])
+        return result
+    
+    def rolling_metrics(self, broker: str = 'all', window_ops: Optional[int] = None,
+                        window_days: Optional[float] = None, days: Optional[int] = None,
+                        max_points: Optional[int] = None) -> Dict:
+        """
+        Win rate, profit factor y expectancy móviles del último get_journal_multi
+        
+        Se calculan sobre las sumas acumuladas de la curva de equity del
+        ledger (mantenidas al agregar operaciones), sin recorrer los trades.
+        
+        Args:
+            broker: 'all', 'schwab' o 'coinbase'
+            window_ops: Ventana de las últimas N operaciones cerradas
+            window_days: Ventana deslizante de D días (si no hay window_ops)
+            days: Puntos de los últimos N días (None = todo el historial)
+            max_points: Submuestreo para el gráfico (None = todos los puntos)
+        
+        Returns:
+            {'broker', 'window_ops', 'window_days', 'days', 'points',
+             't', 'count', 'win_rate', 'profit_factor', 'expectancy', 'latest'}
+        
+        Raises:
+            ValueError: Sin ventana o ventana no positiva
+        """
+        from datetime import timezone
+        
+        cutoff = to_epoch_us(datetime.now(timezone.utc) - timedelta(days=days)) if days else None
+        broker_filter = None if broker == 'all' else broker.lower()
+        
+        result = {'broker': broker, 'window_ops': window_ops, 'window_days': window_days,
+                  'days': days}
+        if self._live_ledger_key is None:
+            rows = EquityCurve(capacity=1).data
+            result.update(rolling_series(rows, window_ops, window_days))
+            result['latest'] = rolling_latest(rows, window_ops, window_days)
+        else:
+            ledger = self._get_ledger(self._live_ledger_key)
+            with ledger.lock:
+                rows = ledger.equity_curve(broker_filter).data
+                result.update(rolling_series(rows, window_ops, window_days, cutoff, max_points))
+                result['latest'] = rolling_latest(rows, window_ops, window_days)
+        result['points'] = len(result['t'])
+        return result
+    
+    def analytics(self, by: str = 'symbol', broker: str = 'all', days: Optional[int] = None,
+                  tz: Optional[str] = None) -> Dict:
+        """
+        Desglose de operaciones cerradas del último get_journal_multi
+        
+        Win rate, profit factor, P&L promedio y cantidad por grupo,
+        calculados con group-by vectorizado sobre la tabla de ops cerradas.
+        
+        Args:
+            by: 'symbol', 'broker', 'hour', 'weekday' o 'holding'
+            broker: 'all', 'schwab' o 'coinbase'
+            days: Últimos N días (None = todo el historial cargado)
+            tz: Zona horaria para hour/weekday (None = UTC)
+        
+        Returns:
+            {'by', 'broker', 'days', 'tz', 'groups': [...]} (ver analytics.breakdown)
+        
+        Raises:
+            ValueError: Agrupación o zona horaria desconocida
+        """
+        from datetime import timezone
+        
+        cutoff = to_epoch_us(datetime.now(timezone.utc) - timedelta(days=days)) if days else None
+        broker_filter = None if broker == 'all' else broker.lower()
+        
+        result = {'by': by, 'broker': broker, 'days': days, 'tz': tz, 'groups': []}
+        if self._live_ledger_key is None:
+            if by not in GROUP_BY:
+                raise ValueError(f"Agrupación desconocida: {by} (usar {', '.join(GROUP_BY)})")
+            return result
+        
+        ledger = self._get_ledger(self._live_ledger_key)
+        with ledger.lock:
+            result['groups'] = ledger.breakdown(by, cutoff, broker_filter, tz)
+        return result
+    
+    def on_price(self, symbol: str, price: float) -> Optional[Dict]:
+        """
+        Aplica un precio en tiempo real a la posición abierta del símbolo
+        
+        Solo actualiza esa fila y los totales no realizados (O(1)); el
+        historial cerrado no se toca. Requiere un get_journal_multi() previo.
+        
+        Returns:
+            {'symbol', 'broker', 'position', 'totals': {'all': {...}, broker: {...}}}
+            o None si el símbolo no tiene posición abierta o no cambió
+        """
+        table = self.live_positions
+        if table is None:
+            return None
+        
+        row = table.on_price(symbol, price)
+        if row is None:
+            return None
+        
+        broker = table.brokers[symbol]
+        return {
+            'symbol': symbol,
+            'broker': broker,
+            'position': row.dict(),
+            'totals': {'all': table.totals(), broker: table.totals(broker)}
+        }
     
     def _get_current_prices(self, trades: List[Dict]) -> Dict[str, float]:
         """
         Obtiene precios actuales para todos los símbolos en trades
         
+        Los precios frescos del QuoteCache (websockets) se usan tal cual;
+        solo los símbolos viejos o sin suscripción se piden por REST.
+        
         Args:
             trades: Lista de trades
         
@@ -498,17 +853,7 @@ class JournalManager:
             Dict con symbol: precio actual
         """
         try:
-            # Extraer símbolos únicos
-            symbols = list(set([t['symbol'] for t in trades if t.get('symbol')]))
-            
-            if not symbols:
-                return {}
-            
-            # Separar por broker
-            schwab_symbols = [s for s in symbols if not s.endswith('-USD')]  # Stocks
-            coinbase_symbols = [s for s in symbols if s.endswith('-USD')]     # Crypto
-            
-            prices = {}
+            prices, schwab_symbols, coinbase_symbols = self._streamed_prices(trades)
             
             # Obtener quotes de Schwab
             if schwab_symbols and self.schwab:
@@ -534,6 +879,42 @@ class JournalManager:
             logger.error(f"Error obteniendo precios actuales: {e}")
             return {}
     
+    async def _get_current_prices_async(self, trades: List[Dict]) -> Dict[str, float]:
+        """Versión async de _get_current_prices: quotes de ambos brokers a la vez"""
+        prices, schwab_symbols, coinbase_symbols = self._streamed_prices(trades)
+        quote_calls = {}
+        if schwab_symbols and self.schwab:
+            quote_calls['Schwab'] = self.schwab.get_quotes_async(schwab_symbols)
+        if coinbase_symbols and self.coinbase:
+            quote_calls['Coinbase'] = self.coinbase.get_quotes_async(coinbase_symbols)
+        
+        results = await asyncio.gather(*quote_calls.values(), return_exceptions=True)
+        for name, broker_prices in zip(quote_calls, results):
+            if isinstance(broker_prices, BaseException):
+                logger.error(f"Error obteniendo quotes {name}: {broker_prices}")
+                continue
+            prices.update(broker_prices)
+            logger.info(f"Precios obtenidos para {len(broker_prices)} símbolos de {name}")
+        return prices
+    
+    def _streamed_prices(self, trades: List[Dict]) -> Tuple[Dict[str, float], List[str], List[str]]:
+        """Precios frescos del QuoteCache + símbolos (Schwab, Coinbase) que faltan pedir por REST"""
+        schwab_symbols, coinbase_symbols = self._quote_symbols(trades)
+        prices = self.quote_cache.fresh(schwab_symbols + coinbase_symbols)
+        if prices:
+            logger.info(f"Precios de {len(prices)} símbolos desde los streams")
+        return (prices,
+                [s for s in schwab_symbols if s not in prices],
+                [s for s in coinbase_symbols if s not in prices])
+    
+    @staticmethod
+    def _quote_symbols(trades: List[Dict]) -> Tuple[List[str], List[str]]:
+        """Símbolos únicos de los trades separados en (Schwab, Coinbase)"""
+        symbols = list(set([t['symbol'] for t in trades if t.get('symbol')]))
+        schwab_symbols = [s for s in symbols if not s.endswith('-USD')]  # Stocks
+        coinbase_symbols = [s for s in symbols if s.endswith('-USD')]     # Crypto
+        return schwab_symbols, coinbase_symbols
+    
     def get_trades_by_broker(self, broker: str, days: int = 7, 
                             current_prices: Optional[Dict[str, float]] = None) -> Dict:
         """
@@ -564,9 +945,10 @@ class JournalManager:
         if current_prices is None and trades:
             current_prices = self._get_current_prices(trades)
         
-        result = self.compute_metrics(trades, days=days, current_prices=current_prices)
-        result['broker'] = broker
-        return result
+        result = self.compute_metrics(trades, days=days, current_prices=current_prices,
+                                      ledger_key=f"{broker.lower()}_{days}")
+        # Copia con el tag: el resultado memorizado es compartido
+        return dict(result, broker=broker)
 
 
 # ========================================================================
@@ -0,0 +1,198 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       JSON Stream - Decodificación Incremental de Arrays     ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Entrega uno a uno los elementos de un array JSON a medida que llegan
+  los bytes de la respuesta (requests iter_content / aiohttp
+  iter_chunked), sin tener el body completo ni la lista decodificada
+  en memoria
+- El array puede ser el documento entero (transactions de Schwab) o el
+  valor de una clave del objeto raíz ({"fills": [...], "cursor": ...});
+  los demás campos del objeto raíz quedan en JsonArrayDecoder.fields
+
+Solo usa json.JSONDecoder.raw_decode de la librería estándar: memoria
+acotada por el elemento más grande más un chunk de lectura.
+"""
+
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+import codecs
+import json
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+# Lo que puede seguir a un valor completo / continuar un número cortado
+_DELIMITERS = _WHITESPACE + ',]}:'
+_NUMBER_CHARS = '0123456789.eE+-'
+_decoder = json.JSONDecoder()
+
+
+class _Incomplete(Exception):
+    """Faltan bytes para el próximo token"""
+
+
+class JsonArrayDecoder:
+    """Decoder push: feed(texto) → elementos completos del array"""
+
+    def __init__(self, key: Optional[str] = None):
+        """
+        Args:
+            key: Clave del objeto raíz que contiene el array (None = el
+                 documento es el array)
+        """
+        self.key = key
+        self.fields: Dict[str, Any] = {}
+        self._buf = ''
+        self._pos = 0
+        self._state = 'start'
+        self._found = False
+        self._closed = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Agrega texto y devuelve los elementos que quedaron completos"""
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        items: List[Any] = []
+        try:
+            while self._state != 'done':
+                self._step(items)
+        except _Incomplete:
+            pass
+        return items
+
+    def close(self) -> List[Any]:
+        """
+        Fin del body: devuelve los últimos elementos
+
+        Raises:
+            ValueError: JSON truncado, inválido o sin el array esperado
+        """
+        # Un espacio final cierra un número que terminaba justo en el buffer
+        self._closed = True
+        items = self.feed(' ')
+        if self._state != 'done':
+            snippet = self._buf[self._pos:self._pos + 40]
+            raise ValueError(f"JSON incompleto o inválido (estado {self._state}): {snippet!r}")
+        return items
+
+    def _step(self, items: List[Any]):
+        """Avanza un token; con _Incomplete vuelve al inicio del paso (nada parcial)"""
+        start = self._pos
+        try:
+            if self._state == 'start':
+                self._step_start()
+            elif self._state == 'keys':
+                self._step_key()
+            else:
+                self._step_item(items)
+        except _Incomplete:
+            self._pos = start
+            raise
+
+    def _step_start(self):
+        expected = '{' if self.key is not None else '['
+        char = self._peek()
+        if char != expected:
+            raise ValueError(f"Se esperaba '{expected}' al inicio del JSON, llegó {char!r}")
+        self._pos += 1
+        self._state = 'keys' if self.key is not None else 'items'
+
+    def _step_item(self, items: List[Any]):
+        """Un elemento del array (o su cierre)"""
+        char = self._peek()
+        if char == ',':
+            self._pos += 1
+            char = self._peek()
+        if char == ']':
+            self._pos += 1
+            self._state = 'keys' if self.key is not None else 'done'
+            return
+        items.append(self._value())
+
+    def _step_key(self):
+        """Un par "clave": valor del objeto raíz (el array buscado abre el estado items)"""
+        char = self._peek()
+        if char == ',':
+            self._pos += 1
+            char = self._peek()
+        if char == '}':
+            self._pos += 1
+            if not self._found:
+                raise ValueError(f"Clave '{self.key}' no encontrada en el JSON")
+            self._state = 'done'
+            return
+        name = self._value()
+        if self._peek() != ':':
+            raise ValueError(f"Se esperaba ':' después de la clave {name!r}")
+        self._pos += 1
+        if name != self.key:
+            self.fields[name] = self._value()
+            return
+        if self._peek() != '[':
+            raise ValueError(f"'{self.key}' no es un array JSON")
+        self._pos += 1
+        self._found = True
+        self._state = 'items'
+
+    def _peek(self) -> str:
+        """Primer carácter no blanco (sin consumirlo)"""
+        while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+            self._pos += 1
+        if self._pos >= len(self._buf):
+            raise _Incomplete()
+        return self._buf[self._pos]
+
+    def _value(self) -> Any:
+        self._peek()
+        try:
+            value, end = _decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise ValueError(f"JSON inválido cerca de {self._buf[self._pos:self._pos + 40]!r}")
+            raise _Incomplete()
+        if not self._closed:
+            # Un número cortado ('12.', '1e', '3E-') puede seguir en el próximo
+            # chunk: raw_decode devolvió solo el prefijo válido
+            tail = end
+            while tail < len(self._buf) and self._buf[tail] in _NUMBER_CHARS:
+                tail += 1
+            if tail >= len(self._buf):
+                raise _Incomplete()
+        if self._buf[end] not in _DELIMITERS:
+            raise ValueError(f"JSON inválido cerca de {self._buf[self._pos:end + 40]!r}")
+        self._pos = end
+        return value
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]], key: Optional[str] = None,
+                    decoder: Optional[JsonArrayDecoder] = None) -> Iterator[Any]:
+    """
+    Elementos del array a medida que llegan los chunks (ej. response.iter_content)
+
+    Args:
+        key: Ver JsonArrayDecoder
+        decoder: Decoder a usar (para leer decoder.fields al terminar)
+
+    Raises:
+        ValueError: JSON truncado, inválido o sin el array esperado
+    """
+    decoder = decoder or JsonArrayDecoder(key)
+    text = codecs.getincrementaldecoder('utf-8')()
+    for chunk in chunks:
+        yield from decoder.feed(text.decode(chunk) if isinstance(chunk, bytes) else chunk)
+    yield from decoder.feed(text.decode(b'', final=True))
+    yield from decoder.close()
+
+
+async def aiter_json_array(chunks: AsyncIterable[bytes], key: Optional[str] = None,
+                           decoder: Optional[JsonArrayDecoder] = None) -> AsyncIterator[Any]:
+    """Ver iter_json_array (ej. aiohttp response.content.iter_chunked)"""
+    decoder = decoder or JsonArrayDecoder(key)
+    text = codecs.getincrementaldecoder('utf-8')()
+    async for chunk in chunks:
+        for item in decoder.feed(text.decode(chunk)):
+            yield item
+    for item in decoder.feed(text.decode(b'', final=True)) + decoder.close():
+        yield item
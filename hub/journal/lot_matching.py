@@ -0,0 +1,201 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Lot Matching - FIFO / LIFO / HIFO / Costo Promedio     ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Libros de lotes abiertos intercambiables para el matcher de
+  SymbolLedger: cada método decide QUÉ lote consume una venta
+- Cada libro usa el índice adecuado para que peek/pop/push sean
+  O(1) u O(log n):
+    fifo     deque (primero en entrar, primero en salir)
+    lifo     pila (último en entrar, primero en salir)
+    hifo     heap por costo unitario (mayor costo primero, fiscal)
+    average  un solo lote agregado (costo promedio, como reporta Schwab)
+
+Los lotes son listas mutables [units, cost, buy_ts] con la cantidad en
+unidades base enteras (ver LOT_QTY / LOT_COST / LOT_TS en fifo_ledger y
+fixed_point): una venta parcial reduce el lote en el lugar sin cambiar
+su costo unitario, así el orden del heap se mantiene válido.
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, Tuple
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METHOD = 'fifo'
+
+
+class LotBook(ABC):
+    """
+    Interfaz de un libro de lotes abiertos
+
+    El matcher solo necesita: push(lot), peek() → próximo lote a consumir,
+    pop() → quitarlo, len(). lots()/restore() serializan el libro en
+    orden de compra (ver parallel_fifo).
+    """
+
+    method = ''
+
+    @abstractmethod
+    def push(self, lot: List[float]):
+        pass
+
+    @abstractmethod
+    def peek(self) -> List[float]:
+        pass
+
+    @abstractmethod
+    def pop(self) -> List[float]:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def lots(self) -> List[List[float]]:
+        """Lotes abiertos en orden de compra"""
+
+    def restore(self, lots: List[List[float]]):
+        """Carga lotes (en orden de compra) en un libro vacío"""
+        for lot in lots:
+            self.push(list(lot))
+
+
+class FifoBook(deque, LotBook):
+    """
+    Primero en entrar, primero en salir (deque)
+
+    Hereda de deque para que push/pop/len del loop de matching sean
+    llamadas en C (FIFO es el método por defecto del refresh).
+    """
+
+    method = 'fifo'
+    push = deque.append
+    pop = deque.popleft
+
+    def peek(self) -> List[float]:
+        return self[0]
+
+    def lots(self) -> List[List[float]]:
+        return list(self)
+
+
+class LifoBook(list, LotBook):
+    """Último en entrar, primero en salir (pila sobre list)"""
+
+    method = 'lifo'
+    push = list.append
+    pop = list.pop
+
+    def peek(self) -> List[float]:
+        return self[-1]
+
+    def lots(self) -> List[List[float]]:
+        return list(self)
+
+
+class HifoBook(LotBook):
+    """
+    Mayor costo unitario primero (heap)
+
+    Entradas (-costo_unitario, secuencia, lote): la secuencia desempata
+    lotes del mismo costo en orden FIFO.
+    """
+
+    method = 'hifo'
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, List[float]]] = []
+        self._seq = itertools.count()
+
+    def push(self, lot: List[float]):
+        qty, cost = lot[0], lot[1]
+        unit_cost = cost / qty if qty > 0 else 0.0
+        heappush(self._heap, (-unit_cost, next(self._seq), lot))
+
+    def peek(self) -> List[float]:
+        return self._heap[0][2]
+
+    def pop(self) -> List[float]:
+        return heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def lots(self) -> List[List[float]]:
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[1])]
+
+    def restore(self, lots: List[List[float]]):
+        self._heap = [(-(lot[1] / lot[0] if lot[0] > 0 else 0.0), next(self._seq), list(lot))
+                      for lot in lots]
+        heapify(self._heap)
+
+
+class AverageCostBook(LotBook):
+    """
+    Costo promedio: todas las compras se agregan a un solo lote
+
+    Una venta consume costo proporcional a la qty (qty/total * costo),
+    que es exactamente el costo promedio de la posición. La fecha de
+    compra del lote agregado es el promedio ponderado por qty.
+    """
+
+    method = 'average'
+
+    def __init__(self):
+        self._lot: List[float] = []
+
+    def push(self, lot: List[float]):
+        if self._lot:
+            units = self._lot[0] + lot[0]
+            if units > 0:
+                self._lot[2] = (self._lot[2] * self._lot[0] + lot[2] * lot[0]) // units
+            self._lot[0] = units
+            self._lot[1] += lot[1]
+        else:
+            self._lot = lot
+
+    def peek(self) -> List[float]:
+        if not self._lot:
+            raise IndexError('libro vacío')
+        return self._lot
+
+    def pop(self) -> List[float]:
+        lot = self.peek()
+        self._lot = []
+        return lot
+
+    def __len__(self) -> int:
+        return 1 if self._lot else 0
+
+    def lots(self) -> List[List[float]]:
+        return [self._lot] if self._lot else []
+
+
+LOT_BOOKS: Dict[str, type] = {
+    'fifo': FifoBook,
+    'lifo': LifoBook,
+    'hifo': HifoBook,
+    'average': AverageCostBook,
+}
+
+
+def make_lot_book(method: str = DEFAULT_METHOD) -> LotBook:
+    """
+    Crea el libro de lotes de un método
+
+    Raises:
+        ValueError: Método desconocido
+    """
+    book = LOT_BOOKS.get(method.lower())
+    if book is None:
+        raise ValueError(f"Método de lotes desconocido: {method} (usar {', '.join(LOT_BOOKS)})")
+    return book()
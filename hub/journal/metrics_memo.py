@@ -0,0 +1,125 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Metrics Memo - Cache LRU por Huella de Entradas        ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Huella barata del conjunto de trades (count, max ts, suma de ts,
+  max id) y del snapshot de precios
+- Cache LRU acotado de resultados de compute_metrics /
+  compute_metrics_multi: si las entradas no cambiaron se devuelve el
+  MISMO objeto sin sync ni agregados (ciclos no-op del refresh de 2s)
+- TTL para que las ventanas relativas a "ahora" (últimos N días) no
+  queden congeladas indefinidamente
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+import logging
+import threading
+import time
+
+from .timestamps import trade_epoch_us
+
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo que se reutiliza un resultado (las ventanas dependen de "ahora")
+MEMO_TTL_SECONDS = 60.0
+MEMO_MAX_SIZE = 32
+
+_MASK64 = (1 << 64) - 1
+
+
+def trades_fingerprint(trades: Iterable[Dict]) -> Tuple[int, int, int, str]:
+    """
+    Huella O(n) del conjunto de trades, sin ordenar ni copiar
+
+    (count, max ts_us, suma de ts_us mod 2^64, max id): un fill nuevo
+    cambia count/max; un reemplazo (sale uno viejo, entra otro) cambia
+    la suma.
+    """
+    count = 0
+    max_ts = 0
+    sum_ts = 0
+    max_id = ''
+    for trade in trades:
+        ts = trade_epoch_us(trade)
+        count += 1
+        sum_ts += ts
+        if ts > max_ts:
+            max_ts = ts
+        trade_id = str(trade['id'])
+        if trade_id > max_id:
+            max_id = trade_id
+    return count, max_ts, sum_ts & _MASK64, max_id
+
+
+def prices_fingerprint(current_prices: Optional[Dict[str, float]]) -> Tuple:
+    """Snapshot de precios como tupla ordenada (hashable)"""
+    if not current_prices:
+        return ()
+    return tuple(sorted(current_prices.items()))
+
+
+class MetricsMemo:
+    """
+    Cache LRU acotado con TTL (thread-safe)
+
+    Uso:
+        memo = MetricsMemo(maxsize=32)
+        result = memo.get(key)
+        if result is None:
+            result = calcular()
+            memo.put(key, result)
+    """
+
+    def __init__(self, maxsize: int = MEMO_MAX_SIZE, ttl: Optional[float] = MEMO_TTL_SECONDS):
+        """
+        Args:
+            maxsize: Entradas máximas (0 = memo desactivado)
+            ttl: Segundos de validez de cada entrada (None = sin vencimiento)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Resultado memorizado para key (None si no hay o venció)"""
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None \
+                    and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        """Guarda value; desaloja la entrada menos usada si se excede maxsize"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
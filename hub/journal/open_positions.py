@@ -0,0 +1,133 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Open Positions - P&L No Realizado por Tick             ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Tabla de posiciones abiertas (qty, cost basis por símbolo) tomada
+  del FifoLedger después de cada sync
+- Actualiza el P&L no realizado de UN símbolo y los totales por broker
+  en O(1) cuando llega un precio (WebSocket), sin recalcular el FIFO
+  ni tocar las operaciones cerradas
+"""
+
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from .records import OpenPosition
+
+logger = logging.getLogger(__name__)
+
+
+class OpenPositionTable:
+    """
+    Posiciones abiertas + totales no realizados mantenidos incrementalmente
+
+    Las filas son OpenPosition (ver SymbolLedger.open_position()) y los
+    totales suman los valores redondeados de cada fila, igual que
+    JournalManager.compute_metrics().
+    """
+
+    def __init__(self):
+        self.rows: Dict[str, OpenPosition] = {}
+        self.brokers: Dict[str, str] = {}
+        # qty / costo sin redondear (las filas guardan valores redondeados)
+        self._open: Dict[str, Tuple[float, float]] = {}
+        # Totales por broker (None = todos): pl_unrealized_usd, cost_basis
+        self._totals: Dict[Optional[str], Dict[str, float]] = {None: self._zero()}
+
+    @staticmethod
+    def _zero() -> Dict[str, float]:
+        return {'pl_unrealized_usd': 0.0, 'cost_basis': 0.0, 'open_count': 0}
+
+    @classmethod
+    def from_ledgers(cls, ledgers: Iterable, current_prices: Optional[Dict[str, float]] = None):
+        """Construye la tabla desde SymbolLedgers sincronizados (FifoLedger.symbols.values())"""
+        table = cls()
+        for ledger in ledgers:
+            position = ledger.open_position(current_prices)
+            if position:
+                table.add(position, ledger.broker, ledger.open_qty, ledger.open_cost)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.rows
+
+    def add(self, position: OpenPosition, broker: str = '', qty: Optional[float] = None,
+            cost: Optional[float] = None):
+        """Agrega una posición (ver SymbolLedger.open_position)"""
+        symbol = position.symbol
+        if symbol in self.rows:
+            self._bump(self.brokers[symbol], -self.rows[symbol].unrealized_pl,
+                       -self.rows[symbol].cost_basis, -1)
+        self.rows[symbol] = replace(position)
+        self.brokers[symbol] = broker
+        self._open[symbol] = (position.qty if qty is None else qty,
+                              position.cost_basis if cost is None else cost)
+        self._bump(broker, position.unrealized_pl, position.cost_basis, 1)
+
+    def _bump(self, broker: str, pl: float, cost: float, count: int):
+        for key in (None, broker):
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = self._zero()
+            totals['pl_unrealized_usd'] += pl
+            totals['cost_basis'] += cost
+            totals['open_count'] += count
+
+    def on_price(self, symbol: str, price: float) -> Optional[OpenPosition]:
+        """
+        Aplica un precio nuevo a la posición del símbolo (O(1))
+
+        Returns:
+            Fila actualizada, o None si no hay posición abierta o la
+            fila no cambió
+        """
+        row = self.rows.get(symbol)
+        if row is None or price is None or price <= 0:
+            return None
+
+        total_qty, cost = self._open[symbol]
+        current_value = total_qty * price
+        unrealized_raw = current_value - cost
+        unrealized_pl = round(unrealized_raw, 2)
+        if unrealized_pl == row.unrealized_pl and round(price, 2) == row.current_price:
+            return None
+
+        self._bump(self.brokers[symbol], unrealized_pl - row.unrealized_pl, 0.0, 0)
+        row.current_price = round(price, 2)
+        row.current_value = round(current_value, 2)
+        row.unrealized_pl = unrealized_pl
+        row.unrealized_percent = round(unrealized_raw / cost * 100, 2) if cost > 0 else 0.0
+        return row
+
+    def totals(self, broker: Optional[str] = None) -> Dict:
+        """
+        Totales no realizados (todos los brokers o uno)
+
+        Returns:
+            {'open_count', 'pl_unrealized_usd', 'pl_unrealized_percent', 'cost_basis'}
+        """
+        totals = self._totals.get(broker) or self._zero()
+        pl = totals['pl_unrealized_usd']
+        cost = totals['cost_basis']
+        return {
+            'open_count': totals['open_count'],
+            'pl_unrealized_usd': round(pl, 2),
+            'pl_unrealized_percent': round(pl / cost * 100, 2) if cost > 0 else 0.0,
+            'cost_basis': round(cost, 2)
+        }
+
+    def snapshot(self, broker: Optional[str] = None) -> List[OpenPosition]:
+        """Copia de las filas (open_detail), opcionalmente de un broker"""
+        return [replace(row) for symbol, row in self.rows.items()
+                if broker is None or self.brokers[symbol] == broker]
+
+    def symbols(self, broker: Optional[str] = None) -> List[str]:
+        """Símbolos con posición abierta (para suscribirse a precios)"""
+        return [symbol for symbol in self.rows if broker is None or self.brokers[symbol] == broker]
@@ -0,0 +1,209 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Parallel FIFO - Matching por Símbolo en Procesos        ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Reparte símbolos en shards balanceados por número de fills
+- Ejecuta el núcleo numérico del FIFO (SymbolLedger.match) en un
+  ProcessPoolExecutor
+- Envía y recibe arrays de NumPy (side/units/total/fee y resultados por
+  fill) en lugar de listas de trades pickleadas; las cantidades viajan
+  como int64 en unidades base (ver fixed_point)
+
+Solo conviene para historiales grandes (imports multi-año): por debajo
+de PARALLEL_MIN_FILLS el costo de arrancar/serializar supera al FIFO.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+
+import numpy as np
+
+from .fifo_ledger import SymbolLedger, trade_numbers
+from .fixed_point import DEFAULT_QTY_SCALE, to_units_array
+from .lot_matching import DEFAULT_METHOD
+
+logger = logging.getLogger(__name__)
+
+# Umbral por defecto: fills a procesar desde cero para activar el modo paralelo
+PARALLEL_MIN_FILLS = 200_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """ProcessPoolExecutor compartido (se crea al primer uso)"""
+    global _pool, _pool_workers
+    workers = max_workers or os.cpu_count() or 1
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+            logger.info(f"🧵 Pool FIFO paralelo iniciado ({workers} procesos)")
+        return _pool
+
+
+def shutdown_pool():
+    """Cierra el pool compartido (al apagar el servidor)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def _make_shards(jobs: Dict[str, List[Tuple[int, Dict]]], n_shards: int) -> List[List[str]]:
+    """Reparte símbolos en n_shards con carga similar (greedy, mayor primero)"""
+    shards: List[List[str]] = [[] for _ in range(n_shards)]
+    loads = [0] * n_shards
+    for symbol in sorted(jobs, key=lambda s: len(jobs[s]), reverse=True):
+        target = loads.index(min(loads))
+        shards[target].append(symbol)
+        loads[target] += len(jobs[symbol])
+    return [shard for shard in shards if shard]
+
+
+def _pack_shard(symbols: List[str], jobs: Dict[str, List[Tuple[int, Dict]]],
+                scales: List[int]) -> Tuple:
+    """Serializa un shard como (symbols, scales, offsets, ts, side, units, total, fee)"""
+    offsets = [0]
+    ts, side, qty, total, fee = [], [], [], [], []
+    units = []
+    for symbol, scale in zip(symbols, scales):
+        start = len(qty)
+        for trade_ts, trade in jobs[symbol]:
+            s, q, t, f = trade_numbers(trade)
+            ts.append(trade_ts)
+            side.append(s)
+            qty.append(q)
+            total.append(t)
+            fee.append(f)
+        units.append(to_units_array(qty[start:], scale))
+        offsets.append(len(side))
+    return (symbols, scales, np.array(offsets, dtype=np.int64), np.array(ts, dtype=np.int64),
+            np.array(side, dtype=np.int8),
+            np.concatenate(units) if units else np.zeros(0, dtype=np.int64),
+            np.array(total, dtype=np.float64), np.array(fee, dtype=np.float64))
+
+
+def match_shard(symbols: List[str], scales: List[int], offsets: np.ndarray, ts: np.ndarray,
+                side: np.ndarray, units: np.ndarray, total: np.ndarray, fee: np.ndarray,
+                method: str = DEFAULT_METHOD) -> Tuple:
+    """
+    Worker: corre SymbolLedger.match sobre cada símbolo del shard
+
+    Returns:
+        (cost_basis, pl_usd, pl_percent, is_closed,     # por fill (NaN = sin cost_basis)
+         holding_us,                                    # por fill
+         open_units, open_cost,                         # por símbolo
+         lot_offsets, lot_units, lot_cost, lot_ts)      # lotes abiertos en orden de compra
+    """
+    n = len(side)
+    cost_basis = np.full(n, np.nan)
+    pl_usd = np.zeros(n)
+    pl_percent = np.zeros(n)
+    is_closed = np.zeros(n, dtype=np.bool_)
+    holding_us = np.zeros(n, dtype=np.int64)
+    open_units = np.zeros(len(symbols), dtype=np.int64)
+    open_cost = np.zeros(len(symbols))
+    lot_offsets = [0]
+    lots: List[List[float]] = []
+
+    ts_l, side_l, units_l = ts.tolist(), side.tolist(), units.tolist()
+    total_l, fee_l = total.tolist(), fee.tolist()
+    bounds = offsets.tolist()
+
+    for i, symbol in enumerate(symbols):
+        ledger = SymbolLedger(symbol, method=method, scale=scales[i])
+        for j in range(bounds[i], bounds[i + 1]):
+            cb, pl, pct, closed, held = ledger.match(side_l[j], units_l[j], total_l[j],
+                                                     fee_l[j], ts_l[j])
+            if cb is not None:
+                cost_basis[j] = cb
+            pl_usd[j] = pl
+            pl_percent[j] = pct
+            is_closed[j] = closed
+            holding_us[j] = held
+        open_units[i] = ledger.open_units
+        open_cost[i] = ledger.open_cost
+        lots.extend(ledger.lots.lots())
+        lot_offsets.append(len(lots))
+
+    return (cost_basis, pl_usd, pl_percent, is_closed, holding_us, open_units, open_cost,
+            np.array(lot_offsets, dtype=np.int64),
+            np.array([lot[0] for lot in lots], dtype=np.int64),
+            np.array([lot[1] for lot in lots], dtype=np.float64),
+            np.array([lot[2] for lot in lots], dtype=np.int64))
+
+
+def _restore_shard(symbols: List[str], scales: List[int], jobs: Dict[str, List[Tuple[int, Dict]]],
+                   result: Tuple, brokers: Dict[str, str],
+                   method: str = DEFAULT_METHOD) -> Dict[str, Tuple[SymbolLedger, List]]:
+    """Reconstruye SymbolLedgers (records de salida) con los resultados del worker"""
+    (cost_basis, pl_usd, pl_percent, is_closed, holding_us, open_units, open_cost,
+     lot_offsets, lot_units, lot_cost, lot_ts) = result
+    cost_l = cost_basis.tolist()
+    pl_l, pct_l, closed_l = pl_usd.tolist(), pl_percent.tolist(), is_closed.tolist()
+    held_l = holding_us.tolist()
+    lot_bounds = lot_offsets.tolist()
+    lots_l = [list(lot) for lot in zip(lot_units.tolist(), lot_cost.tolist(), lot_ts.tolist())]
+    open_units_l, open_cost_l = open_units.tolist(), open_cost.tolist()
+
+    restored = {}
+    j = 0
+    for i, symbol in enumerate(symbols):
+        ledger = SymbolLedger(symbol, brokers[symbol], method, scales[i])
+        records = []
+        for ts, trade in jobs[symbol]:
+            cb = cost_l[j]
+            records.append(ledger.record(trade, ts, (None if cb != cb else cb, pl_l[j], pct_l[j],
+                                                     closed_l[j], held_l[j])))
+            j += 1
+        ledger.lots.restore(lots_l[lot_bounds[i]:lot_bounds[i + 1]])
+        ledger.open_units, ledger.open_cost = open_units_l[i], open_cost_l[i]
+        restored[symbol] = (ledger, records)
+    return restored
+
+
+def process_symbols_parallel(jobs: Dict[str, List[Tuple[int, Dict]]],
+                             max_workers: Optional[int] = None,
+                             method: str = DEFAULT_METHOD,
+                             qty_scales: Optional[Dict[str, int]] = None
+                             ) -> Dict[str, Tuple[SymbolLedger, List]]:
+    """
+    Procesa símbolos completos (desde cola vacía) en paralelo
+
+    Args:
+        jobs: {symbol: [(ts_us, trade), ...]} ordenado por fecha
+        max_workers: Procesos del pool (None = cpu_count)
+        method: Método de matching de lotes (ver lot_matching)
+        qty_scales: {symbol: unidades base por unidad} (ver fixed_point)
+
+    Returns:
+        {symbol: (SymbolLedger, [(TradeRecord, ClosedOp o None), ...])}
+    """
+    pool = get_pool(max_workers)
+    brokers = {symbol: pairs[0][1].get('broker', '') for symbol, pairs in jobs.items()}
+    # Más shards que procesos para balancear símbolos desiguales
+    shards = _make_shards(jobs, min(len(jobs), 4 * (max_workers or os.cpu_count() or 1)))
+
+    qty_scales = qty_scales or {}
+    futures = []
+    for shard in shards:
+        scales = [qty_scales.get(symbol, DEFAULT_QTY_SCALE) for symbol in shard]
+        futures.append((shard, scales,
+                        pool.submit(match_shard, *_pack_shard(shard, jobs, scales), method)))
+
+    restored = {}
+    for shard, scales, future in futures:
+        restored.update(_restore_shard(shard, scales, jobs, future.result(), brokers, method))
+    return restored
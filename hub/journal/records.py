@@ -0,0 +1,127 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Records - Tipos Compactos del Journal                  ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Dataclasses con __slots__ para lo que el ledger guarda por trade:
+  TradeRecord (trade + P&L), ClosedOp y OpenPosition
+- TradeRecord referencia el trade normalizado del adapter en lugar de
+  copiarlo: todas las ventanas/brokers del cache comparten los mismos
+  objetos
+- Conversión a dict solo en el borde de la API (dict() /
+  metrics_to_dict)
+"""
+
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional
+
+
+@dataclass(slots=True)
+class TradeRecord:
+    """Trade normalizado (por referencia, sin copia) + metadata de P&L"""
+    trade: Dict
+    pl_usd: float = 0.0
+    pl_percent: float = 0.0           # Redondeado a 2 decimales
+    is_closed: bool = False
+    cost_basis: Optional[float] = None
+
+    @property
+    def symbol(self) -> str:
+        return self.trade['symbol']
+
+    @property
+    def broker(self) -> str:
+        return self.trade.get('broker', '')
+
+    @property
+    def datetime(self) -> str:
+        return self.trade['datetime']
+
+    def dict(self) -> Dict:
+        """Trade + pl_usd, pl_percent, is_closed y cost_basis (si hubo match)"""
+        d = dict(self.trade)
+        d['pl_usd'] = self.pl_usd
+        d['pl_percent'] = self.pl_percent
+        d['is_closed'] = self.is_closed
+        if self.cost_basis is not None:
+            d['cost_basis'] = self.cost_basis
+        return d
+
+
+@dataclass(slots=True)
+class ClosedOp:
+    """Operación cerrada (una venta con match contra lotes abiertos)"""
+    symbol: str
+    broker: str
+    pl_usd: float
+    pl_percent: float
+    cost_basis: float
+    sell_proceeds: float
+    qty: float
+    sell_date: str
+    holding_us: int = 0               # Tenencia promedio de los lotes consumidos (µs)
+
+    def dict(self) -> Dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+@dataclass(slots=True)
+class OpenPosition:
+    """Posición abierta de un símbolo (valores redondeados para la API)"""
+    symbol: str
+    qty: float
+    avg_cost: float
+    current_price: float
+    cost_basis: float
+    current_value: float
+    unrealized_pl: float
+    unrealized_percent: float
+    entries: int
+
+    def dict(self) -> Dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def records_to_dicts(records: List, memo: Optional[Dict[int, Dict]] = None) -> List[Dict]:
+    """
+    Lista de records (o dicts ya convertidos) → lista de dicts
+
+    Con memo ({id(record): dict}) un record compartido por varias
+    ventanas se convierte una sola vez y las listas comparten el dict.
+    """
+    if memo is None:
+        return [r.dict() if hasattr(r, 'dict') else r for r in records]
+    out = []
+    for r in records:
+        if not hasattr(r, 'dict'):
+            out.append(r)
+            continue
+        d = memo.get(id(r))
+        if d is None:
+            d = memo[id(r)] = r.dict()
+        out.append(d)
+    return out
+
+
+def metrics_to_dict(metrics: Dict, memo: Optional[Dict[int, Dict]] = None,
+                    include_trades: bool = True) -> Dict:
+    """
+    Copia de una respuesta de métricas con trades/open_detail como dicts
+
+    Para resultados calculados con as_records=True (ver JournalManager);
+    los dicts ya convertidos pasan sin cambios. memo: ver records_to_dicts.
+    include_trades=False omite la lista de trades (resumen; la lista se
+    pagina aparte, ver trades_query).
+    """
+    result = dict(metrics)
+    if not include_trades:
+        result.pop('trades', None)
+    elif 'trades' in result:
+        result['trades'] = records_to_dicts(result['trades'], memo)
+    positions = result.get('positions')
+    if positions and 'open_detail' in positions:
+        result['positions'] = dict(positions,
+                                   open_detail=records_to_dicts(positions['open_detail']))
+    return result
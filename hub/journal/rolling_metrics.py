@@ -0,0 +1,162 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Rolling Metrics - Win Rate / PF / Expectancy Móviles   ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Win rate, profit factor y expectancy sobre las últimas N operaciones
+  cerradas o sobre una ventana de tiempo deslizante (últimos D días)
+- Trabaja sobre las sumas acumuladas que la EquityCurve ya mantiene
+  (equity, wins, gross_win): la ventana [lo, i] es una resta de dos
+  filas, O(1) por punto (O(log n) para ubicar lo en ventanas de
+  tiempo); agregar k operaciones al ledger cuesta O(k)
+- Alimenta los gráficos de tendencia del dashboard
+"""
+
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+
+from .equity_curve import US_PER_DAY
+
+logger = logging.getLogger(__name__)
+
+
+def _check_window(window_ops: Optional[int], window_days: Optional[float]):
+    if window_ops is not None:
+        if window_ops <= 0:
+            raise ValueError(f"window_ops debe ser > 0: {window_ops}")
+    elif window_days is not None:
+        if window_days <= 0:
+            raise ValueError(f"window_days debe ser > 0: {window_days}")
+    else:
+        raise ValueError("Indicar window_ops o window_days")
+
+
+def window_starts(ts: np.ndarray, window_ops: Optional[int] = None,
+                  window_days: Optional[float] = None) -> np.ndarray:
+    """
+    Índice de la primera operación de la ventana que termina en cada fila
+
+    Ventana por operaciones: las últimas window_ops (incluida la fila).
+    Ventana por tiempo: ventas con ts > ts_fila - window_days.
+
+    Raises:
+        ValueError: Sin ventana o ventana no positiva
+    """
+    _check_window(window_ops, window_days)
+    if window_ops is not None:
+        return np.maximum(np.arange(len(ts)) - window_ops + 1, 0)
+    return np.searchsorted(ts, ts - int(window_days * US_PER_DAY), side='right')
+
+
+def rolling_rows(rows: np.ndarray, starts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Métricas de la ventana [starts[i], i] para cada fila i de la curva
+
+    Returns:
+        {'count', 'win_rate', 'profit_factor', 'expectancy'} como arrays
+        (profit_factor: 999.99 sin pérdidas, 0 sin ganancias; misma
+        convención que el resumen del journal)
+    """
+    idx = np.arange(len(rows))
+
+    def window_sum(column: str) -> np.ndarray:
+        # Suma acumulada con un 0 al inicio: sum[lo..i] = cum[i] - cum[lo-1]
+        cum = np.concatenate(([0], rows[column]))
+        return cum[idx + 1] - cum[starts]
+
+    count = idx + 1 - starts
+    wins = window_sum('wins')
+    pl = window_sum('equity')
+    gross_win = window_sum('gross_win')
+    gross_loss = np.maximum(gross_win - pl, 0.0)
+
+    safe_count = np.maximum(count, 1)
+    has_loss = gross_loss > 1e-9
+    profit_factor = np.where(
+        has_loss, gross_win / np.where(has_loss, gross_loss, 1.0),
+        np.where(gross_win > 0, 999.99, 0.0))
+    return {
+        'count': count,
+        'win_rate': wins / safe_count * 100,
+        'profit_factor': profit_factor,
+        'expectancy': pl / safe_count,
+    }
+
+
+def rolling_series(rows: np.ndarray, window_ops: Optional[int] = None,
+                   window_days: Optional[float] = None, cutoff: Optional[int] = None,
+                   max_points: Optional[int] = None) -> Dict:
+    """
+    Serie rolling para gráficos sobre las filas de una EquityCurve
+
+    Las ventanas usan todo el historial (una ventana de 50 ops al inicio
+    del período mira ops anteriores al corte); cutoff y max_points solo
+    recortan / submuestrean los puntos devueltos.
+
+    Returns:
+        Listas paralelas {'t' (epoch ms), 'count', 'win_rate',
+        'profit_factor', 'expectancy'}
+
+    Raises:
+        ValueError: Ventana inválida (ver window_starts)
+    """
+    starts = window_starts(rows['ts'], window_ops, window_days)
+    first = int(np.searchsorted(rows['ts'], cutoff, side='left')) if cutoff is not None else 0
+    points = np.arange(first, len(rows))
+    if max_points and len(points) > max_points:
+        points = points[np.linspace(0, len(points) - 1, max_points).astype(np.int64)]
+
+    stats = rolling_rows(rows, starts)
+    return {
+        't': (rows['ts'][points] // 1000).tolist(),
+        'count': stats['count'][points].tolist(),
+        'win_rate': np.round(stats['win_rate'][points], 2).tolist(),
+        'profit_factor': np.round(stats['profit_factor'][points], 2).tolist(),
+        'expectancy': np.round(stats['expectancy'][points], 2).tolist(),
+    }
+
+
+def rolling_latest(rows: np.ndarray, window_ops: Optional[int] = None,
+                   window_days: Optional[float] = None) -> Dict:
+    """
+    Métricas de la ventana que termina en la última operación (O(1) / O(log n))
+
+    Returns:
+        {'count', 'win_rate', 'profit_factor', 'expectancy'} con tipos nativos
+    """
+    _check_window(window_ops, window_days)
+    if len(rows) == 0:
+        return {'count': 0, 'win_rate': 0.0, 'profit_factor': 0.0, 'expectancy': 0.0}
+
+    ts = rows['ts']
+    if window_ops is not None:
+        start = max(len(rows) - window_ops, 0)
+    else:
+        start = int(np.searchsorted(ts, ts[-1] - int(window_days * US_PER_DAY), side='right'))
+
+    last = rows[-1]
+    count = len(rows) - start
+    wins, pl, gross_win = int(last['wins']), float(last['equity']), float(last['gross_win'])
+    if start > 0:
+        base = rows[start - 1]
+        wins -= int(base['wins'])
+        pl -= float(base['equity'])
+        gross_win -= float(base['gross_win'])
+    gross_loss = max(gross_win - pl, 0.0)
+
+    if gross_loss > 1e-9:
+        profit_factor = gross_win / gross_loss
+    elif gross_win > 0:
+        profit_factor = 999.99
+    else:
+        profit_factor = 0.0
+    return {
+        'count': count,
+        'win_rate': round(wins / count * 100, 2),
+        'profit_factor': round(profit_factor, 2),
+        'expectancy': round(pl / count, 2),
+    }
@@ -5,16 +5,33 @@
 ╚═══════════════════════════════════════════════════════════════╝
 
 Responsabilidad Única:
-- Obtiene transacciones de Schwab API
+- Obtiene transacciones de Schwab API (sync incremental desde la
+  última sincronización; backfills en rangos de fechas paralelos),
+  persistidas en el TradeStore
 - Normaliza a formato común
 - Maneja errores específicos de Schwab
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
+import operator
+import sqlite3
+import threading
 import requests
 
+from .json_stream import STREAM_CHUNK_SIZE, iter_json_array
+from .single_flight import SingleFlight
+from .timestamps import EPOCH, to_epoch_us
+from .trade_store import TradeStore, get_default_store
+
+try:
+    from ..managers.request_scheduler import Priority, scheduled_get
+except ImportError:
+    # Importado como paquete 'journal' (scripts con hub/ en sys.path)
+    from managers.request_scheduler import Priority, scheduled_get
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,9 +40,20 @@ class SchwabAdapter:
     
     BASE_URL = "https://api.schwabapi.com"
     ENDPOINT = "/trader/v1/accounts/{account_hash}/transactions"
+    CHUNK_DAYS = 30
+    MAX_CONCURRENT_CHUNKS = 4
+    # Margen re-pedido en cada sync incremental (transacciones publicadas tarde)
+    SYNC_OVERLAP = timedelta(days=1)
+    BROKER = "schwab"
     
-    def __init__(self):
-        """Inicializa el adaptador con token manager"""
+    def __init__(self, store: Optional[TradeStore] = None):
+        """
+        Inicializa el adaptador con token manager
+        
+        Args:
+            store: TradeStore donde se persisten transacciones + estado de sync
+                   (default el store compartido, ver get_default_store)
+        """
         try:
             # Importar desde hub.managers
             import sys
@@ -37,6 +65,9 @@ class SchwabAdapter:
             from managers.schwab_token_manager import SchwabTokenManager
             self.token_manager = SchwabTokenManager()
             self.session = requests.Session()
+            
+            # Transacciones ya sincronizadas + account hash (sync incremental)
+            self._init_sync_state(store)
         except ImportError as e:
             logger.error(f"Error importando SchwabTokenManager: {e}")
             raise
@@ -53,43 +84,51 @@ class SchwabAdapter:
             logger.error(f"Error obteniendo token Schwab: {e}")
             raise
     
-    def _get_account_hash(self) -> str:
-        """Extrae account_hash (hashValue) mediante llamada a API de accountNumbers"""
+    def _get_account_hash(self, refresh: bool = False) -> str:
+        """
+        Extrae account_hash (hashValue) mediante llamada a API de accountNumbers
+        
+        El hash es estable: se pide una vez y queda cacheado (y persistido
+        con el estado de sync). refresh=True fuerza la llamada.
+        """
+        if self.account_hash and not refresh:
+            return self.account_hash
         try:
-            # Obtener token válido
-            token = self.token_manager.get_current_token()
-            
             # Llamar a API de accountNumbers para obtener el hashValue (encrypted account number)
             url = f"{self.BASE_URL}/trader/v1/accounts/accountNumbers"
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/json"
-            }
-            
-            response = self.session.get(url, headers=headers, timeout=10)
+            response = scheduled_get(self.session, self.BROKER, "accounts", url, Priority.JOURNAL,
+                                     headers=self._get_headers(), timeout=10)
             response.raise_for_status()
-            
-            accounts = response.json()
-            logger.debug(f"Respuesta de accountNumbers API: {accounts}")
-            
-            if not accounts or len(accounts) == 0:
-                raise ValueError("No se encontraron cuentas")
-            
-            # Estructura: [{"accountNumber": "74164065", "hashValue": "6C2F..."}]
-            first_account = accounts[0]
-            account_hash = first_account.get("hashValue")
-            
-            if not account_hash:
-                logger.error(f"Estructura de cuenta: {first_account}")
-                raise ValueError("hashValue no encontrado en accountNumbers")
-            
-            logger.debug(f"Account hash obtenido: {account_hash}")
-            return account_hash
+            return self._store_account_hash(response.json())
             
         except Exception as e:
             logger.error(f"Error obteniendo account_hash: {e}")
             raise
     
+    def _store_account_hash(self, accounts: List[Dict]) -> str:
+        """
+        Cachea el hashValue de la primera cuenta de la respuesta de accountNumbers
+        
+        Raises:
+            ValueError: Respuesta sin cuentas o sin hashValue
+        """
+        logger.debug(f"Respuesta de accountNumbers API: {accounts}")
+        
+        if not accounts or len(accounts) == 0:
+            raise ValueError("No se encontraron cuentas")
+        
+        # Estructura: [{"accountNumber": "74164065", "hashValue": "6C2F..."}]
+        first_account = accounts[0]
+        account_hash = first_account.get("hashValue")
+        
+        if not account_hash:
+            logger.error(f"Estructura de cuenta: {first_account}")
+            raise ValueError("hashValue no encontrado en accountNumbers")
+        
+        logger.debug(f"Account hash obtenido: {account_hash}")
+        self.account_hash = account_hash
+        return account_hash
+    
     def get_account_balance(self) -> Dict[str, float]:
         """
         Obtiene balance actual de la cuenta Schwab
@@ -109,7 +148,8 @@ class SchwabAdapter:
                 "Accept": "application/json"
             }
             
-            response = self.session.get(url, headers=headers, timeout=10)
+            response = scheduled_get(self.session, self.BROKER, "accounts", url, Priority.ACCOUNT,
+                                     headers=headers, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -136,71 +176,227 @@ class SchwabAdapter:
         """
         Obtiene y normaliza transacciones de Schwab
         
+        Sincroniza primero lo nuevo desde la última sincronización (ver
+        sync_transactions) y devuelve la ventana desde el TradeStore. Ante
+        un error de la API devuelve lo ya guardado.
+        
         Args:
             days: Número de días hacia atrás a consultar
             
         Returns:
-            Lista de transacciones normalizadas
-            
-        Raises:
-            requests.RequestException: Error en la API REST
-            ValueError: Datos inválidos en la respuesta
+            Lista de transacciones normalizadas (más recientes primero)
         """
+        logger.info(f"Obteniendo transacciones Schwab (últimos {days} días)")
+        start_ts = self._window_start(days)
+        
         try:
-            logger.info(f"Obteniendo transacciones Schwab (últimos {days} días)")
-            
-            # Calcular rango de fechas en formato ISO 8601 completo
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            # Formato: YYYY-MM-DDTHH:MM:SS.000Z (requerido por Schwab API)
-            start_str = start_date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-            end_str = end_date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-            
-            # Construir URL con account_hash (hashValue de /accountNumbers)
-            account_hash = self._get_account_hash()
-            url = f"{self.BASE_URL}{self.ENDPOINT.format(account_hash=account_hash)}"
-            
-            # Parámetros de filtro
-            params = {
-                "types": "TRADE",  # Solo trades, no deposits/withdrawals
-                "startDate": start_str,
-                "endDate": end_str
-            }
-            
-            # Request con headers válidos
-            headers = self._get_headers()
-            response = self.session.get(url, headers=headers, params=params, timeout=10)
-            response.raise_for_status()
-            
-            transactions = response.json()
-            
-            if not isinstance(transactions, list):
-                logger.warning(f"Respuesta no es lista: {type(transactions)}")
-                return []
-            
-            # Normalizar cada transacción
-            normalized = []
-            for tx in transactions:
-                try:
-                    normalized_tx = self._normalize_transaction(tx)
-                    if normalized_tx:
-                        normalized.append(normalized_tx)
-                except Exception as e:
-                    logger.warning(f"Transacción individual rechazada: {e}")
-                    continue
-            
-            logger.info(f"✅ {len(normalized)} transacciones normalizadas de Schwab")
-            return normalized
-            
+            # Un sync en vuelo desde start_ts o antes también cubre esta ventana
+            self._flights.do("transactions", lambda: self._sync_transactions_locked(start_ts),
+                             start_ts, operator.le)
         except requests.RequestException as e:
+            # No lanzar excepción, usar lo guardado para no romper el journal
             logger.error(f"Error REST en Schwab API: {e}")
-            # No lanzar excepción, devolver lista vacía para no romper el journal
-            return []
         except Exception as e:
             logger.error(f"Error inesperado obteniendo transacciones: {e}")
-            # No lanzar excepción, devolver lista vacía para no romper el journal
+        
+        with self._sync_lock:
+            return self._stored_transactions(start_ts)
+    
+    def sync_transactions(self, start_ts: int) -> int:
+        """
+        Descarga las transacciones que faltan en el store
+        
+        - Incremental: desde la última sincronización (menos SYNC_OVERLAP)
+          hasta ahora; en estado estable es un solo request chico
+        - Backfill: si el store no cubre desde start_ts, el rango faltante
+          se parte en bloques de CHUNK_DAYS pedidos en paralelo (hasta
+          MAX_CONCURRENT_CHUNKS a la vez)
+        
+        El store y los límites sincronizados se actualizan solo si todos
+        los bloques terminan bien.
+        
+        Args:
+            start_ts: Epoch µs desde el que se necesita historial completo
+        
+        Returns:
+            Cantidad de transacciones nuevas
+        
+        Raises:
+            requests.RequestException: Error en la API REST
+            ValueError: Datos inválidos en la respuesta
+        """
+        now = datetime.now(timezone.utc)
+        ranges = self._plan_ranges(start_ts, now)
+        
+        account_hash = self._get_account_hash()
+        try:
+            chunks = self._fetch_chunks(account_hash, ranges)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in (400, 404):
+                raise
+            # Hash cacheado inválido (cuenta cambiada): pedirlo de nuevo una vez
+            logger.warning("Account hash rechazado - renovando")
+            chunks = self._fetch_chunks(self._get_account_hash(refresh=True), ranges)
+        
+        return self._commit_chunks(chunks, start_ts, now)
+    
+    def _sync_transactions_locked(self, start_ts: int) -> int:
+        with self._sync_lock:
+            return self.sync_transactions(start_ts)
+    
+    # Pasos del sync compartidos con AsyncSchwabAdapter
+    
+    @staticmethod
+    def _window_start(days: int) -> int:
+        """Epoch µs de inicio de la ventana de days días"""
+        return to_epoch_us(datetime.now(timezone.utc) - timedelta(days=days))
+    
+    def _stored_transactions(self, start_ts: int) -> List[Dict]:
+        """Transacciones guardadas desde start_ts, más recientes primero (índice broker+fecha del store)"""
+        try:
+            normalized = self.store.trades(self.BROKER, since_us=start_ts)
+        except sqlite3.Error as e:
+            logger.error(f"No se pudo leer transacciones Schwab del store: {e}")
             return []
+        logger.info(f"✅ {len(normalized)} transacciones normalizadas de Schwab")
+        return normalized
+    
+    def _plan_ranges(self, start_ts: int, now: datetime) -> List[Tuple[datetime, datetime]]:
+        """Rangos a pedir: backfill faltante (en bloques) + incremental desde la última sync"""
+        start = EPOCH + timedelta(microseconds=start_ts)
+        if self.covered_from_us is None or self.synced_until_us is None:
+            return self._date_chunks(start, now)
+        
+        ranges: List[Tuple[datetime, datetime]] = []
+        covered_from = EPOCH + timedelta(microseconds=self.covered_from_us)
+        synced_until = EPOCH + timedelta(microseconds=self.synced_until_us)
+        if start < covered_from:
+            ranges += self._date_chunks(start, covered_from)
+        ranges += self._date_chunks(min(synced_until - self.SYNC_OVERLAP, now), now)
+        return ranges
+    
+    def _commit_chunks(self, chunks: List[List[Dict]], start_ts: int, now: datetime) -> int:
+        """
+        Persiste los bloques descargados + límites sincronizados; devuelve las transacciones nuevas
+        
+        Si el store falla, los límites no avanzan: el sync siguiente vuelve
+        a pedir esos rangos.
+        """
+        covered_from_us = min(start_ts, self.covered_from_us) \
+            if self.covered_from_us is not None else start_ts
+        synced_until_us = to_epoch_us(now)
+        new_count = self._save_state([tx for transactions in chunks for tx in transactions],
+                                     covered_from_us, synced_until_us)
+        if new_count is None:
+            return 0
+        self.covered_from_us, self.synced_until_us = covered_from_us, synced_until_us
+        logger.debug(f"Sync Schwab: {len(chunks)} rangos, {new_count} transacciones nuevas")
+        return new_count
+    
+    @staticmethod
+    def _range_params(start: datetime, end: datetime) -> Dict[str, str]:
+        """Parámetros de filtro - formato YYYY-MM-DDTHH:MM:SS.000Z (UTC, requerido por Schwab API)"""
+        return {
+            "types": "TRADE",  # Solo trades, no deposits/withdrawals
+            "startDate": start.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "endDate": end.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        }
+    
+    def _date_chunks(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Parte [start, end] en bloques de CHUNK_DAYS (un resto de menos de un día va al último)"""
+        chunks = []
+        step = timedelta(days=self.CHUNK_DAYS)
+        while start < end:
+            chunk_end = start + step
+            if end - chunk_end < timedelta(days=1):
+                chunk_end = end
+            chunks.append((start, chunk_end))
+            start = chunk_end
+        return chunks
+    
+    def _fetch_chunks(self, account_hash: str,
+                      ranges: List[Tuple[datetime, datetime]]) -> List[List[Dict]]:
+        """Pide cada rango (en paralelo si hay más de uno); propaga el primer error"""
+        priorities = self._range_priorities(ranges)
+        if len(ranges) <= 1:
+            return [self._fetch_range(account_hash, start, end, priority)
+                    for (start, end), priority in zip(ranges, priorities)]
+        workers = min(len(ranges), self.MAX_CONCURRENT_CHUNKS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda r, p: self._fetch_range(account_hash, *r, p), ranges, priorities))
+    
+    @staticmethod
+    def _range_priorities(ranges: List[Tuple[datetime, datetime]]) -> List[Priority]:
+        """El rango más reciente (termina en now) es el sync; los anteriores, backfill"""
+        return [Priority.BACKFILL] * (len(ranges) - 1) + [Priority.JOURNAL] if ranges else []
+    
+    def _fetch_range(self, account_hash: str, start: datetime, end: datetime,
+                     priority: Priority = Priority.JOURNAL) -> List[Dict]:
+        """
+        Transacciones TRADE normalizadas de un rango de fechas (un request)
+        
+        El body se decodifica en streaming: cada transacción se normaliza
+        al llegar, sin tener la respuesta entera ni la lista cruda en memoria
+        
+        Raises:
+            requests.RequestException: Error en la API REST
+            ValueError: Respuesta truncada o que no es un array JSON
+        """
+        url = f"{self.BASE_URL}{self.ENDPOINT.format(account_hash=account_hash)}"
+        
+        # Request con headers válidos
+        response = scheduled_get(self.session, self.BROKER, "transactions", url, priority,
+                                 headers=self._get_headers(),
+                                 params=self._range_params(start, end), timeout=10, stream=True)
+        with response:
+            response.raise_for_status()
+            return self._normalize_transactions(
+                iter_json_array(response.iter_content(STREAM_CHUNK_SIZE)))
+    
+    def _normalize_transactions(self, transactions: Iterable[Dict]) -> List[Dict]:
+        """Normaliza transacciones (lista o stream), descartando las inválidas"""
+        normalized = []
+        for tx in transactions:
+            normalized_tx = self._normalize_or_skip(tx)
+            if normalized_tx:
+                normalized.append(normalized_tx)
+        return normalized
+    
+    def _normalize_or_skip(self, tx: Dict) -> Optional[Dict]:
+        """_normalize_transaction, o None (con warning) si la transacción es inválida"""
+        try:
+            return self._normalize_transaction(tx)
+        except Exception as e:
+            logger.warning(f"Transacción individual rechazada: {e}")
+            return None
+    
+    def _init_sync_state(self, store: Optional[TradeStore] = None):
+        """Account hash + límites sincronizados, hidratados desde el TradeStore"""
+        self.store = store or get_default_store()
+        state = self.store.get_state(self.BROKER) or {}
+        self.account_hash: Optional[str] = state.get("account_hash")
+        # Rango [covered_from_us, synced_until_us] (epoch µs) ya sincronizado completo
+        self.covered_from_us: Optional[int] = state.get("covered_from_us")
+        self.synced_until_us: Optional[int] = state.get("synced_until_us")
+        self._sync_lock = threading.Lock()
+        # Syncs/quotes en vuelo compartidos por callers concurrentes
+        self._flights = SingleFlight()
+        if self.synced_until_us is not None:
+            logger.info(f"Schwab desde el store: sincronizado hasta {self.synced_until_us}")
+    
+    def _save_state(self, transactions: List[Dict], covered_from_us: int,
+                    synced_until_us: int) -> Optional[int]:
+        """Persiste las transacciones del sync + límites sincronizados en una transacción del store (None si falla)"""
+        state = {
+            "account_hash": self.account_hash,
+            "covered_from_us": covered_from_us,
+            "synced_until_us": synced_until_us
+        }
+        try:
+            return self.store.commit_sync(self.BROKER, transactions, state)
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo guardar transacciones Schwab en el store: {e}")
+            return None
     
     def _normalize_transaction(self, tx: Dict) -> Optional[Dict]:
         """
@@ -281,10 +477,11 @@ class SchwabAdapter:
                 datetime_obj = datetime.now()
                 logger.debug(f"Fecha no válida: {date_str}, usando ahora")
             
-            # Formato normalizado
+            # Formato normalizado (ts_us: epoch µs para ordenar/filtrar sin parsear)
             return {
                 "id": trade_id,
                 "datetime": datetime_obj.isoformat(),
+                "ts_us": to_epoch_us(datetime_obj),
                 "symbol": symbol,
                 "side": side,
                 "quantity": quantity,
@@ -306,6 +503,9 @@ class SchwabAdapter:
         """
         Obtiene cotizaciones actuales de Schwab Market Data API
         
+        Callers concurrentes comparten la consulta en vuelo si sus símbolos
+        están incluidos en ella (ver SingleFlight).
+        
         Args:
             symbols: Lista de símbolos (ej: ["AAPL", "MSFT", "HOOD"])
         
@@ -313,6 +513,15 @@ class SchwabAdapter:
             Dict con symbol: precio actual
             Ejemplo: {"AAPL": 178.50, "MSFT": 420.30}
         """
+        if not symbols:
+            return {}
+        wanted = frozenset(symbols)
+        prices = self._flights.do("quotes", lambda: self._fetch_quotes(symbols),
+                                  wanted, frozenset.issuperset)
+        return {symbol: price for symbol, price in prices.items() if symbol in wanted}
+    
+    def _fetch_quotes(self, symbols: List[str]) -> Dict[str, float]:
+        """Ver get_quotes (una consulta, sin coalescing)"""
         try:
             if not symbols:
                 return {}
@@ -330,25 +539,28 @@ class SchwabAdapter:
             
             params = {"symbols": symbols_str}
             
-            response = self.session.get(url, headers=headers, params=params, timeout=10)
+            response = scheduled_get(self.session, self.BROKER, "quotes", url, Priority.QUOTES,
+                                     headers=headers, params=params, timeout=10)
             response.raise_for_status()
             
-            data = response.json()
-            
-            # Parsear respuesta
-            prices = {}
-            for symbol, quote_data in data.items():
-                quote = quote_data.get('quote', {})
-                # Usar lastPrice, si no está usar mark
-                price = quote.get('lastPrice') or quote.get('mark') or 0.0
-                prices[symbol] = float(price)
-            
+            prices = self._parse_quotes(response.json())
             logger.info(f"Quotes obtenidos para {len(prices)} símbolos")
             return prices
             
         except Exception as e:
             logger.error(f"Error obteniendo quotes: {e}")
             return {}
+    
+    @staticmethod
+    def _parse_quotes(data: Dict) -> Dict[str, float]:
+        """Precio por símbolo de una respuesta de /marketdata/v1/quotes"""
+        prices = {}
+        for symbol, quote_data in data.items():
+            quote = quote_data.get('quote', {})
+            # Usar lastPrice, si no está usar mark
+            price = quote.get('lastPrice') or quote.get('mark') or 0.0
+            prices[symbol] = float(price)
+        return prices
 
 
 async def get_schwab_journal(days: int = 7) -> Dict:
@@ -0,0 +1,119 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Single Flight - Coalescing de Requests a Brokers        ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Callers concurrentes que piden lo mismo (mismo key) comparten una
+  sola llamada en vuelo y su resultado (o su excepción)
+- Un scope más amplio cubre uno más chico: un sync desde hace 90 días
+  en vuelo satisface a quien pide 7; quotes de {A, B, C} a quien pide {A}
+- Funciona entre threads (requests en el executor) y en el event loop
+  (adapters async): el resultado viaja en un concurrent.futures.Future
+- do() llamado desde el thread del event loop nunca espera: el líder
+  puede ser un do_async de ese mismo loop, que no avanzaría mientras
+  el loop está bloqueado (deadlock); en ese caso hace la llamada propia
+"""
+
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+Covers = Callable[[Any, Any], bool]
+
+
+def _same_scope(inflight: Any, wanted: Any) -> bool:
+    return inflight == wanted
+
+
+def _in_event_loop() -> bool:
+    """True si el thread actual está corriendo un event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@dataclass
+class _Flight:
+    scope: Any
+    future: Future
+
+
+class SingleFlight:
+    """Llamadas en vuelo por key; los callers cubiertos esperan el resultado del líder"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, List[_Flight]] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], scope: Any = None,
+           covers: Optional[Covers] = None) -> Any:
+        """
+        fn() salvo que ya haya una llamada en vuelo para key que cubra scope
+
+        Args:
+            scope: Lo que pide el caller (ej. start_ts, símbolos)
+            covers: covers(scope_en_vuelo, scope) → True si el resultado en
+                    vuelo sirve al caller (default: scopes iguales)
+        """
+        # Desde el event loop no se puede esperar el Future: siempre lidera
+        flight, leader = self._join(key, scope, covers or _same_scope,
+                                    follow=not _in_event_loop())
+        if not leader:
+            return flight.future.result()
+        try:
+            return self._finish(key, flight, fn())
+        except BaseException as e:
+            self._fail(key, flight, e)
+            raise
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]], scope: Any = None,
+                       covers: Optional[Covers] = None) -> Any:
+        """Ver do (fn es una coroutine function)"""
+        flight, leader = self._join(key, scope, covers or _same_scope)
+        if not leader:
+            # shield: cancelar a un seguidor no cancela el Future del líder
+            return await asyncio.shield(asyncio.wrap_future(flight.future))
+        try:
+            return self._finish(key, flight, await fn())
+        except BaseException as e:
+            self._fail(key, flight, e)
+            raise
+
+    def _join(self, key: Hashable, scope: Any, covers: Covers,
+              follow: bool = True) -> Tuple[_Flight, bool]:
+        """(flight, True) si el caller lidera una llamada nueva; si no, la que lo cubre"""
+        with self._lock:
+            for flight in self._flights.get(key, []) if follow else []:
+                if covers(flight.scope, scope):
+                    self.shared += 1
+                    logger.debug(f"Single flight {key}: esperando llamada en vuelo")
+                    return flight, False
+            flight = _Flight(scope, Future())
+            self._flights.setdefault(key, []).append(flight)
+            return flight, True
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        with self._lock:
+            flights = self._flights.get(key, [])
+            flights.remove(flight)
+            if not flights:
+                del self._flights[key]
+
+    def _finish(self, key: Hashable, flight: _Flight, result: Any) -> Any:
+        self._forget(key, flight)
+        flight.future.set_result(result)
+        return result
+
+    def _fail(self, key: Hashable, flight: _Flight, error: BaseException):
+        self._forget(key, flight)
+        flight.future.set_exception(error)
@@ -0,0 +1,52 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Timestamps - Epoch en Microsegundos                    ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Conversión exacta datetime <-> epoch en microsegundos (int)
+- Los adapters guardan el resultado en el campo 'ts_us' de cada trade
+  normalizado; el journal ordena, filtra y agrupa sobre ese entero
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+
+def to_epoch_us(dt: datetime) -> int:
+    """
+    Convierte un datetime a epoch en microsegundos (aritmética entera exacta)
+
+    Los datetime naive se interpretan en la zona horaria local, igual que
+    datetime.timestamp().
+    """
+    if dt.tzinfo is None:
+        dt = dt.astimezone()
+    return (dt - EPOCH) // _ONE_US
+
+
+def parse_epoch_us(date_str: str) -> int:
+    """Parsea un datetime ISO 8601 ('Z' o '+00:00') a epoch en microsegundos"""
+    return to_epoch_us(datetime.fromisoformat(date_str.replace('Z', '+00:00')))
+
+
+def now_epoch_us() -> int:
+    """Epoch actual en microsegundos"""
+    return to_epoch_us(datetime.now(timezone.utc))
+
+
+def trade_epoch_us(trade: Dict) -> int:
+    """
+    Epoch en microsegundos de un trade normalizado
+
+    Usa 'ts_us' si el adapter ya lo calculó; si no (fixtures, trades
+    antiguos), parsea 'datetime'.
+    """
+    ts = trade.get('ts_us')
+    if ts is not None:
+        return ts
+    return parse_epoch_us(trade['datetime'])
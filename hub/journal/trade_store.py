@@ -0,0 +1,151 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Trade Store - Persistencia Local de Trades (SQLite)    ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Fuente de verdad local de los trades normalizados de ambos brokers:
+  los adapters escriben los deltas de cada sync y se hidratan desde
+  aquí al arrancar (sin volver a bajar el historial)
+- Upsert idempotente por (broker, id); índices por símbolo+fecha y
+  por broker+fecha
+- Estado de sync por broker (watermark, rangos cubiertos, account
+  hash) en la misma base: trades y estado se confirman en una sola
+  transacción
+
+Solo usa sqlite3 de la librería estándar. Modo WAL: lecturas sin
+bloquear la escritura de un sync. TRADEPLUS_TRADE_DB cambia el archivo
+por defecto (ej. un tmp en tests).
+"""
+
+from typing import Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_FILE = "journal_trades.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    broker TEXT NOT NULL,
+    id TEXT NOT NULL,
+    ts_us INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (broker, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trades_symbol_ts ON trades (symbol, ts_us);
+CREATE INDEX IF NOT EXISTS trades_broker_ts ON trades (broker, ts_us);
+CREATE TABLE IF NOT EXISTS sync_state (
+    broker TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+"""
+
+
+def default_db_path() -> str:
+    """hub/journal_trades.db (junto a los archivos de tokens), o TRADEPLUS_TRADE_DB"""
+    path = os.getenv('TRADEPLUS_TRADE_DB')
+    if path:
+        return path
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), DEFAULT_DB_FILE)
+
+
+class TradeStore:
+    """Trades normalizados + estado de sync por broker en SQLite"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Archivo SQLite (default hub/journal_trades.db; ':memory:' para tests)
+        """
+        self.path = path or default_db_path()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        logger.info(f"Trade store: {self.path} ({self.count()} trades)")
+
+    def commit_sync(self, broker: str, trades: Iterable[Dict], state: Optional[Dict] = None) -> int:
+        """
+        Upsert de trades + estado de sync del broker en una transacción
+
+        Un trade ya guardado se reescribe solo si cambió (ej. status).
+
+        Returns:
+            Cantidad de trades nuevos
+        """
+        rows = [(broker, str(t['id']), t['ts_us'], t['symbol'], json.dumps(t, sort_keys=True))
+                for t in trades]
+        with self._lock, self._conn:
+            new_count = self._conn.executemany(
+                "INSERT OR IGNORE INTO trades (broker, id, ts_us, symbol, data) VALUES (?, ?, ?, ?, ?)",
+                rows).rowcount
+            if new_count < len(rows):
+                self._conn.executemany(
+                    "UPDATE trades SET ts_us = ?, symbol = ?, data = ? "
+                    "WHERE broker = ? AND id = ? AND data != ?",
+                    [(ts, symbol, data, b, trade_id, data) for b, trade_id, ts, symbol, data in rows])
+            if state is not None:
+                self._conn.execute(
+                    "INSERT INTO sync_state (broker, state) VALUES (?, ?) "
+                    "ON CONFLICT(broker) DO UPDATE SET state = excluded.state",
+                    (broker, json.dumps(state)))
+        return max(new_count, 0)
+
+    def trades(self, broker: Optional[str] = None, since_us: Optional[int] = None,
+               symbol: Optional[str] = None) -> List[Dict]:
+        """Trades (más recientes primero) filtrados por broker, fecha mínima y símbolo"""
+        clauses, params = [], []
+        if broker is not None:
+            clauses.append("broker = ?")
+            params.append(broker)
+        if since_us is not None:
+            clauses.append("ts_us >= ?")
+            params.append(since_us)
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM trades {where} ORDER BY ts_us DESC", params).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def count(self, broker: Optional[str] = None) -> int:
+        with self._lock:
+            if broker is None:
+                return self._conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM trades WHERE broker = ?",
+                                      (broker,)).fetchone()[0]
+
+    def get_state(self, broker: str) -> Optional[Dict]:
+        """Estado de sync guardado por el adapter del broker (None = nunca sincronizado)"""
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM sync_state WHERE broker = ?",
+                                     (broker,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_store: Optional[TradeStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_store() -> TradeStore:
+    """TradeStore compartido en la ruta por defecto (adapters creados sin store)"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = TradeStore()
+        return _default_store
@@ -0,0 +1,251 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Trades Query - Paginación y Orden en Servidor          ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Filtra (símbolo, broker, side, rango de fechas), ordena y pagina la
+  lista de trades de una ventana del journal
+- Paginación por cursor (keyset): el cursor codifica (valor de orden,
+  id) del último trade entregado, así una página no se corre cuando el
+  refresh agrega trades nuevos
+- También acepta start_row/end_row (modelo de filas server-side /
+  infinite de Ag-Grid) y retorna last_row para que el grid sepa el total
+- TradeIndex: vistas ordenadas por (campo, filtros) de un snapshot del
+  journal, armadas una vez; cada página es un bisect + slice
+
+Trabaja sobre TradeRecords (as_records=True) o dicts; solo las filas de
+la página se convierten a dict.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import base64
+import json
+import logging
+import threading
+
+from .timestamps import parse_epoch_us, trade_epoch_us
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Vistas (orden + filtros) guardadas por TradeIndex
+MAX_CACHED_VIEWS = 32
+
+# Campo → valor por defecto (define también el tipo de la clave de orden)
+SORTABLE_FIELDS: Dict[str, Any] = {
+    'datetime': 0,
+    'symbol': '',
+    'broker': '',
+    'side': '',
+    'quantity': 0.0,
+    'price': 0.0,
+    'fee': 0.0,
+    'pl_usd': 0.0,
+    'pl_percent': 0.0,
+}
+
+
+def _trade(record) -> Dict:
+    """Trade normalizado de un TradeRecord o dict"""
+    return record.trade if hasattr(record, 'trade') else record
+
+
+def _field_getter(field: str) -> Callable[[Any], Any]:
+    """Función record → valor de orden (datetime se ordena por epoch µs)"""
+    if field == 'datetime':
+        return lambda r: trade_epoch_us(_trade(r))
+    default = SORTABLE_FIELDS[field]
+    if field in ('pl_usd', 'pl_percent'):
+        def getter(r):
+            value = getattr(r, field) if hasattr(r, 'trade') else r.get(field)
+            return default if value is None else value
+        return getter
+
+    def getter(r):
+        value = _trade(r).get(field)
+        return default if value is None else value
+    return getter
+
+
+def _parse_date(value: str, end_of_day: bool = False) -> int:
+    """Fecha 'YYYY-MM-DD' o datetime ISO → epoch µs (fecha sola = día completo UTC)"""
+    if len(value) == 10:
+        value += 'T23:59:59.999999+00:00' if end_of_day else 'T00:00:00+00:00'
+    return parse_epoch_us(value)
+
+
+def encode_cursor(key: Tuple) -> str:
+    """(valor de orden, id) → cursor opaco URL-safe"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    """
+    Cursor → (valor de orden, id)
+
+    Raises:
+        ValueError: Cursor inválido
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, trade_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+    return value, str(trade_id)
+
+
+def _matcher(symbol: Optional[str] = None, broker: Optional[str] = None,
+             side: Optional[str] = None, date_from: Optional[str] = None,
+             date_to: Optional[str] = None) -> Optional[Callable[[Any], bool]]:
+    """Predicado record → cumple los filtros (None si no hay filtros)"""
+    def values(arg: Optional[str]):
+        return {v.strip().upper() for v in arg.split(',') if v.strip()} if arg else None
+
+    symbols, brokers, sides = values(symbol), values(broker), values(side)
+    ts_from = _parse_date(date_from) if date_from else None
+    ts_to = _parse_date(date_to, end_of_day=True) if date_to else None
+    if symbols is None and brokers is None and sides is None and ts_from is None and ts_to is None:
+        return None
+
+    def matches(r) -> bool:
+        t = _trade(r)
+        if symbols is not None and str(t.get('symbol', '')).upper() not in symbols:
+            return False
+        if brokers is not None and str(t.get('broker', '')).upper() not in brokers:
+            return False
+        if sides is not None and str(t.get('side', '')).upper() not in sides:
+            return False
+        if ts_from is not None or ts_to is not None:
+            ts = trade_epoch_us(t)
+            if (ts_from is not None and ts < ts_from) or (ts_to is not None and ts > ts_to):
+                return False
+        return True
+    return matches
+
+
+def filter_trades(records: List, symbol: Optional[str] = None, broker: Optional[str] = None,
+                  side: Optional[str] = None, date_from: Optional[str] = None,
+                  date_to: Optional[str] = None) -> List:
+    """
+    Trades que cumplen todos los filtros dados
+
+    symbol/broker/side: igualdad sin distinguir mayúsculas (varios valores
+    separados por coma). date_from/date_to: fecha o datetime ISO, inclusivos.
+    """
+    matches = _matcher(symbol, broker, side, date_from, date_to)
+    return list(records) if matches is None else [r for r in records if matches(r)]
+
+
+class TradeIndex:
+    """
+    Vistas ordenadas de un snapshot de trades (una ventana del journal)
+
+    Cada (campo de orden, filtros) se ordena una sola vez; las vistas
+    filtradas salen de la vista sin filtros del mismo campo (ya ordenada).
+    Las páginas siguientes son bisect + slice. El snapshot no debe cambiar:
+    con trades nuevos se arma otro TradeIndex.
+    """
+
+    def __init__(self, records: List):
+        self.records = records
+        self._lock = threading.Lock()
+        self._views: 'OrderedDict[Tuple, Tuple[List[Tuple], List]]' = OrderedDict()
+
+    def query(self, sort: str = 'datetime', descending: bool = True,
+              cursor: Optional[str] = None, start_row: Optional[int] = None,
+              limit: int = DEFAULT_PAGE_SIZE, **filters) -> Dict:
+        """Ver query_trades"""
+        if sort not in SORTABLE_FIELDS:
+            raise ValueError(f"Campo de orden inválido: {sort} (usar {', '.join(SORTABLE_FIELDS)})")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        keys, rows = self._view(sort, filters)
+        total = len(keys)
+
+        # Página en orden ascendente [lo, hi) y, si es descendente, invertida
+        if cursor:
+            key = decode_cursor(cursor)
+            try:
+                if descending:
+                    hi = bisect_left(keys, key)
+                    lo = max(hi - limit, 0)
+                else:
+                    lo = bisect_right(keys, key)
+                    hi = min(lo + limit, total)
+            except TypeError as e:
+                # Cursor generado con otro campo de orden
+                raise ValueError(f"Cursor no corresponde al orden '{sort}'") from e
+        else:
+            offset = max(int(start_row or 0), 0)
+            if descending:
+                hi = max(total - offset, 0)
+                lo = max(hi - limit, 0)
+            else:
+                lo = min(offset, total)
+                hi = min(lo + limit, total)
+
+        page = list(range(lo, hi))
+        if descending:
+            page.reverse()
+        more = lo > 0 if descending else hi < total
+
+        return {
+            'rows': [rows[i].dict() if hasattr(rows[i], 'dict') else rows[i] for i in page],
+            'next_cursor': encode_cursor(keys[page[-1]]) if page and more else None,
+            'last_row': total
+        }
+
+    def _view(self, sort: str, filters: Dict) -> Tuple[List[Tuple], List]:
+        """(claves ordenadas, records en el mismo orden) para el orden y filtros pedidos"""
+        view_key = (sort, frozenset((k, v) for k, v in filters.items() if v))
+        with self._lock:
+            view = self._views.get(view_key)
+            if view is not None:
+                self._views.move_to_end(view_key)
+                return view
+
+        matches = _matcher(**filters)
+        if matches is None:
+            getter = _field_getter(sort)
+            keyed = sorted((((getter(r), str(_trade(r).get('id', ''))), r) for r in self.records),
+                           key=lambda pair: pair[0])
+            view = ([k for k, _ in keyed], [r for _, r in keyed])
+        else:
+            keys, rows = self._view(sort, {})
+            picked = [i for i, r in enumerate(rows) if matches(r)]
+            view = ([keys[i] for i in picked], [rows[i] for i in picked])
+
+        with self._lock:
+            self._views[view_key] = view
+            while len(self._views) > MAX_CACHED_VIEWS:
+                self._views.popitem(last=False)
+        return view
+
+
+def query_trades(records: List, sort: str = 'datetime', descending: bool = True,
+                 cursor: Optional[str] = None, start_row: Optional[int] = None,
+                 limit: int = DEFAULT_PAGE_SIZE, **filters) -> Dict:
+    """
+    Una página de trades filtrados y ordenados (ordena en cada llamada;
+    para varias páginas del mismo snapshot usar TradeIndex)
+
+    Args:
+        records: Trades de la ventana (TradeRecords o dicts)
+        sort: Campo de orden (ver SORTABLE_FIELDS); el id desempata
+        descending: Orden descendente (por defecto, más recientes primero)
+        cursor: next_cursor de la página anterior (keyset)
+        start_row: Offset explícito (Ag-Grid); se ignora si hay cursor
+        limit: Filas por página (máximo MAX_PAGE_SIZE)
+        **filters: symbol, broker, side, date_from, date_to (ver filter_trades)
+
+    Returns:
+        {'rows': [dicts], 'next_cursor': str o None, 'last_row': total filtrado}
+
+    Raises:
+        ValueError: Campo de orden o cursor inválido
+    """
+    return TradeIndex(records).query(sort, descending, cursor, start_row, limit, **filters)
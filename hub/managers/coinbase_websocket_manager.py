@@ -10,7 +10,12 @@ import time
 from pathlib import Path
 from datetime import datetime
 import websockets
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
+
+try:
+    from .quote_cache import QuoteCache, get_quote_cache
+except ImportError:
+    from quote_cache import QuoteCache, get_quote_cache
 
 
 class CoinbaseWebSocketManager:
@@ -19,18 +24,24 @@ class CoinbaseWebSocketManager:
     # URL del WebSocket privado de Coinbase (NO es public, es authenticated)
     WEBSOCKET_URL = "wss://advanced-trade-ws.coinbase.com"
     
-    def __init__(self, config_path: str = "hub", product_ids: list = None):
+    def __init__(self, config_path: str = "hub", product_ids: list = None,
+                 on_tick: Optional[Callable[[str, float], Any]] = None,
+                 quote_cache: Optional[QuoteCache] = None):
         """
         Inicializa conexión WebSocket privada
         
         Args:
             config_path: ruta a carpeta con JWT (default: 'hub')
             product_ids: lista de productos a suscribirse (default: ['BTC-USD', 'ETH-USD'])
+            on_tick: callback(product_id, price) por cada tick (puede ser async)
+            quote_cache: cache donde se guarda cada tick (default el compartido)
         """
         self.config_path = Path(config_path)
         # Buscar JWT en raíz o en config_path
         self.jwt_file = Path("coinbase_current_jwt.json") if Path("coinbase_current_jwt.json").exists() else self.config_path / "coinbase_current_jwt.json"
         self.product_ids = product_ids or ["BTC-USD", "ETH-USD"]
+        self.on_tick = on_tick
+        self.quote_cache = quote_cache or get_quote_cache()
         
         self.websocket = None
         self.current_jwt = None
@@ -185,6 +196,13 @@ class CoinbaseWebSocketManager:
                         price = data.get('price', 'N/A')
                         time_val = data.get('time', 'N/A')
                         self.logger.info(f"📊 TICK REAL {product}: ${price} [{time_val}]")
+                        await self._emit_tick(product, price)
+                    
+                    elif data.get('channel') == 'ticker':
+                        # Formato Advanced Trade: events[].tickers[]
+                        for event in data.get('events', []):
+                            for ticker in event.get('tickers', []):
+                                await self._emit_tick(ticker.get('product_id'), ticker.get('price'))
                         
                     elif msg_type in ['done', 'match', 'open', 'change']:
                         # Otros eventos privados de la cuenta
@@ -203,6 +221,21 @@ class CoinbaseWebSocketManager:
         except Exception as e:
             self.logger.error(f"❌ Error en receive loop: {e}")
     
+    async def _emit_tick(self, product: Optional[str], price: Any):
+        """Guarda el tick en el QuoteCache y lo entrega al callback on_tick (si hay)"""
+        if not product or price in (None, 'N/A'):
+            return
+        try:
+            price = float(price)
+            self.quote_cache.update(product, price)
+            if self.on_tick is None:
+                return
+            result = self.on_tick(product, price)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            self.logger.error(f"❌ Error en on_tick {product}: {e}")
+    
     async def get_next_tick(self, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
         """
         Obtiene siguiente tick REAL del WebSocket
@@ -0,0 +1,85 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Quote Cache - Último Precio de los Streams en Vivo      ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Último precio por símbolo con la hora en que llegó, escrito por los
+  websocket managers (Schwab LEVELONE_EQUITIES, Coinbase ticker)
+- Lectura de los precios frescos (edad <= max_age) para el journal, que
+  pide por REST solo los símbolos viejos o sin suscripción
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Edad máxima de un precio del stream para usarlo sin pedir REST
+QUOTE_MAX_AGE_SECONDS = 10.0
+
+
+class QuoteCache:
+    """symbol → (precio, time.monotonic() de la última confirmación)"""
+
+    def __init__(self, max_age: float = QUOTE_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._quotes: Dict[str, Tuple[float, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, symbol: str, price: float):
+        """Precio nuevo del stream"""
+        with self._lock:
+            self._quotes[symbol] = (price, time.monotonic())
+
+    def touch(self, symbol: str):
+        """
+        El stream confirma el símbolo sin mandar precio (Schwab solo envía
+        los campos que cambiaron): el último precio sigue vigente
+        """
+        with self._lock:
+            if symbol in self._quotes:
+                self._quotes[symbol] = (self._quotes[symbol][0], time.monotonic())
+
+    def fresh(self, symbols: Iterable[str], max_age: Optional[float] = None) -> Dict[str, float]:
+        """Precios con edad <= max_age (default self.max_age); el resto queda para REST"""
+        max_age = self.max_age if max_age is None else max_age
+        now = time.monotonic()
+        prices = {}
+        with self._lock:
+            for symbol in symbols:
+                quote = self._quotes.get(symbol)
+                if quote and now - quote[1] <= max_age:
+                    prices[symbol] = quote[0]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return prices
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'symbols': len(self._quotes),
+                'fresh': sum(1 for _, ts in self._quotes.values() if now - ts <= self.max_age),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_default_cache: Optional[QuoteCache] = None
+_default_lock = threading.Lock()
+
+
+def get_quote_cache() -> QuoteCache:
+    """QuoteCache compartido por streams y journal (se crea al primer uso)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = QuoteCache()
+        return _default_cache
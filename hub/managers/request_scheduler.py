@@ -0,0 +1,571 @@
+"""
+╔═══════════════════════════════════════════════════════════════╗
+║       Request Scheduler - Rate Limit Compartido por Broker   ║
+║       TRADEPLUS V5.0 - Multi-Broker System                  ║
+╚═══════════════════════════════════════════════════════════════╝
+
+Responsabilidad Única:
+- Un token bucket por broker (límite global de la API) y buckets
+  opcionales por endpoint, compartidos por todos los que llaman a las
+  APIs REST: adapters del journal, dashboards, websocket managers
+- El cupo es uno solo entre procesos (server, dashboards, scripts): el
+  estado de los buckets vive en hub/request_budget.db (SQLite); la cola
+  por prioridad es de cada proceso
+- Prioridades: cuando no hay tokens, los quotes pasan antes que las
+  cuentas, el sync del journal y los backfills
+- Un 429 bloquea el bucket del broker hasta Retry-After (en vez de que
+  cada caller reintente por su cuenta y encadene timeouts)
+- Métricas de cola por broker y prioridad (esperas, 429s, timeouts)
+
+Sirve a código sync (threads con requests) y async (aiohttp): la
+espera es el mismo cálculo, solo cambia time.sleep / asyncio.sleep.
+TRADEPLUS_RATE_LIMIT_DB cambia el archivo del cupo ('' = cupo por
+proceso, como RequestScheduler sin budget_path).
+"""
+
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import partial
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
+import asyncio
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# (requests/segundo, ráfaga) por broker: Schwab 120 req/min por app,
+# Coinbase Advanced Trade 30 req/s por usuario (con margen)
+BROKER_LIMITS: Dict[str, Tuple[float, int]] = {
+    "schwab": (2.0, 10),
+    "coinbase": (25.0, 25),
+}
+
+# Sub-límites por endpoint: un backfill no se come todo el cupo del broker
+ENDPOINT_LIMITS: Dict[Tuple[str, str], Tuple[float, int]] = {
+    ("schwab", "transactions"): (1.0, 4),
+    ("schwab", "accounts"): (1.0, 4),
+    ("coinbase", "fills"): (10.0, 10),
+}
+
+MAX_WAIT_SECONDS = 30.0
+# Espera sin Retry-After tras un 429
+DEFAULT_RETRY_AFTER = 2.0
+# Tope de la pausa de un loop de polling tras 429 seguidos (ver backoff_seconds)
+MAX_BACKOFF_SECONDS = 60.0
+# Re-chequeo de un waiter con tokens disponibles pero otro delante
+POLL_INTERVAL = 0.01
+
+DEFAULT_BUDGET_FILE = "request_budget.db"
+# Espera máxima por el lock del archivo de cupo (otro proceso escribiendo)
+BUDGET_LOCK_TIMEOUT = 1.0
+
+_BUDGET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL
+)
+"""
+
+
+class Priority(IntEnum):
+    """Menor valor = pasa primero"""
+    QUOTES = 0
+    ACCOUNT = 1
+    JOURNAL = 2
+    BACKFILL = 3
+
+
+class RateLimitTimeout(Exception):
+    """No se obtuvo turno para el request dentro de max_wait"""
+
+
+class TokenBucket:
+    """Bucket de tokens con recarga continua (no thread-safe: lo protege el scheduler)"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait(self, now: float) -> float:
+        """Segundos hasta que haya un token (0 = disponible ya)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self._delay(self.tokens, self.blocked_until, now)
+
+    def take(self):
+        self.tokens -= 1
+
+    def block(self, delay: float):
+        """Sin tokens por delay segundos (429 del broker)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.tokens = 0.0
+
+    def _delay(self, tokens: float, blocked_until: float, now: float) -> float:
+        if now < blocked_until:
+            return blocked_until - now
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+
+class SharedBudget:
+    """
+    Estado de los buckets en SQLite, visible para todos los procesos
+
+    Reloj de pared (time.time): los monotonic de cada proceso no son
+    comparables. Las escrituras van en BEGIN IMMEDIATE (una a la vez);
+    un token tomado en una carrera deja el bucket en negativo y el
+    siguiente espera más, así que el ritmo sostenido no se pasa del límite.
+    Hace I/O: el scheduler lo llama fuera de su lock (y fuera del event loop).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUDGET_LOCK_TIMEOUT,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_BUDGET_SCHEMA)
+
+    def states(self, limits: Dict[str, Tuple[float, int]]) -> Dict[str, Tuple[float, float, float]]:
+        """{bucket: (tokens recargados, blocked_until, ahora)} en una sola consulta"""
+        with self._lock:
+            return self._states(limits)
+
+    def take(self, limits: Dict[str, Tuple[float, int]]):
+        """Un token de cada bucket, en una transacción"""
+        with self._lock, self._transaction():
+            for name, (tokens, blocked_until, now) in self._states(limits).items():
+                self._save(name, tokens - 1, now, blocked_until)
+
+    def block(self, name: str, rate: float, capacity: int, delay: float):
+        with self._lock, self._transaction():
+            _, blocked_until, now = self._states({name: (rate, capacity)})[name]
+            self._save(name, 0.0, now, max(blocked_until, now + delay))
+
+    def _states(self, limits: Dict[str, Tuple[float, int]]) -> Dict[str, Tuple[float, float, float]]:
+        names = list(limits)
+        rows = self._conn.execute(
+            f"SELECT name, tokens, updated, blocked_until FROM buckets "
+            f"WHERE name IN ({','.join('?' * len(names))})", names).fetchall()
+        now = time.time()
+        states = {name: (float(capacity), 0.0, now) for name, (_, capacity) in limits.items()}
+        for name, tokens, updated, blocked_until in rows:
+            rate, capacity = limits[name]
+            states[name] = (min(capacity, tokens + max(0.0, now - updated) * rate), blocked_until, now)
+        return states
+
+    def _save(self, name: str, tokens: float, updated: float, blocked_until: float):
+        self._conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated, blocked_until) "
+                           "VALUES (?, ?, ?, ?)", (name, tokens, updated, blocked_until))
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket que se alinea con un SharedBudget en cada poll
+
+    Sin I/O propio: el scheduler lee el estado compartido fuera del lock
+    y lo aplica aquí (apply); los tokens tomados localmente y todavía no
+    confirmados en el archivo (pending) se descuentan. Si el archivo
+    falla, sigue funcionando con el cupo del proceso.
+    """
+
+    def __init__(self, rate: float, capacity: int, name: str):
+        super().__init__(rate, capacity)
+        self.name = name
+        self.pending = 0
+
+    def apply(self, state: Tuple[float, float, float], now: float):
+        """Estado compartido (tokens, blocked_until, reloj de pared) leído recién"""
+        tokens, blocked_until, wall = state
+        self.tokens = tokens - self.pending
+        self.updated = now
+        if blocked_until > wall:
+            self.blocked_until = max(self.blocked_until, now + blocked_until - wall)
+
+    def take(self):
+        super().take()
+        self.pending += 1
+
+    def committed(self):
+        self.pending = max(0, self.pending - 1)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    broker: str = field(compare=False)
+    endpoint: Optional[str] = field(compare=False)
+    enqueued: float = field(compare=False)
+
+
+@dataclass
+class _PriorityStats:
+    requests: int = 0
+    waited: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    timeouts: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'waited': self.waited,
+            'avg_wait_ms': round(self.wait_total / self.requests * 1000, 1) if self.requests else 0.0,
+            'max_wait_ms': round(self.wait_max * 1000, 1),
+            'timeouts': self.timeouts,
+        }
+
+
+class RequestScheduler:
+    """Token buckets por broker/endpoint con cola por prioridad"""
+
+    def __init__(self, broker_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 endpoint_limits: Optional[Dict[Tuple[str, str], Tuple[float, int]]] = None,
+                 max_wait: float = MAX_WAIT_SECONDS, budget_path: Optional[str] = None):
+        """
+        Args:
+            broker_limits: {broker: (req/s, ráfaga)} (default BROKER_LIMITS);
+                           brokers sin límite no esperan nunca
+            endpoint_limits: {(broker, endpoint): (req/s, ráfaga)} (default ENDPOINT_LIMITS)
+            max_wait: Espera máxima por request antes de RateLimitTimeout
+            budget_path: Archivo SQLite del cupo compartido entre procesos
+                         (None = cupo solo de este proceso)
+        """
+        broker_limits = BROKER_LIMITS if broker_limits is None else broker_limits
+        endpoint_limits = ENDPOINT_LIMITS if endpoint_limits is None else endpoint_limits
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self.budget = self._open_budget(budget_path) if budget_path else None
+        self._buckets = {broker: self._bucket(broker, limit)
+                         for broker, limit in broker_limits.items()}
+        self._endpoint_buckets = {key: self._bucket('/'.join(key), limit)
+                                  for key, limit in endpoint_limits.items()}
+        # Buckets compartidos que mira un poll del broker (se leen en una consulta)
+        self._shared: Dict[str, List[SharedTokenBucket]] = {
+            broker: [b for b in [bucket] + [eb for (br, _), eb in self._endpoint_buckets.items()
+                                            if br == broker]
+                     if isinstance(b, SharedTokenBucket)]
+            for broker, bucket in self._buckets.items()}
+        self._waiters: Dict[str, List[_Waiter]] = {broker: [] for broker in self._buckets}
+        self._stats: Dict[Tuple[str, Priority], _PriorityStats] = {}
+        self._throttled: Dict[str, int] = {}
+        self._budget_failed = False
+
+    @staticmethod
+    def _open_budget(path: str) -> Optional[SharedBudget]:
+        try:
+            return SharedBudget(path)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠ Cupo compartido {path} no disponible ({e}): cupo por proceso")
+            return None
+
+    def _bucket(self, name: str, limit: Tuple[float, int]) -> TokenBucket:
+        if self.budget is None:
+            return TokenBucket(*limit)
+        return SharedTokenBucket(*limit, name=name)
+
+    def acquire(self, broker: str, endpoint: Optional[str] = None,
+                priority: Priority = Priority.JOURNAL) -> float:
+        """
+        Bloquea el thread hasta tener turno para un request
+
+        Returns:
+            Segundos esperados
+
+        Raises:
+            RateLimitTimeout: Sin turno en max_wait segundos
+        """
+        start = time.monotonic()
+        with closing(self._turns(broker, endpoint, priority)) as turns:
+            result = None
+            while True:
+                try:
+                    step = turns.send(result)
+                except StopIteration:
+                    break
+                if callable(step):
+                    result = step()
+                else:
+                    time.sleep(step)
+                    result = None
+        return time.monotonic() - start
+
+    async def acquire_async(self, broker: str, endpoint: Optional[str] = None,
+                            priority: Priority = Priority.JOURNAL) -> float:
+        """Ver acquire (espera y I/O del cupo compartido sin bloquear el event loop)"""
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        with closing(self._turns(broker, endpoint, priority)) as turns:
+            result = None
+            while True:
+                try:
+                    step = turns.send(result)
+                except StopIteration:
+                    break
+                if callable(step):
+                    result = await loop.run_in_executor(None, step)
+                else:
+                    await asyncio.sleep(step)
+                    result = None
+        return time.monotonic() - start
+
+    def throttled(self, broker: str, retry_after: Optional[float] = None):
+        """
+        Registra un 429: nadie sale hacia el broker hasta retry_after segundos
+        (en todos los procesos si el cupo es compartido)
+
+        Args:
+            retry_after: Header Retry-After en segundos (None = DEFAULT_RETRY_AFTER)
+        """
+        delay = DEFAULT_RETRY_AFTER if retry_after is None else retry_after
+        with self._lock:
+            self._throttled[broker] = self._throttled.get(broker, 0) + 1
+            bucket = self._buckets.get(broker)
+            if bucket:
+                bucket.block(delay)
+        logger.warning(f"⚠ 429 de {broker}: requests pausados {delay:.1f}s")
+
+        if isinstance(bucket, SharedTokenBucket):
+            share = partial(self._share_block, bucket, delay)
+            try:
+                # Desde el event loop: el write al archivo va a un thread
+                asyncio.get_running_loop().run_in_executor(None, share)
+            except RuntimeError:
+                share()
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Métricas de cola por broker (en cola ahora, 429s) y por prioridad"""
+        with self._lock:
+            result = {}
+            for broker in self._buckets:
+                result[broker] = {
+                    'shared': isinstance(self._buckets[broker], SharedTokenBucket),
+                    'queued': len(self._waiters[broker]),
+                    'throttled': self._throttled.get(broker, 0),
+                    'priorities': {priority.name.lower(): stats.to_dict()
+                                   for (b, priority), stats in sorted(self._stats.items())
+                                   if b == broker},
+                }
+            return result
+
+    def _turns(self, broker: str, endpoint: Optional[str],
+               priority: Priority) -> Generator[Union[float, Callable[[], Any]], Any, None]:
+        """
+        Pasos hasta obtener el turno (termina con el token tomado)
+
+        Cede demoras a dormir (float) o I/O del cupo compartido (callable,
+        el driver devuelve su resultado con send): acquire lo corre en el
+        thread, acquire_async en el executor. Bajo self._lock solo hay
+        cálculo en memoria.
+        """
+        if broker not in self._buckets:
+            return
+        now = time.monotonic()
+        waiter = _Waiter(priority, next(self._seq), broker, endpoint, now)
+        deadline = now + self.max_wait
+        shared = self._shared[broker]
+        taken: List[SharedTokenBucket] = []
+        with self._lock:
+            self._waiters[broker].append(waiter)
+        try:
+            while True:
+                state = (yield partial(self._read_budget, shared)) if shared else None
+                with self._lock:
+                    now = time.monotonic()
+                    for bucket in shared if state else []:
+                        bucket.apply(state[bucket.name], now)
+                    delay = self._poll(waiter, now)
+                    if delay <= 0:
+                        self._record(waiter, now - waiter.enqueued)
+                        taken = [b for b in self._waiter_buckets(waiter)
+                                 if isinstance(b, SharedTokenBucket)]
+                        break
+                    if now + delay > deadline:
+                        self._stats_for(waiter).timeouts += 1
+                        raise RateLimitTimeout(
+                            f"{broker}/{endpoint or '*'}: sin turno en {self.max_wait:.0f}s")
+                yield delay
+            if taken:
+                yield partial(self._commit_take, taken)
+                taken = []
+        finally:
+            with self._lock:
+                if waiter in self._waiters[broker]:
+                    self._waiters[broker].remove(waiter)
+                # Commit interrumpido (ej. cancelación): el token queda solo local
+                for bucket in taken:
+                    bucket.committed()
+
+    def _read_budget(self, buckets: List[SharedTokenBucket]) -> Optional[Dict]:
+        """Estado compartido de los buckets (None si el archivo falla: cupo local)"""
+        try:
+            return self.budget.states({b.name: (b.rate, b.capacity) for b in buckets})
+        except sqlite3.Error as e:
+            self._budget_error(e)
+            return None
+
+    def _commit_take(self, buckets: List[SharedTokenBucket]):
+        """Confirma en el archivo los tokens tomados por un turno (una transacción)"""
+        try:
+            self.budget.take({b.name: (b.rate, b.capacity) for b in buckets})
+        except sqlite3.Error as e:
+            self._budget_error(e)
+        finally:
+            with self._lock:
+                for bucket in buckets:
+                    bucket.committed()
+
+    def _share_block(self, bucket: SharedTokenBucket, delay: float):
+        try:
+            self.budget.block(bucket.name, bucket.rate, bucket.capacity, delay)
+        except sqlite3.Error as e:
+            self._budget_error(e)
+
+    def _budget_error(self, error: sqlite3.Error):
+        if not self._budget_failed:
+            logger.warning(f"⚠ Cupo compartido {self.budget.path} no disponible ({error}): "
+                           f"usando el del proceso")
+            self._budget_failed = True
+
+    def _waiter_buckets(self, waiter: _Waiter) -> List[TokenBucket]:
+        endpoint_bucket = self._endpoint_buckets.get((waiter.broker, waiter.endpoint))
+        bucket = self._buckets[waiter.broker]
+        return [bucket, endpoint_bucket] if endpoint_bucket else [bucket]
+
+    def _poll(self, waiter: _Waiter, now: float) -> float:
+        """Toma los tokens si es el turno del waiter; si no, segundos a esperar"""
+        endpoint_bucket = self._endpoint_buckets.get((waiter.broker, waiter.endpoint))
+        if endpoint_bucket:
+            delay = endpoint_bucket.wait(now)
+            if delay > 0:
+                return delay
+
+        bucket = self._buckets[waiter.broker]
+        delay = bucket.wait(now)
+        if delay > 0:
+            return delay
+
+        # Hay token: pasa el primero (prioridad, llegada) cuyo endpoint también tenga
+        ahead = any(other < waiter and self._endpoint_ready(other, now)
+                    for other in self._waiters[waiter.broker])
+        if ahead:
+            return POLL_INTERVAL
+
+        bucket.take()
+        if endpoint_bucket:
+            endpoint_bucket.take()
+        self._waiters[waiter.broker].remove(waiter)
+        return 0.0
+
+    def _endpoint_ready(self, waiter: _Waiter, now: float) -> bool:
+        bucket = self._endpoint_buckets.get((waiter.broker, waiter.endpoint))
+        return bucket is None or bucket.wait(now) <= 0
+
+    def _stats_for(self, waiter: _Waiter) -> _PriorityStats:
+        key = (waiter.broker, Priority(waiter.priority))
+        if key not in self._stats:
+            self._stats[key] = _PriorityStats()
+        return self._stats[key]
+
+    def _record(self, waiter: _Waiter, waited: float):
+        stats = self._stats_for(waiter)
+        stats.requests += 1
+        if waited > POLL_INTERVAL:
+            stats.waited += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Header Retry-After en segundos (None si falta o es una fecha)"""
+    value = headers.get('Retry-After') if headers else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_seconds(headers, consecutive: int) -> float:
+    """
+    Pausa de un loop de polling tras su 429 número `consecutive` seguido
+
+    Al menos Retry-After; sin header (o si es menor), DEFAULT_RETRY_AFTER
+    duplicado por cada 429 seguido, hasta MAX_BACKOFF_SECONDS.
+    """
+    exponential = min(MAX_BACKOFF_SECONDS, DEFAULT_RETRY_AFTER * 2 ** max(0, consecutive - 1))
+    return max(retry_after_seconds(headers) or 0.0, exponential)
+
+
+def scheduled_get(session, broker: str, endpoint: Optional[str], url: str,
+                  priority: Priority = Priority.JOURNAL, **kwargs):
+    """
+    GET con turno del scheduler compartido
+
+    session es un requests.Session (usa session.get) o un callable
+    get(url, **kwargs) que devuelve la respuesta.
+
+    Un 429 pausa al broker y se reintenta una vez (el reintento espera
+    su turno como cualquier otro request); el caller hace
+    raise_for_status como siempre.
+
+    Raises:
+        RateLimitTimeout: Sin turno en max_wait segundos
+    """
+    get = session if callable(session) else session.get
+    scheduler = get_scheduler()
+    for _ in range(2):
+        scheduler.acquire(broker, endpoint, priority)
+        response = get(url, **kwargs)
+        if response.status_code != 429:
+            return response
+        scheduler.throttled(broker, retry_after_seconds(response.headers))
+        if kwargs.get('stream'):
+            response.close()    # libera la conexión antes del reintento
+    return response
+
+
+def default_budget_path() -> Optional[str]:
+    """hub/request_budget.db, o TRADEPLUS_RATE_LIMIT_DB ('' = cupo por proceso)"""
+    path = os.getenv('TRADEPLUS_RATE_LIMIT_DB')
+    if path is not None:
+        return path or None
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        DEFAULT_BUDGET_FILE)
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """
+    Scheduler compartido por todo el proceso (se crea al primer uso), con
+    el cupo de default_budget_path() compartido con los demás procesos
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler(budget_path=default_budget_path())
+        return _default_scheduler
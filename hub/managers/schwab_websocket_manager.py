@@ -6,7 +6,7 @@ import requests
 import uuid
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -14,8 +14,12 @@ logger = logging.getLogger(__name__)
 # Importar el gestor de tokens
 try:
     from .schwab_token_manager import SchwabTokenManager
+    from .request_scheduler import Priority, scheduled_get
+    from .quote_cache import QuoteCache, get_quote_cache
 except ImportError:
     from schwab_token_manager import SchwabTokenManager
+    from request_scheduler import Priority, scheduled_get
+    from quote_cache import QuoteCache, get_quote_cache
 
 
 class SchwabWebSocketManager:
@@ -29,7 +33,16 @@ class SchwabWebSocketManager:
     4. Recibir datos privados en tiempo real <50ms
     """
 
-    def __init__(self, config_path: str = "."):
+    def __init__(self, config_path: str = ".", symbols: Optional[list] = None,
+                 on_tick: Optional[Callable[[str, float], Any]] = None,
+                 quote_cache: Optional[QuoteCache] = None):
+        """
+        Args:
+            config_path: ruta a carpeta con current_token.json
+            symbols: símbolos a suscribir (LEVELONE_EQUITIES) al terminar el LOGIN
+            on_tick: callback(symbol, last_price) por cada precio (puede ser async)
+            quote_cache: cache donde se guarda cada precio (default el compartido)
+        """
         self.config_path = Path(config_path)
         self.token_file = self.config_path / "current_token.json"
         self.ws = None
@@ -38,7 +51,11 @@ class SchwabWebSocketManager:
         self.streamer_info: Dict[str, Any] = {}
         self.access_token: Optional[str] = None
         self.base_url = "https://api.schwabapi.com/trader"
+        self.session = requests.Session()
         self.request_id = 1
+        self.symbols = symbols or []
+        self.on_tick = on_tick
+        self.quote_cache = quote_cache or get_quote_cache()
         
         # Inicializar el gestor de tokens
         self.token_manager: Optional[SchwabTokenManager] = None
@@ -134,7 +151,8 @@ class SchwabWebSocketManager:
             }
 
             logger.info(f"→ GET {url}")
-            response = requests.get(url, headers=headers, timeout=10)
+            response = scheduled_get(self.session, "schwab", "user_preference", url, Priority.ACCOUNT,
+                                     headers=headers, timeout=10)
             logger.info(f"← Status: {response.status_code}")
 
             # 3️⃣ Manejar diferentes códigos de estado
@@ -147,7 +165,8 @@ class SchwabWebSocketManager:
                     
                     # Reintentar una sola vez
                     headers["Authorization"] = f"Bearer {self.access_token}"
-                    response = requests.get(url, headers=headers, timeout=10)
+                    response = scheduled_get(self.session, "schwab", "user_preference", url,
+                                             Priority.ACCOUNT, headers=headers, timeout=10)
                     logger.info(f"← Reintento - Status: {response.status_code}")
                 else:
                     logger.error("✗ No hay token manager para renovar")
@@ -191,13 +210,10 @@ class SchwabWebSocketManager:
         Ahora con renovación automática de tokens integrada
         """
         try:
-            # 1️⃣ Asegurar token válido (con renovación automática si es necesario)
-            if not self._ensure_valid_token():
-                logger.error("✗ Fallo: token no válido")
-                return False
-
-            # 2️⃣ Obtener streamer info (también con renovación automática)
-            if not self._get_streamer_info():
+            # 1️⃣-2️⃣ Token válido + streamer info: HTTP sync (renovación, turno
+            # del scheduler), en un thread para no frenar el event loop
+            loop = asyncio.get_running_loop()
+            if not await loop.run_in_executor(None, self._get_streamer_info):
                 logger.error("✗ Fallo: streamer_info no obtenido")
                 return False
 
@@ -264,6 +280,10 @@ class SchwabWebSocketManager:
                     self.connected = False
                     return False
 
+                # Suscripción a precios antes de quedar escuchando
+                if self.symbols:
+                    await self.subscribe_level_one(self.symbols)
+
                 # Iniciar recepción de datos
                 await self._receive_loop()
                 return True
@@ -286,6 +306,7 @@ class SchwabWebSocketManager:
                         self.ticks_received += 1
                         msg_str = json.dumps(data)[:150]
                         logger.info(f"[TICK REAL #{self.ticks_received}] {msg_str}...")
+                        await self._emit_ticks(data)
 
                 except asyncio.TimeoutError:
                     continue
@@ -301,6 +322,30 @@ class SchwabWebSocketManager:
             self.connected = False
             logger.info("Loop de recepción finalizado")
 
+    async def _emit_ticks(self, data: Dict[str, Any]):
+        """Guarda los last price de LEVELONE_EQUITIES en el QuoteCache y los entrega a on_tick"""
+        for item in data.get("data", []):
+            if item.get("service") != "LEVELONE_EQUITIES":
+                continue
+            for content in item.get("content", []):
+                # Campo 3 = Last Price (solo viene si cambió)
+                symbol, last = content.get("key"), content.get("3")
+                if not symbol:
+                    continue
+                if last is None:
+                    self.quote_cache.touch(symbol)
+                    continue
+                try:
+                    price = float(last)
+                    self.quote_cache.update(symbol, price)
+                    if self.on_tick is None:
+                        continue
+                    result = self.on_tick(symbol, price)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    logger.error(f"✗ Error en on_tick {symbol}: {e}")
+
     async def subscribe_level_one(self, symbols: list) -> bool:
         """Suscribirse a LEVELONE_EQUITIES (precios reales)"""
         try:
@@ -32,9 +32,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Importar journal manager
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'hub')))
-from journal.journal_manager import JournalManager
+# Importar journal manager (siempre como hub.*: un solo scheduler y un solo
+# quote cache por proceso). hub/ va al final del path, solo para los
+# imports legacy de los token managers (hub/hub.py taparía el paquete)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'hub')))
+from hub.journal.journal_manager import JournalManager
+from hub.journal.records import metrics_to_dict
+from hub.journal.trades_query import DEFAULT_PAGE_SIZE, TradeIndex
+from hub.journal.parallel_fifo import shutdown_pool
+from hub.journal.async_http import close_session
+from hub.managers.request_scheduler import get_scheduler
+from hub.managers.quote_cache import get_quote_cache
 
 # ========================================================================
 # FASTAPI APP
@@ -62,6 +70,9 @@ app.add_middleware(
 class JournalCache:
     """Cache global actualizado en background"""
     
+    WINDOWS = [7, 30, 90]
+    BROKERS = ['all', 'schwab', 'coinbase']
+    
     def __init__(self):
         self.cache: Dict[str, Dict] = {
             'all_7': None,
@@ -75,8 +86,17 @@ class JournalCache:
             'coinbase_90': None,
         }
         self.last_update = None
-        self.manager = JournalManager(capital_initial=5000.0)
+        # FIFO en procesos solo para imports grandes (TRADEPLUS_PARALLEL_FIFO=1)
+        # Adapters requests en el executor; aiohttp con TRADEPLUS_ASYNC_ADAPTERS=1
+        # (opt-in: token/JWT y commits al store todavía son sync en el loop)
+        self.manager = JournalManager(
+            capital_initial=5000.0,
+            parallel_fifo=os.getenv('TRADEPLUS_PARALLEL_FIFO', '0') == '1',
+            async_adapters=os.getenv('TRADEPLUS_ASYNC_ADAPTERS', '0') == '1'
+        )
         self.updating = False
+        # Índices de orden por ventana, rearmados cuando cambia su lista de trades
+        self.trade_indexes: Dict[str, TradeIndex] = {}
         
     async def update_all(self):
         """Actualizar todo el cache"""
@@ -89,12 +109,14 @@ class JournalCache:
             logger.info("🔄 Actualizando cache...")
             start = datetime.now()
             
-            # Actualizar cada período en paralelo
-            tasks = []
-            for days in [7, 30, 90]:
-                tasks.append(self._update_period(days))
-            
-            await asyncio.gather(*tasks)
+            # Una sola pasada: fetch de ambos brokers concurrente en el event loop
+            # (adapters async) + un FIFO para todas las ventanas
+            results = await self.manager.get_journal_multi_async(
+                windows=self.WINDOWS,
+                brokers=self.BROKERS,
+                as_records=True   # Los 9 slices comparten TradeRecords del ledger
+            )
+            self.cache.update(results)
             
             self.last_update = datetime.now()
             elapsed = (datetime.now() - start).total_seconds()
@@ -105,42 +127,40 @@ class JournalCache:
         finally:
             self.updating = False
     
-    async def _update_period(self, days: int):
-        """Actualizar un período específico"""
-        try:
-            # Ejecutar en thread pool para no bloquear event loop
-            loop = asyncio.get_event_loop()
-            
-            # Combinado (all)
-            all_data = await loop.run_in_executor(
-                None, 
-                lambda: self.manager.get_combined_journal(days=days)
-            )
-            self.cache[f'all_{days}'] = all_data
-            
-            # Schwab
-            schwab_data = await loop.run_in_executor(
-                None,
-                lambda: self.manager.get_trades_by_broker('schwab', days=days)
-            )
-            self.cache[f'schwab_{days}'] = schwab_data
-            
-            # Coinbase
-            coinbase_data = await loop.run_in_executor(
-                None,
-                lambda: self.manager.get_trades_by_broker('coinbase', days=days)
-            )
-            self.cache[f'coinbase_{days}'] = coinbase_data
-            
-            logger.info(f"  ✓ Período {days}d actualizado")
-            
-        except Exception as e:
-            logger.error(f"❌ Error en período {days}d: {e}")
+    def get(self, broker: str, days: int, include_trades: bool = False) -> Optional[Dict]:
+        """
+        Obtener datos del cache (records → dicts solo al responder)
+        
+        Por defecto es el resumen sin la lista de trades (paginada aparte
+        en /api/journal/trades); include_trades=True para clientes antiguos.
+        """
+        key = f'{broker}_{days}'
+        data = self.cache.get(key)
+        return metrics_to_dict(data, include_trades=include_trades) if data else None
     
-    def get(self, broker: str, days: int) -> Optional[Dict]:
-        """Obtener datos del cache"""
+    def query_trades(self, broker: str, days: int, **kwargs) -> Optional[Dict]:
+        """Página de trades de una ventana del cache (ver trades_query.query_trades)"""
         key = f'{broker}_{days}'
-        return self.cache.get(key)
+        data = self.cache.get(key)
+        if not data:
+            return None
+        trades = data.get('trades', [])
+        index = self.trade_indexes.get(key)
+        if index is None or index.records is not trades:
+            # Snapshot nuevo (update_all sin memo): se ordena una vez por campo
+            index = self.trade_indexes[key] = TradeIndex(trades)
+        return index.query(**kwargs)
+    
+    async def on_price(self, symbol: str, price: float):
+        """
+        Tick de precio (WebSocket de broker) → P&L no realizado del símbolo
+        
+        O(1) sobre la tabla de posiciones abiertas; se empuja a /ws/journal
+        sin recalcular el journal ni volver a pedir quotes por REST.
+        """
+        update = self.manager.on_price(symbol, price)
+        if update:
+            await manager.broadcast({'type': 'unrealized', **update})
 
 # Instancia global del cache
 cache = JournalCache()
@@ -164,6 +184,36 @@ async def update_cache_loop():
             logger.error(f"❌ Error en update loop: {e}")
             await asyncio.sleep(2)
 
+async def tick_stream_loop(broker: str):
+    """
+    Mantiene un WebSocket de precios para las posiciones abiertas del broker
+    
+    Se suscribe a los símbolos abiertos tras el primer update del cache y
+    reconecta si la conexión se cae (la lista se refresca en cada intento).
+    """
+    while True:
+        try:
+            table = cache.manager.live_positions
+            symbols = table.symbols(broker) if table else []
+            if not symbols:
+                await asyncio.sleep(5)
+                continue
+            
+            if broker == 'coinbase':
+                from hub.managers.coinbase_websocket_manager import CoinbaseWebSocketManager
+                ws_manager = CoinbaseWebSocketManager(config_path="hub", product_ids=symbols,
+                                                      on_tick=cache.on_price)
+            else:
+                from hub.managers.schwab_websocket_manager import SchwabWebSocketManager
+                ws_manager = SchwabWebSocketManager(config_path="hub", symbols=symbols,
+                                                    on_tick=cache.on_price)
+            
+            logger.info(f"📡 Tick stream {broker}: {len(symbols)} símbolos")
+            await ws_manager.connect()  # Bloquea mientras la conexión viva
+        except Exception as e:
+            logger.error(f"❌ Error en tick stream {broker}: {e}")
+        await asyncio.sleep(5)
+
 @app.on_event("startup")
 async def startup_event():
     """Iniciar background tasks al arrancar"""
@@ -174,8 +224,19 @@ async def startup_event():
     # Crear task para actualizar cache
     asyncio.create_task(update_cache_loop())
     
+    # P&L no realizado por tick (TRADEPLUS_TICK_STREAM=1)
+    if os.getenv('TRADEPLUS_TICK_STREAM', '0') == '1':
+        for broker in ('schwab', 'coinbase'):
+            asyncio.create_task(tick_stream_loop(broker))
+    
     logger.info("✅ Server listo")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cerrar el pool de procesos del FIFO paralelo (si se usó) y el pool HTTP async"""
+    shutdown_pool()
+    await close_session()
+
 # ========================================================================
 # WEBSOCKET ENDPOINTS
 # ========================================================================
@@ -217,9 +278,14 @@ async def websocket_journal(websocket: WebSocket):
     WebSocket principal - Envía updates automáticos
     
     Protocolo:
-    - Cliente envía: {"broker": "all"|"schwab"|"coinbase", "days": 7|30|90}
-    - Server responde: JSON con datos completos del journal
+    - Cliente envía: {"broker": "all"|"schwab"|"coinbase", "days": 7|30|90,
+      "include_trades": false}
+    - Server responde: JSON con el resumen del journal (stats, posiciones,
+      evolución); la lista de trades solo si include_trades=true, si no se
+      pide paginada a /api/journal/trades
     - Server push: Cada 5s mientras el cache se actualice
+    - Server push: {"type": "unrealized", "symbol", "broker", "position", "totals"}
+      en cada tick de precio de una posición abierta (TRADEPLUS_TICK_STREAM=1)
     """
     await manager.connect(websocket)
     
@@ -227,6 +293,7 @@ async def websocket_journal(websocket: WebSocket):
         # Configuración inicial
         current_broker = 'all'
         current_days = 30
+        include_trades = False
         
         # Enviar datos iniciales
         initial_data = cache.get(current_broker, current_days)
@@ -248,11 +315,13 @@ async def websocket_journal(websocket: WebSocket):
                     current_broker = message['broker']
                 if 'days' in message:
                     current_days = int(message['days'])
+                if 'include_trades' in message:
+                    include_trades = bool(message['include_trades'])
                 
                 logger.info(f"📡 Cliente solicitó: {current_broker} / {current_days}d")
                 
                 # Enviar datos actualizados
-                data = cache.get(current_broker, current_days)
+                data = cache.get(current_broker, current_days, include_trades)
                 if data:
                     await websocket.send_json({
                         'type': 'update',
@@ -264,7 +333,7 @@ async def websocket_journal(websocket: WebSocket):
                 
             except asyncio.TimeoutError:
                 # Timeout - enviar update periódico
-                data = cache.get(current_broker, current_days)
+                data = cache.get(current_broker, current_days, include_trades)
                 if data:
                     await websocket.send_json({
                         'type': 'periodic',
@@ -285,41 +354,159 @@ async def websocket_journal(websocket: WebSocket):
 # ========================================================================
 
 @app.get("/api/journal")
-async def get_journal(days: int = 30):
-    """GET /api/journal?days=30 - Journal combinado"""
+async def get_journal(days: int = 30, include_trades: bool = False):
+    """GET /api/journal?days=30 - Journal combinado (resumen, ver include_trades)"""
     logger.info(f"📊 GET /api/journal?days={days}")
     
-    data = cache.get('all', days)
+    data = cache.get('all', days, include_trades)
     if data:
         return JSONResponse(content=data)
     
     # Fallback: computar en el momento
     logger.warning(f"⚠️ Cache miss, computando {days}d...")
     try:
-        result = cache.manager.get_combined_journal(days=days)
-        return JSONResponse(content=result)
+        # En el executor: el fetch sync puede esperar un sync async en vuelo
+        # (update_all), que necesita el event loop libre
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: cache.manager.get_combined_journal(days=days)
+        )
+        # Copia: el resultado es el objeto memorizado del manager (no modificar)
+        return JSONResponse(content=metrics_to_dict(result, include_trades=include_trades))
     except Exception as e:
         logger.error(f"❌ Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/journal/broker/{broker}")
-async def get_journal_by_broker(broker: str, days: int = 7):
+async def get_journal_by_broker(broker: str, days: int = 7, include_trades: bool = False):
     """GET /api/journal/broker/schwab?days=7"""
     logger.info(f"📊 GET /api/journal/broker/{broker}?days={days}")
     
-    data = cache.get(broker, days)
+    data = cache.get(broker, days, include_trades)
     if data:
         return JSONResponse(content=data)
     
     # Fallback
     logger.warning(f"⚠️ Cache miss, computando {broker} {days}d...")
     try:
-        result = cache.manager.get_trades_by_broker(broker, days=days)
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: cache.manager.get_trades_by_broker(broker, days=days)
+        )
+        return JSONResponse(content=metrics_to_dict(result, include_trades=include_trades))
+    except Exception as e:
+        logger.error(f"❌ Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/journal/trades")
+async def get_journal_trades(broker: str = 'all', days: int = 90,
+                             sort: str = 'datetime', order: str = 'desc',
+                             cursor: Optional[str] = None,
+                             start_row: Optional[int] = None, end_row: Optional[int] = None,
+                             limit: int = DEFAULT_PAGE_SIZE,
+                             symbol: Optional[str] = None, side: Optional[str] = None,
+                             date_from: Optional[str] = None, date_to: Optional[str] = None):
+    """
+    GET /api/journal/trades?broker=all&days=90&sort=pl_usd&order=desc&limit=100
+    
+    Trades paginados con orden y filtros en servidor:
+    - Cursor: pasar next_cursor de la respuesta anterior
+    - Ag-Grid (server-side / infinite): start_row/end_row del request de
+      getRows; last_row de la respuesta es el total filtrado
+    - Filtros: symbol y side (varios separados por coma), date_from/date_to
+    """
+    logger.info(f"📄 GET /api/journal/trades?broker={broker}&days={days}&sort={sort}")
+    
+    if broker not in JournalCache.BROKERS or days not in JournalCache.WINDOWS:
+        raise HTTPException(status_code=400,
+                            detail=f"broker/days inválidos (usar {JournalCache.BROKERS} / {JournalCache.WINDOWS})")
+    if start_row is not None and end_row is not None:
+        limit = end_row - start_row
+    try:
+        result = cache.query_trades(
+            broker, days,
+            sort=sort, descending=order.lower() != 'asc',
+            cursor=cursor, start_row=start_row, limit=limit,
+            symbol=symbol, side=side, date_from=date_from, date_to=date_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if result is None:
+        raise HTTPException(status_code=503, detail=f"Journal {broker}/{days}d aún no está en cache")
+    return JSONResponse(content=result)
+
+@app.get("/api/journal/equity")
+async def get_journal_equity(broker: str = 'all', days: Optional[int] = None,
+                             max_points: Optional[int] = 500):
+    """GET /api/journal/equity?broker=all&days=30 - Curva de equity y drawdown"""
+    logger.info(f"📈 GET /api/journal/equity?broker={broker}&days={days}")
+    
+    try:
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: cache.manager.equity_curve(broker, days=days, max_points=max_points)
+        )
         return JSONResponse(content=result)
     except Exception as e:
         logger.error(f"❌ Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/journal/rolling")
+async def get_journal_rolling(broker: str = 'all', window_ops: Optional[int] = None,
+                              window_days: Optional[float] = None, days: Optional[int] = None,
+                              max_points: Optional[int] = 500):
+    """
+    GET /api/journal/rolling?broker=all&window_ops=50 (o window_days=30)
+    
+    Win rate, profit factor y expectancy móviles para los gráficos de tendencia
+    """
+    logger.info(f"📈 GET /api/journal/rolling?broker={broker}&window_ops={window_ops}"
+                f"&window_days={window_days}")
+    
+    if window_ops is None and window_days is None:
+        window_ops = 50
+    try:
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: cache.manager.rolling_metrics(broker, window_ops, window_days,
+                                                  days=days, max_points=max_points)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return JSONResponse(content=result)
+
+@app.get("/api/journal/analytics")
+async def get_journal_analytics(by: str = 'symbol', broker: str = 'all',
+                                days: Optional[int] = None, tz: Optional[str] = None):
+    """
+    GET /api/journal/analytics?by=hour&broker=all&days=90&tz=America/New_York
+    
+    Desglose de ops cerradas (win rate, profit factor, P&L promedio, count)
+    por symbol, broker, hour, weekday o holding (tiempo de tenencia)
+    """
+    logger.info(f"📊 GET /api/journal/analytics?by={by}&broker={broker}&days={days}")
+    
+    try:
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: cache.manager.analytics(by, broker, days=days, tz=tz)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return JSONResponse(content=result)
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -327,7 +514,10 @@ async def health_check():
         'status': 'ok',
         'version': '5.1.0',
         'cache_last_update': cache.last_update.isoformat() if cache.last_update else None,
-        'cache_updating': cache.updating
+        'cache_updating': cache.updating,
+        'metrics_memo': cache.manager.metrics_memo.stats(),
+        'request_scheduler': get_scheduler().metrics(),
+        'quote_cache': get_quote_cache().stats()
     }
 
 # ========================================================================
@@ -17,7 +17,7 @@ def main():
         print(f"{'=' * 80}\n")
         
         # Llamar al API
-        url = f"{base_url}/all/{days}"
+        url = f"{base_url}/all/{days}?include_trades=true"
         print(f"Llamando: {url}")
         
         try:
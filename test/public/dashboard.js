@@ -14,7 +14,7 @@ let dashboardData = null;
  */
 async function loadDashboardData() {
     try {
-        const response = await fetch('/api/journal');
+        const response = await fetch('/api/journal?include_trades=true');
         const data = await response.json();
         
         dashboardData = {
@@ -0,0 +1,136 @@
+"""
+Test suite para analytics - desgloses agrupados de ops cerradas
+
+Compara el group-by vectorizado contra un loop de Python sobre las
+mismas filas, y valida hora/día en zona local y el tiempo de tenencia
+calculado por el matcher.
+"""
+
+import sys
+import os
+import unittest
+from collections import defaultdict
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hub.journal.analytics import GROUP_BY, HOLDING_BUCKETS, breakdown
+from hub.journal.closed_ops_table import ClosedOpsTable
+from hub.journal.equity_curve import US_PER_DAY
+from hub.journal.fifo_ledger import FifoLedger
+from hub.journal.timestamps import to_epoch_us
+
+SYMBOLS = ['NU', 'HOOD', 'BTC-USD', 'ETH-USD']
+BROKERS = ['schwab', 'coinbase']
+TZ = 'America/New_York'
+
+
+def random_rows(n: int = 2000, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(n, dtype=ClosedOpsTable.DTYPE)
+    start = to_epoch_us(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    rows['sell_ts'] = np.sort(start + rng.integers(0, 400 * US_PER_DAY, n))
+    rows['pl_usd'] = np.round(rng.normal(1.0, 20.0, n), 2)
+    rows['cost_basis'] = rng.uniform(10, 500, n)
+    rows['holding_us'] = rng.integers(0, 500 * US_PER_DAY, n)
+    rows['symbol'] = rng.integers(0, len(SYMBOLS), n)
+    rows['broker'] = rng.integers(0, len(BROKERS), n)
+    return rows
+
+
+def naive_group(row, by: str) -> str:
+    """Grupo de una fila con datetime/zoneinfo (referencia)"""
+    if by == 'symbol':
+        return SYMBOLS[row['symbol']]
+    if by == 'broker':
+        return BROKERS[row['broker']]
+    local = datetime.fromtimestamp(int(row['sell_ts']) / 1e6, ZoneInfo(TZ))
+    if by == 'hour':
+        return f"{local.hour:02d}"
+    if by == 'weekday':
+        return ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo'][local.weekday()]
+    for label, limit in HOLDING_BUCKETS:
+        if row['holding_us'] < limit:
+            return label
+
+
+class TestBreakdown(unittest.TestCase):
+    """Group-by vectorizado vs loop de referencia"""
+
+    def test_matches_naive_loop(self):
+        rows = random_rows()
+        for by in GROUP_BY:
+            expected = defaultdict(lambda: [0, 0, 0.0])
+            for row in rows:
+                group = expected[naive_group(row, by)]
+                group[0] += 1
+                group[1] += int(row['pl_usd'] > 0)
+                group[2] += float(row['pl_usd'])
+
+            groups = breakdown(rows, by, SYMBOLS, BROKERS, tz=TZ)
+            self.assertEqual({g['group'] for g in groups}, set(expected), by)
+            for g in groups:
+                count, wins, pl = expected[g['group']]
+                self.assertEqual(g['count'], count, (by, g['group']))
+                self.assertEqual(g['wins'], wins, (by, g['group']))
+                self.assertAlmostEqual(g['pl_realized_usd'], round(pl, 2), places=2)
+                self.assertAlmostEqual(g['win_rate'], round(wins / count * 100, 2))
+            self.assertEqual(sum(g['count'] for g in groups), len(rows))
+
+        by_symbol = breakdown(rows, 'symbol', SYMBOLS, BROKERS)
+        pls = [g['pl_realized_usd'] for g in by_symbol]
+        self.assertEqual(pls, sorted(pls, reverse=True))
+
+    def test_profit_factor_and_empty(self):
+        rows = random_rows(3)
+        rows['symbol'] = 0
+        rows['pl_usd'] = [10.0, 5.0, 0.0]
+        group = breakdown(rows, 'symbol', SYMBOLS, BROKERS)[0]
+        self.assertEqual((group['wins'], group['losses']), (2, 1))
+        self.assertEqual(group['profit_factor'], 999.99)   # sin pérdidas
+        self.assertEqual(breakdown(rows[:0], 'hour', SYMBOLS, BROKERS), [])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            breakdown(random_rows(5), 'month', SYMBOLS, BROKERS)
+        with self.assertRaises(ValueError):
+            breakdown(random_rows(5), 'hour', SYMBOLS, BROKERS, tz='Mars/Olympus')
+
+
+class TestHoldingPeriod(unittest.TestCase):
+    """Tenencia promedio ponderada por qty de los lotes consumidos"""
+
+    @staticmethod
+    def fill(i: int, day: int, side: str, qty: float) -> dict:
+        return {'id': str(i), 'datetime': f"2025-02-{day:02d}T15:00:00+00:00", 'symbol': 'NU',
+                'side': side, 'quantity': qty, 'price': 10.0, 'fee': 0.0, 'broker': 'schwab'}
+
+    def test_weighted_holding(self):
+        ledger = FifoLedger()
+        ledger.sync([self.fill(0, 1, 'BUY', 1), self.fill(1, 3, 'BUY', 1),
+                     self.fill(2, 5, 'SELL', 1.5)])
+        # 1 unidad tenida 4 días + 0.5 unidades tenidas 2 días → 10/3 días
+        op = ledger.symbols['NU'].closed_operations[0]
+        self.assertAlmostEqual(op.holding_us / US_PER_DAY, 10 / 3, places=6)
+
+        groups = ledger.breakdown('holding')
+        self.assertEqual([g['group'] for g in groups], ['1d-1w'])
+        self.assertAlmostEqual(groups[0]['avg_holding_days'], 3.33)
+
+    def test_parallel_holding_matches_serial(self):
+        trades = [self.fill(0, 1, 'BUY', 1), self.fill(1, 3, 'BUY', 1), self.fill(2, 5, 'SELL', 1.5)]
+        trades += [dict(t, symbol='HOOD', id=f"h{t['id']}") for t in trades]
+        serial = FifoLedger()
+        parallel = FifoLedger(parallel_min_fills=1, max_workers=2)
+        serial.sync(trades)
+        parallel.sync(trades)
+        self.assertEqual(serial.breakdown('holding'), parallel.breakdown('holding'))
+        self.assertTrue(np.array_equal(serial.closed.data, parallel.closed.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,705 @@
+"""
+Test suite para los adapters del journal (Schwab / Coinbase)
+
+Valida la normalización de respuestas crudas al formato común y la
+sincronización incremental de fills sin credenciales ni red (los
+adapters se instancian sin __init__).
+"""
+
+import sys
+import os
+import asyncio
+import json
+import sqlite3
+import tempfile
+import operator
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hub.journal.schwab_adapter import SchwabAdapter
+from hub.journal.coinbase_adapter import CoinbaseAdapter
+from hub.journal.async_adapters import AsyncCoinbaseAdapter, AsyncSchwabAdapter
+from hub.journal.json_stream import JsonArrayDecoder, aiter_json_array, iter_json_array
+from hub.journal.timestamps import parse_epoch_us, to_epoch_us
+from hub.journal.single_flight import SingleFlight
+from hub.journal.trade_store import TradeStore
+from hub.managers import request_scheduler
+from hub.managers.request_scheduler import RequestScheduler
+
+
+SCHWAB_TX = {
+    "activityId": 106403717567,
+    "time": "2025-11-06T18:38:29+0000",
+    "type": "TRADE",
+    "status": "VALID",
+    "netAmount": 736.26,
+    "transferItems": [
+        {"instrument": {"assetType": "CURRENCY", "symbol": "CURRENCY_USD"},
+         "feeType": "COMMISSION", "amount": -0.5},
+        {"instrument": {"assetType": "EQUITY", "symbol": "ORCL"},
+         "amount": -3.0, "cost": 736.26, "price": 245.42, "positionEffect": "CLOSING"}
+    ]
+}
+
+COINBASE_FILL = {
+    "trade_id": "515e7804-eeb5-4922-b659-ab4be6dcf519",
+    "product_id": "BTC-USD",
+    "side": "buy",
+    "size": "0.00492942",
+    "price": "100823.16",
+    "commission": "2.98",
+    "trade_time": "2025-11-07T15:23:20.415658Z"
+}
+
+
+def setUpModule():
+    # Sin rate limit: los buckets se prueban en test_request_scheduler
+    request_scheduler._default_scheduler = RequestScheduler(broker_limits={}, endpoint_limits={})
+
+
+def tearDownModule():
+    request_scheduler._default_scheduler = None
+
+
+class TestNormalizers(unittest.TestCase):
+    """Formato normalizado común"""
+
+    def test_schwab_transaction(self):
+        adapter = SchwabAdapter.__new__(SchwabAdapter)
+        trade = adapter._normalize_transaction(SCHWAB_TX)
+
+        self.assertEqual(trade['id'], '106403717567')
+        self.assertEqual(trade['symbol'], 'ORCL')
+        self.assertEqual(trade['side'], 'SELL')
+        self.assertEqual(trade['quantity'], 3.0)
+        self.assertEqual(trade['fee'], 0.5)
+        self.assertEqual(trade['broker'], 'schwab')
+        self.assertEqual(trade['ts_us'], parse_epoch_us(trade['datetime']))
+
+    def test_coinbase_fill(self):
+        adapter = CoinbaseAdapter.__new__(CoinbaseAdapter)
+        trade = adapter._normalize_fill(COINBASE_FILL)
+
+        self.assertEqual(trade['symbol'], 'BTC-USD')
+        self.assertEqual(trade['side'], 'BUY')
+        self.assertEqual(trade['broker'], 'coinbase')
+        self.assertEqual(trade['ts_us'], to_epoch_us(
+            datetime(2025, 11, 7, 15, 23, 20, 415658, tzinfo=timezone.utc)))
+
+
+class TestTradeStore(unittest.TestCase):
+    """Upsert idempotente, filtros y estado de sync en SQLite"""
+
+    def setUp(self):
+        self.store = TradeStore(':memory:')
+
+    def trade(self, trade_id, ts_us, symbol='BTC-USD', status='FILLED'):
+        return {"id": trade_id, "ts_us": ts_us, "symbol": symbol, "status": status}
+
+    def test_upsert_is_idempotent(self):
+        trades = [self.trade(str(i), i * 1000) for i in range(5)]
+        self.assertEqual(self.store.commit_sync('coinbase', trades), 5)
+        self.assertEqual(self.store.commit_sync('coinbase', trades), 0)
+        self.assertEqual(self.store.count('coinbase'), 5)
+
+        # Mismo id en otro broker es otro trade
+        self.assertEqual(self.store.commit_sync('schwab', trades[:1]), 1)
+        self.assertEqual(self.store.count(), 6)
+
+    def test_changed_trade_is_rewritten(self):
+        self.store.commit_sync('coinbase', [self.trade('a', 1000, status='PENDING')])
+        self.assertEqual(self.store.commit_sync('coinbase', [self.trade('a', 1000)]), 0)
+        self.assertEqual(self.store.trades('coinbase')[0]['status'], 'FILLED')
+
+    def test_filters(self):
+        self.store.commit_sync('coinbase', [self.trade('a', 1000), self.trade('b', 3000, 'ETH-USD'),
+                                            self.trade('c', 2000)])
+        self.assertEqual([t['id'] for t in self.store.trades('coinbase')], ['b', 'c', 'a'])
+        self.assertEqual([t['id'] for t in self.store.trades(since_us=2000)], ['b', 'c'])
+        self.assertEqual([t['id'] for t in self.store.trades(symbol='BTC-USD')], ['c', 'a'])
+        self.assertEqual(self.store.trades('schwab'), [])
+
+    def test_state_roundtrip(self):
+        self.assertIsNone(self.store.get_state('coinbase'))
+        self.store.commit_sync('coinbase', [], {"watermark": None})
+        self.store.commit_sync('coinbase', [], {"watermark": [5, "x"]})
+        self.assertEqual(self.store.get_state('coinbase'), {"watermark": [5, "x"]})
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Callers concurrentes cubiertos comparten la llamada en vuelo"""
+
+    def run_threads(self, flights, calls, scopes, covers=None):
+        release = threading.Event()
+        results = {}
+
+        def fn(scope):
+            calls.append(scope)
+            release.wait(1)
+            return scope
+
+        def call(scope):
+            results[scope] = flights.do('k', lambda: fn(scope), scope, covers)
+
+        threads = [threading.Thread(target=call, args=(scope,)) for scope in scopes]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_wider_scope_covers_narrower(self):
+        flights, calls = SingleFlight(), []
+        results = self.run_threads(flights, calls, [10, 30, 20], operator.le)
+        # 30 y 20 esperan la llamada desde 10; el resultado es el del líder
+        self.assertEqual(calls, [10])
+        self.assertEqual(results, {10: 10, 30: 10, 20: 10})
+        self.assertEqual(flights.shared, 2)
+
+    def test_uncovered_scope_runs_its_own(self):
+        flights, calls = SingleFlight(), []
+        self.run_threads(flights, calls, [30, 10], operator.le)
+        self.assertEqual(calls, [30, 10])
+
+    def test_error_is_shared_and_not_cached(self):
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise requests.ConnectionError("caída simulada")
+
+        async def run():
+            return await asyncio.gather(*(flights.do_async('k', failing) for _ in range(3)),
+                                        return_exceptions=True)
+
+        errors = asyncio.run(run())
+        self.assertTrue(all(isinstance(e, requests.ConnectionError) for e in errors))
+        self.assertEqual(flights.shared, 2)
+        self.assertEqual(flights.do('k', lambda: 'ok'), 'ok')
+
+    def test_sync_call_on_event_loop_does_not_wait_for_async_leader(self):
+        flights = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.01)
+            return 'async'
+
+        async def run():
+            leader = asyncio.ensure_future(flights.do_async('k', slow))
+            await asyncio.sleep(0)
+            # Esperar al líder bloquearía el loop que lo tiene que terminar
+            own = flights.do('k', lambda: 'sync')
+            return own, await leader
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), timeout=2)), ('sync', 'async'))
+        self.assertEqual(flights.shared, 0)
+
+
+class FakeFillsAPI:
+    """Endpoint de fills paginado por cursor (más recientes primero) + /products/{id}"""
+
+    def __init__(self, fills: list):
+        self.fills = fills
+        self.calls = 0
+        self.products = []
+        self.fail_at = None
+
+    def add(self, fill: dict):
+        self.fills.insert(0, fill)
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        if '/products/' in url:
+            return self.product(url.rsplit('/', 1)[-1])
+        self.calls += 1
+        if self.fail_at == self.calls:
+            raise requests.ConnectionError("caída simulada")
+        offset = int(params.get('cursor') or 0)
+        page = self.fills[offset:offset + params['limit']]
+        more = offset + params['limit'] < len(self.fills)
+        response = type('Response', (), {})()
+        response.status_code = 200
+        response.raise_for_status = lambda: None
+        response.json = lambda: {'fills': page, 'cursor': str(offset + params['limit']) if more else ''}
+        return response
+
+    def product(self, product_id: str):
+        self.products.append(product_id)
+        response = type('Response', (), {})()
+        response.status_code = 200
+        response.raise_for_status = lambda: None
+        response.json = lambda: {'product_id': product_id, 'price': '100000',
+                                 'quote_increment': '0.01', 'base_increment': '0.0001'}
+        return response
+
+
+def coinbase_adapter(api, db_file: str) -> CoinbaseAdapter:
+    """CoinbaseAdapter sin __init__ (sin JWT real) sobre un fake"""
+    adapter = CoinbaseAdapter.__new__(CoinbaseAdapter)
+    adapter.session = api
+    adapter.jwt_manager = type('JWT', (), {'generate_jwt_for_endpoint': lambda self, **kw: 'jwt'})()
+    adapter.quote_increments = {}
+    adapter.qty_scales = {}
+    adapter._get_headers = lambda: {}
+    adapter._init_sync_state(TradeStore(db_file))
+    return adapter
+
+
+def raw_fill(i: int, when: datetime) -> dict:
+    return dict(COINBASE_FILL, trade_id=f"fill-{i}",
+                trade_time=when.strftime('%Y-%m-%dT%H:%M:%S.%fZ'))
+
+
+class TestCoinbaseSync(unittest.TestCase):
+    """Paginación por cursor + sync incremental desde el watermark"""
+
+    def setUp(self):
+        self.state_file = os.path.join(tempfile.mkdtemp(), 'trades.db')
+        now = datetime.now(timezone.utc)
+        # 250 fills, uno por hora hacia atrás (~10 días)
+        self.api = FakeFillsAPI([raw_fill(i, now - timedelta(hours=i + 1)) for i in range(250)])
+        self.next_id = 250
+
+    def make_adapter(self) -> CoinbaseAdapter:
+        return coinbase_adapter(self.api, self.state_file)
+
+    def new_fill(self):
+        self.api.add(raw_fill(self.next_id, datetime.now(timezone.utc)))
+        self.next_id += 1
+
+    def test_paginates_full_window(self):
+        adapter = self.make_adapter()
+        fills = adapter.get_fills(days=30)
+        self.assertEqual(len(fills), 250)            # más de una página de 100
+        self.assertEqual(self.api.calls, 3)
+        self.assertEqual(adapter.covered_from_us, 0)
+        self.assertEqual(adapter.watermark['trade_id'], 'fill-0')
+        ts = [f['ts_us'] for f in fills]
+        self.assertEqual(ts, sorted(ts, reverse=True))
+
+    def test_backfill_stops_at_window(self):
+        adapter = self.make_adapter()
+        self.assertEqual(len(adapter.get_fills(days=2)), 47)
+        self.assertEqual(self.api.calls, 1)          # 2 días caben en la primera página
+
+        self.assertEqual(len(adapter.get_fills(days=30)), 250)
+        self.assertEqual(self.api.calls, 4)          # completa el historial faltante
+
+    def test_incremental_single_request(self):
+        adapter = self.make_adapter()
+        adapter.get_fills(days=30)
+        calls = self.api.calls
+
+        self.new_fill()
+        self.new_fill()
+        fills = adapter.get_fills(days=30)
+        self.assertEqual(self.api.calls, calls + 1)
+        self.assertEqual(len(fills), 252)
+        self.assertEqual(adapter.watermark['trade_id'], 'fill-251')
+
+    def test_watermark_persisted(self):
+        self.make_adapter().get_fills(days=30)
+        self.new_fill()
+
+        restarted = self.make_adapter()
+        self.assertEqual(restarted.watermark['trade_id'], 'fill-0')
+        calls = self.api.calls
+        self.assertEqual(len(restarted.get_fills(days=30)), 251)
+        self.assertEqual(self.api.calls, calls + 1)
+
+    def test_error_mid_sync_keeps_state(self):
+        adapter = self.make_adapter()
+        adapter.get_fills(days=2)
+        watermark = adapter.watermark
+
+        for _ in range(150):
+            self.new_fill()
+        self.api.fail_at = self.api.calls + 2        # falla la segunda página
+        fills = adapter.get_fills(days=30)
+        self.assertEqual(len(fills), 100)            # solo lo cacheado (primera página)
+        self.assertEqual(adapter.watermark, watermark)
+
+        self.assertEqual(len(adapter.get_fills(days=30)), 400)
+
+    def test_fills_load_product_scales_once(self):
+        """La escala de cantidad no depende de get_quotes"""
+        adapter = self.make_adapter()
+        adapter.get_fills(days=30)
+        adapter.get_fills(days=30)
+        self.assertEqual(self.api.products, ['BTC-USD'])
+        self.assertEqual(adapter.qty_scales, {'BTC-USD': 10 ** 4})
+        self.assertEqual(adapter.get_decimals_for_symbol('BTC-USD'), 2)
+
+    def test_store_failure_does_not_advance_watermark(self):
+        adapter = self.make_adapter()
+        adapter.get_fills(days=30)
+        watermark = adapter.watermark
+
+        self.new_fill()
+        commit_sync = adapter.store.commit_sync
+
+        def failing(*args):
+            adapter.store.commit_sync = commit_sync
+            raise sqlite3.OperationalError("disk I/O error")
+
+        adapter.store.commit_sync = failing
+        self.assertEqual(len(adapter.get_fills(days=30)), 250)    # la ventana sale del store
+        self.assertEqual(adapter.watermark, watermark)
+
+        # El sync siguiente vuelve a pedir el fill que no se guardó
+        self.assertEqual(len(adapter.get_fills(days=30)), 251)
+        self.assertEqual(adapter.watermark['trade_id'], 'fill-250')
+
+
+class FakeProductsAPI:
+    """best_bid_ask en lote + /products/{id} con increments"""
+
+    def __init__(self, books: dict, failing_batch: bool = False):
+        self.books = books
+        self.failing_batch = failing_batch
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        with self.lock:
+            self.calls.append(url.rsplit('/', 1)[-1])
+        response = type('Response', (), {})()
+        response.status_code = 200
+        response.raise_for_status = lambda: None
+        if url.endswith('/best_bid_ask'):
+            if self.failing_batch:
+                raise requests.ConnectionError("caída simulada")
+            # Lista de tuplas (aiohttp) o dict con lista (requests)
+            ids = [v for _, v in params] if isinstance(params, list) else params['product_ids']
+            response.json = lambda: {'pricebooks': [
+                {'product_id': p, 'bids': [{'price': str(bid)}], 'asks': [{'price': str(ask)}]}
+                for p in ids if p in self.books
+                for bid, ask in [self.books[p]]]}
+        else:
+            product = url.rsplit('/', 1)[-1]
+            response.json = lambda: {'product_id': product, 'price': '7.5',
+                                     'quote_increment': '0.0001', 'base_increment': '0.01'}
+        return response
+
+
+class TestCoinbaseQuotes(unittest.TestCase):
+    """Quotes en lote; metadata de producto cacheada una vez"""
+
+    def make_adapter(self, api) -> CoinbaseAdapter:
+        adapter = CoinbaseAdapter.__new__(CoinbaseAdapter)
+        adapter.session = api
+        adapter.jwt_manager = type('JWT', (), {'generate_jwt_for_endpoint': lambda self, **kw: 'jwt'})()
+        adapter.quote_increments = {}
+        adapter.qty_scales = {}
+        adapter._flights = SingleFlight()
+        return adapter
+
+    def test_batched_mid_prices(self):
+        api = FakeProductsAPI({'BTC-USD': (100.0, 102.0), 'ETH-USD': (10.0, 10.2)})
+        adapter = self.make_adapter(api)
+
+        prices = adapter.get_quotes(['BTC-USD', 'ETH-USD', 'DOGE-USD'])
+        self.assertEqual(prices['BTC-USD'], 101.0)
+        self.assertAlmostEqual(prices['ETH-USD'], 10.1)
+        self.assertEqual(prices['DOGE-USD'], 7.5)    # sin libro: precio del producto
+        self.assertEqual(adapter.qty_scales['BTC-USD'], 100)
+        self.assertEqual(adapter.get_decimals_for_symbol('ETH-USD'), 4)
+
+        # Metadata ya cacheada: solo el request en lote (+ DOGE sin libro)
+        api.calls.clear()
+        adapter.get_quotes(['BTC-USD', 'ETH-USD', 'DOGE-USD'])
+        self.assertEqual(sorted(api.calls), ['DOGE-USD', 'best_bid_ask'])
+
+    def test_batch_failure_falls_back_per_product(self):
+        adapter = self.make_adapter(FakeProductsAPI({}, failing_batch=True))
+        prices = adapter.get_quotes(['BTC-USD', 'ETH-USD'])
+        self.assertEqual(prices, {'BTC-USD': 7.5, 'ETH-USD': 7.5})
+
+
+class TestJsonStream(unittest.TestCase):
+    """Elementos de un array JSON chunk a chunk, con cualquier corte"""
+
+    DOC = [{'id': 1, 'note': 'acción ñ €', 'qty': 12.5e-3}, [], 'x', 7, None, True, {'a': [1, {'b': '}]'}]}]
+
+    def chunked(self, text: str, size: int):
+        raw = text.encode('utf-8')
+        return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+    def test_any_chunk_size(self):
+        text = json.dumps(self.DOC, ensure_ascii=False, indent=1)
+        for size in range(1, len(text) + 2):
+            self.assertEqual(list(iter_json_array(self.chunked(text, size))), self.DOC, size)
+
+    def test_number_split_at_chunk_end(self):
+        self.assertEqual(list(iter_json_array([b'[12', b'34, 5', b'6]'])), [1234, 56])
+        self.assertEqual(list(iter_json_array([b'  [ ] '])), [])
+
+    def test_numbers_split_at_every_offset(self):
+        doc = [12.5, -0.25, 1e3, 2.5E-7, -3e+12, 0, 17, {'p': 1.0625e2, 'q': [-8.5]}]
+        raw = b'[12.5,-0.25,1e3,2.5E-7,-3e+12,0,17,{"p":1.0625e2,"q":[-8.5]}]'
+        for cut in range(len(raw) + 1):
+            self.assertEqual(list(iter_json_array([raw[:cut], raw[cut:]])), doc, raw[:cut])
+        for size in (1, 2, 3):
+            self.assertEqual(list(iter_json_array(self.chunked(raw.decode(), size))), doc)
+
+    def test_array_under_key(self):
+        text = json.dumps({'cursor': 'c1', 'fills': self.DOC, 'has_next': False})
+        for size in (1, 5, 64):
+            decoder = JsonArrayDecoder('fills')
+            self.assertEqual(list(iter_json_array(self.chunked(text, size), decoder=decoder)), self.DOC)
+            self.assertEqual(decoder.fields, {'cursor': 'c1', 'has_next': False})
+
+    def test_async(self):
+        async def chunks():
+            for chunk in self.chunked(json.dumps(self.DOC), 3):
+                yield chunk
+
+        async def run():
+            return [item async for item in aiter_json_array(chunks())]
+
+        self.assertEqual(asyncio.run(run()), self.DOC)
+
+    def test_invalid_or_truncated(self):
+        cases = [([b'[1, 2'], None), ([b'{"a": 1}'], None), ([b'[1, }'], None),
+                 ([b'{"a": [1]}'], 'fills'), ([b'{"fills": 3}'], 'fills'), ([b''], None)]
+        for chunks, key in cases:
+            with self.assertRaises(ValueError, msg=chunks):
+                list(iter_json_array(chunks, key))
+
+
+class FakeStreamResponse:
+    """Response de requests con el body en chunks chicos (stream=True)"""
+
+    status_code = 200
+    CHUNK = 97    # corta tokens y caracteres UTF-8 a la mitad
+
+    def __init__(self, body=None, truncate: bool = False):
+        self.body = body
+        self.truncate = truncate
+        self.closed = False
+
+    def json(self):
+        return self.body
+
+    def iter_content(self, chunk_size=None):
+        raw = json.dumps(self.body, ensure_ascii=False).encode('utf-8')
+        if self.truncate:
+            raw = raw[:len(raw) // 2]
+        for i in range(0, len(raw), self.CHUNK):
+            yield raw[i:i + self.CHUNK]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeSchwabAPI:
+    """accountNumbers + transactions filtradas por startDate/endDate"""
+
+    def __init__(self, transactions: list):
+        self.transactions = transactions
+        self.account_calls = 0
+        self.ranges = []
+        self.responses = []
+        self.truncate = False
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None, timeout=None, stream=None):
+        response = FakeStreamResponse(truncate=self.truncate)
+        self.responses.append(response)
+        with self.lock:
+            if url.endswith('/accountNumbers'):
+                self.account_calls += 1
+                response.body = [{'accountNumber': '1', 'hashValue': 'HASH'}]
+                return response
+            start, end = (parse_epoch_us(params[k]) for k in ('startDate', 'endDate'))
+            self.ranges.append((start, end))
+        response.body = [tx for tx in self.transactions if start <= parse_epoch_us(tx['time']) <= end]
+        return response
+
+
+def schwab_tx(i: int, when: datetime) -> dict:
+    return dict(SCHWAB_TX, activityId=i, time=when.strftime('%Y-%m-%dT%H:%M:%S+0000'))
+
+
+class TestSchwabSync(unittest.TestCase):
+    """Account hash cacheado + sync incremental + backfill por bloques"""
+
+    def setUp(self):
+        self.state_file = os.path.join(tempfile.mkdtemp(), 'trades.db')
+        now = datetime.now(timezone.utc)
+        # Una transacción cada 12 horas durante 200 días
+        self.api = FakeSchwabAPI([schwab_tx(i, now - timedelta(hours=12 * i + 1))
+                                  for i in range(400)])
+
+    def make_adapter(self) -> SchwabAdapter:
+        adapter = SchwabAdapter.__new__(SchwabAdapter)
+        adapter.session = self.api
+        adapter._get_headers = lambda: {}
+        adapter._init_sync_state(TradeStore(self.state_file))
+        return adapter
+
+    def test_backfill_in_chunks(self):
+        adapter = self.make_adapter()
+        trades = adapter.get_transactions(days=90)
+        self.assertEqual(len(trades), 180)
+        self.assertEqual(len(self.api.ranges), 3)    # 3 bloques de 30 días
+        self.assertEqual(len({t['id'] for t in trades}), 180)
+
+    def test_incremental_and_cached_hash(self):
+        adapter = self.make_adapter()
+        adapter.get_transactions(days=30)
+        self.api.ranges.clear()
+
+        self.api.transactions.insert(0, schwab_tx(999, datetime.now(timezone.utc)))
+        trades = adapter.get_transactions(days=30)
+        self.assertEqual(trades[0]['id'], '999')
+        self.assertEqual(self.api.account_calls, 1)
+        self.assertEqual(len(self.api.ranges), 1)    # solo desde la última sync
+        start, end = self.api.ranges[0]
+        self.assertLessEqual((end - start) / 3_600_000_000, 25)
+
+    def test_wider_window_backfills_only_missing(self):
+        adapter = self.make_adapter()
+        adapter.get_transactions(days=7)
+        covered = adapter.covered_from_us
+        self.api.ranges.clear()
+
+        self.assertEqual(len(adapter.get_transactions(days=90)), 180)
+        backfill = [r for r in self.api.ranges if r[1] <= covered]
+        self.assertEqual(len(backfill), 3)           # 83 días faltantes en bloques
+
+    def test_streamed_responses_closed(self):
+        adapter = self.make_adapter()
+        self.assertEqual(len(adapter.get_transactions(days=90)), 180)
+        self.assertTrue(all(r.closed for r in self.api.responses if r.body and 'time' in r.body[0]))
+
+    def test_truncated_response_not_marked_synced(self):
+        adapter = self.make_adapter()
+        self.api.truncate = True
+        self.assertEqual(adapter.get_transactions(days=7), [])
+        self.assertIsNone(adapter.covered_from_us)
+
+        self.api.truncate = False
+        self.assertEqual(len(adapter.get_transactions(days=7)), 14)
+
+    def test_state_persisted(self):
+        self.make_adapter().get_transactions(days=30)
+        restarted = self.make_adapter()
+        self.api.ranges.clear()
+        self.assertEqual(len(restarted.get_transactions(days=30)), 60)
+        self.assertEqual(self.api.account_calls, 1)
+        self.assertEqual(len(self.api.ranges), 1)
+
+
+def async_adapter(cls, api, db_file: str):
+    """Adapter async sin __init__ cuyo _get_json/_iter_json responde desde un fake sync"""
+    adapter = cls.__new__(cls)
+    adapter._async_lock = asyncio.Lock()
+    adapter.jwt_manager = None
+    adapter.quote_increments = {}
+    adapter.qty_scales = {}
+    adapter._init_sync_state(TradeStore(db_file))
+
+    async def get_json(url, params=None, endpoint=None, priority=None):
+        await asyncio.sleep(0)
+        return api.get(url, params=params).json()
+    adapter._get_json = get_json
+
+    async def iter_json(url, params=None, endpoint=None, priority=None):
+        async def chunks():
+            for chunk in api.get(url, params=params).iter_content():
+                await asyncio.sleep(0)
+                yield chunk
+        async for item in aiter_json_array(chunks()):
+            yield item
+    adapter._iter_json = iter_json
+    return adapter
+
+
+class TestAsyncAdapters(unittest.TestCase):
+    """Las variantes async comparten cache/watermark y dan el mismo resultado"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.now = datetime.now(timezone.utc)
+
+    def test_coinbase_fills_match_sync(self):
+        raw = [raw_fill(i, self.now - timedelta(hours=i + 1)) for i in range(250)]
+        adapter = async_adapter(AsyncCoinbaseAdapter, FakeFillsAPI(list(raw)),
+                                os.path.join(self.tmp, 'a.db'))
+        fills = asyncio.run(adapter.get_fills_async(days=30))
+
+        sync = coinbase_adapter(FakeFillsAPI(list(raw)), os.path.join(self.tmp, 's.db'))
+        self.assertEqual(fills, sync.get_fills(days=30))
+        self.assertEqual(adapter.watermark, sync.watermark)
+        self.assertEqual(adapter.qty_scales, {'BTC-USD': 10 ** 4})
+
+    def test_coinbase_quotes(self):
+        api = FakeProductsAPI({'BTC-USD': (100.0, 102.0)})
+        adapter = async_adapter(AsyncCoinbaseAdapter, api, os.path.join(self.tmp, 'q.db'))
+        prices = asyncio.run(adapter.get_quotes_async(['BTC-USD', 'DOGE-USD']))
+        self.assertEqual(prices, {'BTC-USD': 101.0, 'DOGE-USD': 7.5})
+        self.assertEqual(adapter.get_decimals_for_symbol('BTC-USD'), 4)
+
+    def test_schwab_chunks_concurrent(self):
+        api = FakeSchwabAPI([schwab_tx(i, self.now - timedelta(hours=12 * i + 1)) for i in range(400)])
+        adapter = async_adapter(AsyncSchwabAdapter, api, os.path.join(self.tmp, 't.db'))
+        trades = asyncio.run(adapter.get_transactions_async(days=90))
+        self.assertEqual(len(trades), 180)
+        self.assertEqual(len(api.ranges), 3)
+        self.assertEqual(adapter.account_hash, 'HASH')
+
+    def test_concurrent_windows_share_one_sync(self):
+        raw = [raw_fill(i, self.now - timedelta(hours=i + 1)) for i in range(250)]
+        single = FakeFillsAPI(list(raw))
+        asyncio.run(async_adapter(AsyncCoinbaseAdapter, single,
+                                  os.path.join(self.tmp, 'a.db')).get_fills_async(days=30))
+
+        api = FakeFillsAPI(list(raw))
+        adapter = async_adapter(AsyncCoinbaseAdapter, api, os.path.join(self.tmp, 'b.db'))
+
+        async def run():
+            return await asyncio.gather(adapter.get_fills_async(days=30),
+                                        adapter.get_fills_async(days=7),
+                                        adapter.get_fills_async(days=30))
+
+        wide, narrow, again = asyncio.run(run())
+        self.assertEqual(api.calls, single.calls)
+        self.assertEqual(narrow, wide[:len(narrow)])
+        self.assertTrue(0 < len(narrow) < len(wide))
+        self.assertEqual(wide, again)
+
+    def test_concurrent_quotes_share_one_request(self):
+        api = FakeProductsAPI({'BTC-USD': (100.0, 102.0), 'ETH-USD': (10.0, 10.2)})
+        adapter = async_adapter(AsyncCoinbaseAdapter, api, os.path.join(self.tmp, 'q.db'))
+        adapter.quote_increments = {'BTC-USD': '0.01', 'ETH-USD': '0.01'}
+
+        async def run():
+            return await asyncio.gather(adapter.get_quotes_async(['BTC-USD', 'ETH-USD']),
+                                        adapter.get_quotes_async(['ETH-USD']))
+
+        both, eth = asyncio.run(run())
+        self.assertEqual(api.calls, ['best_bid_ask'])
+        self.assertEqual(set(both), {'BTC-USD', 'ETH-USD'})
+        self.assertEqual(set(eth), {'ETH-USD'})
+
+
+if __name__ == '__main__':
+    unittest.main()
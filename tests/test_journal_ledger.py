@@ -0,0 +1,494 @@
+"""
+Test suite para FifoLedger - libro FIFO incremental del journal
+
+Valida que el ledger persistente produzca exactamente las mismas
+métricas que un cálculo completo cuando:
+- Llegan fills nuevos (append)
+- Llegan fills tardíos (fuera de orden)
+- Trades antiguos salen de la ventana consultada
+"""
+
+import sys
+import os
+import asyncio
+import random
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hub.journal.closed_ops_table import ClosedOpsTable
+from hub.journal.equity_curve import EquityCurve
+from hub.journal.fifo_ledger import FifoLedger
+from hub.journal.fixed_point import DEFAULT_QTY_SCALE
+from hub.journal.metrics_memo import MetricsMemo
+from hub.journal.open_positions import OpenPositionTable
+from hub.journal.records import ClosedOp
+from hub.journal.rolling_metrics import rolling_latest, rolling_series
+from hub.journal.timestamps import trade_epoch_us
+from hub.journal.journal_manager import JournalManager
+from hub.managers.quote_cache import QuoteCache
+
+
+def make_manager() -> JournalManager:
+    """JournalManager sin adapters (modo test, sin credenciales)"""
+    with patch('hub.journal.schwab_adapter.SchwabAdapter', side_effect=ImportError), \
+         patch('hub.journal.coinbase_adapter.CoinbaseAdapter', side_effect=ImportError):
+        return JournalManager(capital_initial=5000.0, quote_cache=QuoteCache())
+
+
+def make_trades(n: int, seed: int = 7) -> list:
+    """Trades sintéticos de ambos brokers, en orden aleatorio"""
+    rnd = random.Random(seed)
+    base = datetime.now(timezone.utc).replace(microsecond=0)
+    symbols = ['HOOD', 'NU', 'BTC-USD', 'ETH-USD']
+    trades = []
+    for i in range(n):
+        symbol = rnd.choice(symbols)
+        qty = round(rnd.uniform(0.01, 3), 6)
+        price = round(rnd.uniform(10, 200), 2)
+        trades.append({
+            'id': str(1000 + i),
+            'datetime': (base - timedelta(minutes=rnd.randint(0, 60 * 24 * 60))).isoformat(),
+            'symbol': symbol,
+            'side': 'BUY' if rnd.random() < 0.55 else 'SELL',
+            'quantity': qty,
+            'price': price,
+            'fee': round(rnd.uniform(0, 1), 4),
+            'amount': round(qty * price, 2),
+            'broker': 'coinbase' if symbol.endswith('-USD') else 'schwab'
+        })
+    return trades
+
+
+def comparable(result: dict) -> dict:
+    """Quita campos volátiles y ordena listas para comparar resultados"""
+    result = dict(result)
+    result.pop('timestamp', None)
+    result['trades'] = sorted(result['trades'], key=lambda t: t['id'])
+    result['positions'] = dict(result['positions'])
+    result['positions']['open_detail'] = sorted(result['positions']['open_detail'],
+                                                key=lambda p: p['symbol'])
+    return result
+
+
+class TestFifoLedger(unittest.TestCase):
+    """Ledger incremental == cálculo completo"""
+
+    def setUp(self):
+        self.manager = make_manager()
+        self.prices = {'HOOD': 120.0, 'BTC-USD': 90.0}
+
+    def assert_same_as_full(self, trades, days):
+        incremental = self.manager.compute_metrics(trades, days=days, current_prices=self.prices,
+                                                   ledger_key='test')
+        full = self.manager.compute_metrics(trades, days=days, current_prices=self.prices)
+        self.assertEqual(comparable(incremental), comparable(full))
+
+    def test_append_new_fills(self):
+        """Fills nuevos en orden cronológico se aplican sin reconstruir"""
+        trades = sorted(make_trades(400), key=lambda t: t['datetime'])
+        for end in (100, 250, 400):
+            self.assert_same_as_full(trades[:end], days=30)
+
+    def test_out_of_order_fills(self):
+        """Fills tardíos reconstruyen solo su símbolo"""
+        trades = make_trades(400)
+        for end in (100, 250, 400):
+            self.assert_same_as_full(trades[:end], days=None)
+
+    def test_trades_leaving_window(self):
+        """Trades que desaparecen del conjunto se eliminan del ledger"""
+        trades = sorted(make_trades(400), key=lambda t: t['datetime'])
+        self.assert_same_as_full(trades, days=7)
+        self.assert_same_as_full(trades[150:], days=7)
+
+    def test_sync_reports_changed_symbols(self):
+        """sync() solo reporta símbolos con fills nuevos"""
+        trades = sorted(make_trades(50), key=lambda t: t['datetime'])
+        ledger = FifoLedger()
+        ledger.sync(trades)
+        self.assertEqual(ledger.sync(trades), [])
+
+        newer = dict(trades[-1], id='new-1',
+                     datetime=(datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat())
+        self.assertEqual(ledger.sync(trades + [newer]), [newer['symbol']])
+        self.assertEqual(len(ledger), 51)
+
+    def test_delta_api_matches_sync(self):
+        """add_fills + evict_before == sync sobre la ventana que avanza"""
+        trades = sorted(make_trades(400), key=lambda t: t['datetime'])
+        delta, full = FifoLedger(), FifoLedger()
+        delta.add_fills(trades[:200])
+        for start, end in ((0, 300), (120, 300), (120, 400), (260, 400)):
+            window = trades[start:end]
+            full.sync(window)
+            delta.evict_before(trade_epoch_us(window[0]))
+            delta.add_fills(window)
+            self.assertEqual(len(delta), len(full))
+            self.assertEqual(delta.closed_stats(), full.closed_stats())
+            self.assertEqual(sorted(r.trade['id'] for r in delta.trades_since(None)),
+                             sorted(t['id'] for t in window))
+
+    def test_delta_touches_only_changed_symbols(self):
+        trades = sorted(make_trades(50), key=lambda t: t['datetime'])
+        ledger = FifoLedger()
+        ledger.add_fills(trades)
+        self.assertEqual(ledger.add_fills(trades), [])
+        self.assertEqual(ledger.evict_before(trade_epoch_us(trades[0])), [])
+        self.assertEqual(ledger.evict_before(trade_epoch_us(trades[1])), [trades[0]['symbol']])
+        self.assertEqual(len(ledger), 49)
+
+    def test_scale_change_rebuilds_symbol(self):
+        """Un base_increment que llega tarde reconstruye el símbolo con su escala"""
+        trades = [dict(t, quantity=round(t['quantity'], 2))
+                  for t in sorted(make_trades(80), key=lambda t: t['datetime'])]
+        scales = {}
+        ledger = FifoLedger(qty_scales=scales)
+        ledger.add_fills(trades)
+        self.assertEqual(ledger.symbols['BTC-USD'].scale, DEFAULT_QTY_SCALE)
+
+        scales['BTC-USD'] = 100
+        self.assertEqual(ledger.add_fills(trades), ['BTC-USD'])
+        self.assertEqual(ledger.symbols['BTC-USD'].scale, 100)
+        self.assertEqual(ledger.add_fills(trades), [])
+
+        fresh = FifoLedger(qty_scales=scales)
+        fresh.add_fills(trades)
+        self.assertEqual(ledger.closed_stats(), fresh.closed_stats())
+
+
+class TestComputeMetricsMulti(unittest.TestCase):
+    """Una pasada FIFO == compute_metrics por ventana y broker"""
+
+    def test_every_slice_matches_single_computation(self):
+        manager = make_manager()
+        trades = make_trades(600, seed=11)
+        prices = {'NU': 14.0, 'ETH-USD': 150.0}
+
+        results = manager.compute_metrics_multi(trades, windows=[7, 30, None],
+                                                brokers=['all', 'schwab', 'coinbase'],
+                                                current_prices=prices)
+        self.assertEqual(len(results), 9)
+
+        for broker in ('all', 'schwab', 'coinbase'):
+            subset = trades if broker == 'all' else [t for t in trades if t['broker'] == broker]
+            for days in (7, 30, None):
+                expected = manager.compute_metrics(subset, days=days, current_prices=prices)
+                if broker != 'all':
+                    expected['broker'] = broker
+                self.assertEqual(comparable(results[f"{broker}_{days}"]), comparable(expected))
+
+    def test_async_fetch_matches_sync(self):
+        trades = make_trades(300, seed=12)
+        prices = {'NU': 14.0, 'HOOD': 30.0, 'ETH-USD': 150.0}
+        sync_manager, async_manager = make_manager(), make_manager()
+        for manager in (sync_manager, async_manager):
+            manager.schwab = StubBroker([t for t in trades if t['broker'] == 'schwab'], prices)
+            manager.coinbase = StubBroker([t for t in trades if t['broker'] == 'coinbase'], prices)
+
+        expected = sync_manager.get_journal_multi(windows=[7, 30, 90])
+        results = asyncio.run(async_manager.get_journal_multi_async(windows=[7, 30, 90]))
+        self.assertEqual(set(results), set(expected))
+        for key in expected:
+            self.assertEqual(comparable(results[key]), comparable(expected[key]))
+        self.assertEqual(async_manager.live_positions.totals(), sync_manager.live_positions.totals())
+
+
+class StubBroker:
+    """Adapter falso con API sync y async sobre trades fijos"""
+
+    def __init__(self, trades: list, prices: dict):
+        self.trades = trades
+        self.prices = prices
+        self.qty_scales = {}
+        self.quoted = []
+
+    def get_transactions(self, days: int = 7) -> list:
+        return list(self.trades)
+
+    get_fills = get_transactions
+
+    async def get_transactions_async(self, days: int = 7) -> list:
+        await asyncio.sleep(0)
+        return list(self.trades)
+
+    get_fills_async = get_transactions_async
+
+    def get_quotes(self, symbols: list) -> dict:
+        self.quoted.extend(symbols)
+        return {s: self.prices[s] for s in symbols if s in self.prices}
+
+    async def get_quotes_async(self, symbols: list) -> dict:
+        return self.get_quotes(symbols)
+
+    def get_decimals_for_symbol(self, symbol: str) -> int:
+        return 8
+
+
+class TestStreamedPrices(unittest.TestCase):
+    """Precios frescos del QuoteCache sin REST; viejos o sin stream por REST"""
+
+    def setUp(self):
+        self.trades = make_trades(200, seed=21)
+        rest = {'NU': 14.0, 'HOOD': 30.0, 'BTC-USD': 80.0, 'ETH-USD': 150.0}
+        self.manager = make_manager()
+        self.manager.schwab = StubBroker([], rest)
+        self.manager.coinbase = StubBroker([], rest)
+        self.manager.quote_cache.update('HOOD', 31.5)
+        self.manager.quote_cache.update('BTC-USD', 81.0)
+
+    def test_fresh_quotes_skip_rest(self):
+        prices = self.manager._get_current_prices(self.trades)
+        self.assertEqual(prices, {'NU': 14.0, 'HOOD': 31.5, 'BTC-USD': 81.0, 'ETH-USD': 150.0})
+        self.assertEqual(self.manager.schwab.quoted, ['NU'])
+        self.assertEqual(self.manager.coinbase.quoted, ['ETH-USD'])
+
+        async_prices = asyncio.run(self.manager._get_current_prices_async(self.trades))
+        self.assertEqual(async_prices, prices)
+
+    def test_stale_quotes_use_rest(self):
+        self.manager.quote_cache.max_age = 0.0
+        time.sleep(0.001)
+        prices = self.manager._get_current_prices(self.trades)
+        self.assertEqual(prices['HOOD'], 30.0)
+        self.assertEqual(sorted(self.manager.schwab.quoted), ['HOOD', 'NU'])
+
+
+class TestParallelFifo(unittest.TestCase):
+    """FIFO en procesos == FIFO en serie"""
+
+    def test_parallel_matches_serial(self):
+        trades = make_trades(500, seed=3)
+        serial = FifoLedger()
+        parallel = FifoLedger(parallel_min_fills=1, max_workers=2)
+        serial.sync(trades)
+        parallel.sync(trades)
+
+        self.assertEqual(serial.closed_stats(), parallel.closed_stats())
+        self.assertEqual(sorted(serial.open_positions(), key=lambda p: p.symbol),
+                         sorted(parallel.open_positions(), key=lambda p: p.symbol))
+        self.assertEqual(sorted(serial.trades_since(), key=lambda t: t.trade['id']),
+                         sorted(parallel.trades_since(), key=lambda t: t.trade['id']))
+
+        # Los lotes restaurados siguen funcionando para fills incrementales
+        newer = dict(trades[0], id='late-sell', side='SELL', quantity=0.5,
+                     datetime=(datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat())
+        serial.sync(trades + [newer])
+        parallel.sync(trades + [newer])
+        self.assertEqual(serial.closed_stats(), parallel.closed_stats())
+
+
+class TestOpenPositionTable(unittest.TestCase):
+    """Tick de precio O(1) == recalcular con precios nuevos"""
+
+    def test_tick_matches_full_recompute(self):
+        manager = make_manager()
+        trades = make_trades(400, seed=5)
+        before = {'HOOD': 100.0, 'NU': 12.0, 'BTC-USD': 80.0, 'ETH-USD': 140.0}
+        after = dict(before, HOOD=101.37, **{'BTC-USD': 77.5})
+
+        ledger = FifoLedger()
+        ledger.sync(trades)
+        table = OpenPositionTable.from_ledgers(ledger.symbols.values(), before)
+        for symbol in ('HOOD', 'BTC-USD'):
+            self.assertIsNotNone(table.on_price(symbol, after[symbol]))
+        self.assertIsNone(table.on_price('HOOD', after['HOOD']))     # sin cambio
+        self.assertIsNone(table.on_price('AAPL', 200.0))             # sin posición
+
+        self.assertEqual(sorted(table.snapshot(), key=lambda p: p.symbol),
+                         sorted(ledger.open_positions(after), key=lambda p: p.symbol))
+        for broker, key in ((None, 'all'), ('schwab', 'schwab'), ('coinbase', 'coinbase')):
+            subset = trades if broker is None else [t for t in trades if t['broker'] == broker]
+            stats = manager.compute_metrics(subset, current_prices=after)['stats']
+            totals = table.totals(broker)
+            self.assertEqual(totals['pl_unrealized_usd'], stats['pl_unrealized_usd'], key)
+            self.assertEqual(totals['pl_unrealized_percent'], stats['pl_unrealized_percent'], key)
+
+
+class TestEquityCurve(unittest.TestCase):
+    """Curva incremental == curva recalculada desde las ops cerradas"""
+
+    def test_incremental_matches_rebuild(self):
+        # Fechas únicas: con ventas simultáneas el orden de empate cambia los puntos intermedios
+        trades = make_trades(600, seed=9)
+        for i, trade in enumerate(trades):
+            trade['datetime'] = (datetime.fromisoformat(trade['datetime'])
+                                 + timedelta(microseconds=i)).isoformat()
+        ordered = sorted(trades, key=lambda t: t['datetime'])
+        incremental = FifoLedger()
+        for end in (200, 400, 600):
+            incremental.sync(ordered[:end])
+        incremental.sync(trades[:550] + trades[560:])   # fuera de orden + removidos
+        full = FifoLedger()
+        full.sync(trades[:550] + trades[560:])
+
+        for broker in (None, 'schwab', 'coinbase'):
+            rows = full.closed.select(broker=broker)
+            pl = rows['pl_usd']
+            equity = pl.cumsum()
+            peak = [max([0.0] + list(equity[:i + 1])) for i in range(len(equity))]
+            curve = incremental.equity_curve(broker).data
+            self.assertEqual(len(curve), len(rows))
+            for got, exp in zip(curve['equity'], equity):
+                self.assertAlmostEqual(got, exp, places=6)
+            for got, exp in zip(curve['peak'], peak):
+                self.assertAlmostEqual(got, exp, places=6)
+            self.assertEqual(incremental.drawdown_stats(broker=broker),
+                             full.drawdown_stats(broker=broker))
+
+    def test_drawdown_stats(self):
+        day = 86_400 * 1_000_000
+        curve = EquityCurve(capacity=2)
+        curve.extend([0, day], [10.0, -4.0])                 # pico 10 el día 0
+        curve.extend([3 * day, 5 * day], [-6.0, 12.0])       # fondo 0, recupera el día 5
+        stats = curve.drawdown_stats()
+        self.assertEqual(stats['max_drawdown_usd'], 10.0)
+        self.assertEqual(stats['max_drawdown_days'], 5.0)
+        self.assertEqual(stats['current_drawdown_usd'], 0.0)
+
+        window = curve.window(cutoff=day)                    # re-basada a 0 desde el día 1
+        self.assertEqual(list(window['equity']), [-4.0, -10.0, 2.0])
+        self.assertEqual(curve.drawdown_stats(cutoff=day)['max_drawdown_usd'], 10.0)
+
+        series = curve.series(max_points=2)
+        self.assertIn(3 * day // 1000, series['t'])           # conserva el fondo
+
+
+class TestRollingMetrics(unittest.TestCase):
+    """Métricas rolling desde las sumas acumuladas == recálculo por ventana"""
+
+    @staticmethod
+    def naive(pl: list) -> dict:
+        gross_win = sum(p for p in pl if p > 0)
+        gross_loss = -sum(p for p in pl if p <= 0)
+        pf = gross_win / gross_loss if gross_loss > 1e-9 else (999.99 if gross_win > 0 else 0.0)
+        return {'count': len(pl), 'win_rate': round(sum(p > 0 for p in pl) / len(pl) * 100, 2),
+                'profit_factor': round(pf, 2), 'expectancy': round(sum(pl) / len(pl), 2)}
+
+    def test_matches_naive_windows(self):
+        rnd = random.Random(4)
+        day = 86_400 * 1_000_000
+        ts = sorted(rnd.randrange(0, 120 * day) for _ in range(300))
+        pl = [round(rnd.gauss(1.0, 10.0), 2) for _ in ts]
+        curve = EquityCurve(capacity=8)
+        for start in range(0, 300, 37):                # extend incremental en lotes
+            curve.extend(ts[start:start + 37], pl[start:start + 37])
+        rows = curve.data
+
+        by_ops = rolling_series(rows, window_ops=20)
+        by_days = rolling_series(rows, window_days=7)
+        for i in range(len(ts)):
+            window = pl[max(i - 19, 0):i + 1]
+            expected = self.naive(window)
+            for key in expected:
+                # Redondeo a 2 decimales: puede diferir en 0.01 en empates x.xx5
+                self.assertAlmostEqual(by_ops[key][i], expected[key], delta=0.0101, msg=(i, key))
+            window = [p for t, p in zip(ts[:i + 1], pl[:i + 1]) if t > ts[i] - 7 * day]
+            self.assertEqual(by_days['count'][i], len(window))
+            self.assertAlmostEqual(by_days['expectancy'][i], self.naive(window)['expectancy'],
+                                   delta=0.0101)
+
+        latest = rolling_latest(rows, window_ops=20)
+        for key, value in self.naive(pl[-20:]).items():
+            self.assertAlmostEqual(latest[key], value, delta=0.0101)
+        self.assertEqual(rolling_latest(rows, window_days=7)['count'], by_days['count'][-1])
+
+        # cutoff solo recorta puntos: las ventanas siguen mirando hacia atrás
+        recent = rolling_series(rows, window_ops=20, cutoff=ts[250])
+        self.assertEqual(recent['count'][0], 20)
+        self.assertEqual(len(recent['t']), 50)
+
+    def test_invalid_window(self):
+        rows = EquityCurve(capacity=1).data
+        with self.assertRaises(ValueError):
+            rolling_series(rows)
+        with self.assertRaises(ValueError):
+            rolling_latest(rows, window_ops=0)
+
+
+class TestMetricsMemo(unittest.TestCase):
+    """Entradas sin cambios → mismo objeto; cualquier cambio → recalcular"""
+
+    def test_unchanged_inputs_return_same_object(self):
+        manager = make_manager()
+        trades = make_trades(300, seed=13)
+        prices = {'HOOD': 110.0}
+
+        first = manager.compute_metrics_multi(trades, current_prices=prices, ledger_key='memo')
+        self.assertIs(manager.compute_metrics_multi(list(trades), current_prices=dict(prices),
+                                                    ledger_key='memo'), first)
+
+        moved = manager.compute_metrics_multi(trades, current_prices={'HOOD': 111.0},
+                                              ledger_key='memo')
+        self.assertIsNot(moved, first)
+
+        newer = dict(trades[0], id='memo-new',
+                     datetime=(datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat())
+        grown = manager.compute_metrics_multi(trades + [newer], current_prices=prices,
+                                              ledger_key='memo')
+        self.assertEqual(grown['all_90']['period']['trades_count'],
+                         first['all_90']['period']['trades_count'] + 1)
+
+        # Mismo count y mismo máximo, pero un trade reemplazado por otro
+        swapped = trades[1:] + [dict(trades[0], id='0', datetime=trades[1]['datetime'])]
+        self.assertIsNot(manager.compute_metrics(swapped), manager.compute_metrics(trades))
+
+    def test_new_day_recomputes(self):
+        """Mismos trades al día siguiente: la ventana avanzó, no sirve el memo"""
+        manager = make_manager()
+        trades = make_trades(100, seed=5)
+        first = manager.compute_metrics(trades, days=7, ledger_key='day')
+        multi = manager.compute_metrics_multi(trades, ledger_key='day')
+        self.assertIs(manager.compute_metrics(trades, days=7, ledger_key='day'), first)
+
+        tomorrow = JournalManager._window_start(6)
+        with patch.object(JournalManager, '_window_start', staticmethod(lambda days: tomorrow)):
+            self.assertIsNot(manager.compute_metrics(trades, days=7, ledger_key='day'), first)
+            self.assertIsNot(manager.compute_metrics_multi(trades, ledger_key='day'), multi)
+
+    def test_lru_eviction_and_ttl(self):
+        memo = MetricsMemo(maxsize=2)
+        memo.put('a', 1)
+        memo.put('b', 2)
+        memo.get('a')              # 'a' pasa a ser la más reciente
+        memo.put('c', 3)
+        self.assertIsNone(memo.get('b'))
+        self.assertEqual((memo.get('a'), memo.get('c')), (1, 3))
+
+        expired = MetricsMemo(maxsize=2, ttl=0)
+        expired.put('a', 1)
+        self.assertIsNone(expired.get('a'))
+        self.assertIsNone(MetricsMemo(maxsize=0).get('a'))
+
+
+class TestClosedOpsTable(unittest.TestCase):
+    """Agregados vectorizados == sumas en Python"""
+
+    def make_op(self, symbol, broker, pl, cost):
+        return ClosedOp(symbol, broker, pl, pl / cost * 100, cost, cost + pl, 1.0, '')
+
+    def test_masked_aggregates(self):
+        table = ClosedOpsTable(capacity=2)
+        ops = [(10, self.make_op('NU', 'schwab', 5.0, 100.0)),
+               (20, self.make_op('BTC-USD', 'coinbase', -3.0, 50.0)),
+               (30, self.make_op('NU', 'schwab', 0.0, 10.0))]
+        table.extend([table.row(ts, op) for ts, op in ops[1:]])
+        table.extend([table.row(*ops[0])])     # fuera de orden
+
+        self.assertEqual(list(table.data['sell_ts']), [10, 20, 30])
+        self.assertEqual(table.aggregate(), {
+            'count': 3, 'wins': 1, 'losses': 2, 'total_wins_usd': 5.0,
+            'total_losses_usd': 3.0, 'pl_realized_usd': 2.0, 'cost_basis': 160.0})
+        self.assertEqual(table.aggregate(cutoff=15, broker='schwab')['count'], 1)
+        self.assertEqual(table.aggregate(broker='kraken')['count'], 0)
+
+        self.assertEqual(table.remove_symbols(['NU']), 2)
+        self.assertEqual(table.aggregate()['pl_realized_usd'], -3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Test suite para lot_matching - métodos de matching de lotes
+
+Valida el cost basis de una venta con FIFO, LIFO, HIFO y costo promedio
+sobre la misma secuencia de compras, y que el ledger completo (serie y
+paralelo) respete el método configurado.
+"""
+
+import sys
+import os
+import unittest
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hub.journal.fifo_ledger import FifoLedger, SymbolLedger
+from hub.journal.fixed_point import increment_scale
+from hub.journal.lot_matching import LOT_BOOKS, LotBook, make_lot_book
+
+
+def fill(i: int, side: str, qty: float, price: float) -> dict:
+    return {
+        'id': str(i),
+        'datetime': f"2025-01-{i + 1:02d}T10:00:00+00:00",
+        'symbol': 'NU',
+        'side': side,
+        'quantity': qty,
+        'price': price,
+        'fee': 0.0,
+        'broker': 'schwab'
+    }
+
+
+# Compras a 10, 30, 20 (1 unidad c/u) y venta de 1.5 unidades a 40
+FILLS = [fill(0, 'BUY', 1, 10), fill(1, 'BUY', 1, 30), fill(2, 'BUY', 1, 20),
+         fill(3, 'SELL', 1.5, 40)]
+
+EXPECTED_COST = {
+    'fifo': 10 + 15,       # lote de 10 + medio lote de 30
+    'lifo': 20 + 15,       # lote de 20 + medio lote de 30
+    'hifo': 30 + 10,       # lote de 30 + medio lote de 20
+    'average': 1.5 * 20,   # costo promedio 20
+}
+
+
+class TestLotMethods(unittest.TestCase):
+    """Cost basis y lotes restantes por método"""
+
+    def test_cost_basis_per_method(self):
+        for method, expected in EXPECTED_COST.items():
+            ledger = SymbolLedger('NU', 'schwab', method)
+            for trade in FILLS:
+                trade_meta, closed_op = ledger.apply(trade)
+            self.assertAlmostEqual(closed_op.cost_basis, expected, msg=method)
+            self.assertAlmostEqual(closed_op.pl_usd, 60 - expected, msg=method)
+            self.assertAlmostEqual(ledger.open_qty, 1.5, msg=method)
+            self.assertAlmostEqual(ledger.open_cost, 60 - expected, msg=method)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            make_lot_book('random')
+        with self.assertRaises(ValueError):
+            FifoLedger(method='random')
+
+    def test_books_implement_interface(self):
+        for method in LOT_BOOKS:
+            self.assertIsInstance(make_lot_book(method), LotBook)
+
+        class Incomplete(LotBook):
+            def push(self, lot):
+                pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_restore_keeps_order(self):
+        """lots()/restore() preservan el orden de consumo (modo paralelo)"""
+        for method in LOT_BOOKS:
+            book = make_lot_book(method)
+            for lot in ([1, 10.0, 0], [1, 30.0, 1], [1, 30.0, 2], [2, 20.0, 3]):
+                book.push(list(lot))
+            copy = make_lot_book(method)
+            copy.restore(book.lots())
+
+            drained = [book.pop() for _ in range(len(book))]
+            self.assertEqual([copy.pop() for _ in range(len(copy))], drained, method)
+
+    def test_parallel_uses_method(self):
+        trades = FILLS + [dict(t, symbol='HOOD', id=f"h{t['id']}") for t in FILLS]
+        serial = FifoLedger(method='hifo')
+        parallel = FifoLedger(parallel_min_fills=1, max_workers=2, method='hifo')
+        serial.sync(trades)
+        parallel.sync(trades)
+        self.assertAlmostEqual(serial.closed_stats()['cost_basis'], 2 * EXPECTED_COST['hifo'])
+        self.assertEqual(serial.closed_stats(), parallel.closed_stats())
+        self.assertEqual(sorted(serial.open_positions(), key=lambda p: p.symbol),
+                         sorted(parallel.open_positions(), key=lambda p: p.symbol))
+
+
+class TestFixedPointQuantities(unittest.TestCase):
+    """Cantidades en unidades base enteras: cierres exactos sin polvo"""
+
+    def test_no_dust_after_full_close(self):
+        # En float 0.3 - 0.1 < 0.2 deja un lote de ~3e-17 abierto
+        fills = [fill(0, 'BUY', 0.1, 10), fill(1, 'BUY', 0.2, 10), fill(2, 'SELL', 0.3, 20)]
+        for method in LOT_BOOKS:
+            ledger = SymbolLedger('NU', 'schwab', method)
+            for trade in fills:
+                ledger.apply(trade)
+            self.assertEqual(len(ledger.lots), 0, method)
+            self.assertEqual(ledger.open_units, 0, method)
+            self.assertIsNone(ledger.open_position(), method)
+
+    def test_sub_epsilon_sells_match(self):
+        """Ventas de 1e-8 (antes por debajo del épsilon 0.0001) hacen match"""
+        ledger = SymbolLedger('BTC-USD', 'coinbase')
+        ledger.apply(fill(0, 'BUY', 0.00002, 1.0))
+        _, closed_op = ledger.apply(fill(1, 'SELL', 0.00001, 2.0))
+        self.assertIsNotNone(closed_op)
+        self.assertEqual(ledger.open_units, 1000)
+        self.assertAlmostEqual(ledger.open_qty, 0.00001)
+
+    def test_increment_scale(self):
+        self.assertEqual(increment_scale('0.00000001'), 10 ** 8)
+        self.assertEqual(increment_scale('0.01000000'), 100)
+        self.assertEqual(increment_scale('1'), 1)
+        self.assertEqual(increment_scale(None), 10 ** 8)
+
+        # Escala por símbolo (base_increment "1" = cantidades enteras)
+        ledger = FifoLedger(qty_scales={'NU': 1})
+        ledger.sync(FILLS[:3])
+        self.assertEqual(ledger.symbols['NU'].open_units, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
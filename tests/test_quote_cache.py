@@ -0,0 +1,89 @@
+"""
+Test suite para QuoteCache
+
+Valida la frescura por entrada y que los websocket managers escriban
+cada tick en el cache (sin conexión real).
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hub.managers.quote_cache import QuoteCache
+from hub.managers.coinbase_websocket_manager import CoinbaseWebSocketManager
+from hub.managers.schwab_websocket_manager import SchwabWebSocketManager
+
+
+class TestQuoteCache(unittest.TestCase):
+
+    def test_fresh_and_stale(self):
+        cache = QuoteCache(max_age=0.05)
+        cache.update('HOOD', 30.0)
+        self.assertEqual(cache.fresh(['HOOD', 'NU']), {'HOOD': 30.0})
+
+        time.sleep(0.06)
+        self.assertEqual(cache.fresh(['HOOD']), {})
+        self.assertEqual(cache.fresh(['HOOD'], max_age=1.0), {'HOOD': 30.0})
+        self.assertEqual(cache.stats(), {'symbols': 1, 'fresh': 0, 'hits': 2, 'misses': 2})
+
+    def test_touch_keeps_last_price_fresh(self):
+        cache = QuoteCache(max_age=0.05)
+        cache.update('HOOD', 30.0)
+        time.sleep(0.06)
+        cache.touch('HOOD')
+        cache.touch('NU')    # sin precio previo: nada que confirmar
+        self.assertEqual(cache.fresh(['HOOD', 'NU']), {'HOOD': 30.0})
+
+
+class TestStreamsFeedCache(unittest.TestCase):
+
+    def test_coinbase_ticks(self):
+        cache = QuoteCache()
+        ticks = []
+        manager = CoinbaseWebSocketManager(product_ids=['BTC-USD'], quote_cache=cache,
+                                           on_tick=lambda symbol, price: ticks.append(symbol))
+        asyncio.run(manager._emit_tick('BTC-USD', '80123.5'))
+        asyncio.run(manager._emit_tick('ETH-USD', 'N/A'))
+        self.assertEqual(cache.fresh(['BTC-USD', 'ETH-USD']), {'BTC-USD': 80123.5})
+        self.assertEqual(ticks, ['BTC-USD'])
+
+    def test_schwab_level_one(self):
+        cache = QuoteCache(max_age=0.05)
+        manager = SchwabWebSocketManager.__new__(SchwabWebSocketManager)
+        manager.on_tick = None
+        manager.quote_cache = cache
+
+        def message(*content):
+            return {'data': [{'service': 'LEVELONE_EQUITIES', 'content': list(content)}]}
+
+        asyncio.run(manager._emit_ticks(message({'key': 'HOOD', '3': 30.5}, {'key': 'NU', '1': 14.0})))
+        self.assertEqual(cache.fresh(['HOOD', 'NU']), {'HOOD': 30.5})
+
+        # Update sin campo 3: el last no cambió, sigue fresco
+        time.sleep(0.06)
+        asyncio.run(manager._emit_ticks(message({'key': 'HOOD', '2': 30.6})))
+        self.assertEqual(cache.fresh(['HOOD']), {'HOOD': 30.5})
+
+    def test_schwab_streamer_info_off_the_loop(self):
+        """El GET sync de streamerInfo no corre en el thread del event loop"""
+        manager = SchwabWebSocketManager.__new__(SchwabWebSocketManager)
+        threads = []
+        manager._get_streamer_info = lambda: threads.append(threading.get_ident()) and False
+
+        async def connect():
+            return await manager.connect(), threading.get_ident()
+
+        connected, loop_thread = asyncio.run(connect())
+        self.assertFalse(connected)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""
+Test suite para RequestScheduler
+
+Valida los token buckets por broker/endpoint, el orden por prioridad,
+la pausa tras un 429 y las métricas de cola, sin red.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hub.managers import request_scheduler
+from hub.managers.request_scheduler import (DEFAULT_RETRY_AFTER, MAX_BACKOFF_SECONDS, Priority,
+                                            RateLimitTimeout, RequestScheduler, backoff_seconds,
+                                            scheduled_get)
+
+
+class FakeSession:
+    """Devuelve los status de la lista en orden"""
+
+    def __init__(self, statuses: list):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        response = type('Response', (), {})()
+        response.status_code = self.statuses.pop(0)
+        response.headers = {'Retry-After': '0.05'}
+        return response
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        scheduler = RequestScheduler({'b': (50.0, 2)}, {})
+        waits = [scheduler.acquire('b') for _ in range(3)]
+        self.assertLess(max(waits[:2]), 0.01)
+        self.assertGreaterEqual(waits[2], 0.015)
+
+        stats = scheduler.metrics()['b']['priorities']['journal']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['waited'], 1)
+
+    def test_unknown_broker_never_waits(self):
+        scheduler = RequestScheduler({}, {})
+        self.assertLess(sum(scheduler.acquire('x') for _ in range(100)), 0.05)
+
+    def test_priority_order(self):
+        scheduler = RequestScheduler({'b': (20.0, 1)}, {})
+        scheduler.acquire('b')
+        order = []
+
+        def call(priority: Priority):
+            scheduler.acquire('b', priority=priority)
+            order.append(priority)
+
+        # El backfill llega primero pero el quote pasa antes
+        threads = [threading.Thread(target=call, args=(p,))
+                   for p in (Priority.BACKFILL, Priority.JOURNAL, Priority.QUOTES)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.005)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, [Priority.QUOTES, Priority.JOURNAL, Priority.BACKFILL])
+
+    def test_endpoint_limit_does_not_block_other_endpoints(self):
+        scheduler = RequestScheduler({'b': (100.0, 10)}, {('b', 'transactions'): (0.1, 1)},
+                                     max_wait=0.2)
+        scheduler.acquire('b', 'transactions', Priority.BACKFILL)
+
+        with self.assertRaises(RateLimitTimeout):
+            scheduler.acquire('b', 'transactions', Priority.BACKFILL)
+        self.assertLess(scheduler.acquire('b', 'quotes', Priority.QUOTES), 0.01)
+
+        metrics = scheduler.metrics()['b']
+        self.assertEqual(metrics['priorities']['backfill']['timeouts'], 1)
+        self.assertEqual(metrics['queued'], 0)
+
+    def test_throttled_pauses_broker(self):
+        scheduler = RequestScheduler({'b': (100.0, 10), 'c': (100.0, 10)}, {})
+        scheduler.throttled('b', 0.05)
+        self.assertGreaterEqual(scheduler.acquire('b'), 0.04)
+        self.assertLess(scheduler.acquire('c'), 0.01)
+        self.assertEqual(scheduler.metrics()['b']['throttled'], 1)
+
+    def test_async_acquire(self):
+        scheduler = RequestScheduler({'b': (50.0, 1)}, {})
+
+        async def run():
+            return await asyncio.gather(*(scheduler.acquire_async('b') for _ in range(3)))
+
+        waits = sorted(asyncio.run(run()))
+        self.assertGreaterEqual(waits[-1], 0.03)
+        self.assertEqual(scheduler.metrics()['b']['priorities']['journal']['requests'], 3)
+
+    def test_scheduled_get_retries_once_after_429(self):
+        request_scheduler._default_scheduler = RequestScheduler({'b': (100.0, 10)}, {})
+        try:
+            session = FakeSession([429, 200])
+            start = time.monotonic()
+            response = scheduled_get(session, 'b', None, 'http://x')
+            self.assertEqual(response.status_code, 200)
+            self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+            session = FakeSession([429, 429])
+            self.assertEqual(scheduled_get(session, 'b', None, 'http://x').status_code, 429)
+            self.assertEqual(session.calls, 2)
+        finally:
+            request_scheduler._default_scheduler = None
+
+    def test_scheduled_get_accepts_callable(self):
+        request_scheduler._default_scheduler = RequestScheduler({'b': (100.0, 10)}, {})
+        try:
+            session = FakeSession([200])
+            self.assertEqual(scheduled_get(session.get, 'b', None, 'http://x').status_code, 200)
+            self.assertEqual(session.calls, 1)
+        finally:
+            request_scheduler._default_scheduler = None
+
+    def test_backoff_honors_retry_after_and_grows(self):
+        self.assertEqual(backoff_seconds({'Retry-After': '30'}, 1), 30.0)
+        self.assertEqual(backoff_seconds({}, 1), DEFAULT_RETRY_AFTER)
+        self.assertEqual(backoff_seconds({}, 3), DEFAULT_RETRY_AFTER * 4)
+        self.assertEqual(backoff_seconds({'Retry-After': '1'}, 50), MAX_BACKOFF_SECONDS)
+
+
+class TestSharedBudget(unittest.TestCase):
+    """Dos schedulers sobre el mismo archivo = dos procesos con un solo cupo"""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'budget.db')
+
+    def make(self) -> RequestScheduler:
+        return RequestScheduler({'b': (50.0, 2)}, {('b', 'fills'): (20.0, 1)}, budget_path=self.path)
+
+    def test_burst_shared_between_schedulers(self):
+        first, second = self.make(), self.make()
+        self.assertLess(first.acquire('b') + second.acquire('b'), 0.01)
+        self.assertGreaterEqual(first.acquire('b'), 0.015)
+        self.assertTrue(first.metrics()['b']['shared'])
+
+        # El sub-límite del endpoint también es uno solo
+        second.acquire('b', 'fills')
+        self.assertGreaterEqual(first.acquire('b', 'fills'), 0.03)
+
+    def test_throttle_pauses_every_scheduler(self):
+        first, second = self.make(), self.make()
+        first.throttled('b', 0.05)
+        self.assertGreaterEqual(second.acquire('b'), 0.04)
+
+    def test_async_budget_io_runs_off_the_loop(self):
+        scheduler = self.make()
+        threads = []
+        for name in ('states', 'take'):
+            method = getattr(scheduler.budget, name)
+            setattr(scheduler.budget, name, lambda *args, _m=method: (threads.append(threading.get_ident()), _m(*args))[1])
+
+        async def run():
+            await asyncio.gather(*(scheduler.acquire_async('b', 'fills') for _ in range(3)))
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+        self.assertTrue(threads)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_unusable_file_falls_back_to_process_budget(self):
+        scheduler = RequestScheduler({'b': (50.0, 2)}, {}, budget_path=tempfile.mkdtemp())
+        self.assertFalse(scheduler.metrics()['b']['shared'])
+        self.assertLess(scheduler.acquire('b'), 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
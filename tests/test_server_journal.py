@@ -0,0 +1,137 @@
+"""
+Test suite para los endpoints REST del journal (server_fastapi)
+
+Valida el fallback por cache miss de /api/journal y
+/api/journal/broker/{broker} con adapters falsos (sin red): las
+respuestas se arman sobre copias del resultado memorizado del manager.
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# El server crea el JournalManager al importarse: credenciales de mentira,
+# trades en un archivo temporal y cupo de requests por proceso (no toca
+# hub/journal_trades.db ni hub/request_budget.db)
+for _var in ('TOS_CLIENT_ID', 'TOS_CLIENT_SECRET', 'TOS_REFRESH_TOKEN'):
+    os.environ.setdefault(_var, 'test')
+TRADE_DB = os.path.join(tempfile.mkdtemp(), 'journal_trades.db')
+os.environ['TRADEPLUS_TRADE_DB'] = TRADE_DB
+os.environ['TRADEPLUS_RATE_LIMIT_DB'] = ''
+os.environ.pop('TRADEPLUS_ASYNC_ADAPTERS', None)
+
+import server_fastapi
+from hub.journal.async_adapters import AsyncCoinbaseAdapter, AsyncSchwabAdapter
+from hub.managers import quote_cache, request_scheduler
+
+
+class StubBroker:
+    """Adapter falso (API sync) sobre trades fijos"""
+
+    def __init__(self, trades: list):
+        self.trades = trades
+        self.qty_scales = {}
+
+    def get_transactions(self, days: int = 7) -> list:
+        return list(self.trades)
+
+    get_fills = get_transactions
+
+    def get_quotes(self, symbols: list) -> dict:
+        return {symbol: 35.0 for symbol in symbols}
+
+    def get_account_balance(self) -> dict:
+        return {'account_value': 0.0}    # sin balance: usa capital_initial
+
+    def get_decimals_for_symbol(self, symbol: str) -> int:
+        return 2
+
+
+def make_trades() -> list:
+    """Una operación cerrada y una abierta en HOOD"""
+    base = datetime.now(timezone.utc).replace(microsecond=0)
+    rows = [('1', 3, 'BUY', 30.0), ('2', 2, 'SELL', 33.0), ('3', 1, 'BUY', 31.0)]
+    return [{
+        'id': trade_id,
+        'datetime': (base - timedelta(hours=hours)).isoformat(),
+        'symbol': 'HOOD',
+        'side': side,
+        'quantity': 1.0,
+        'price': price,
+        'fee': 0.0,
+        'amount': price,
+        'broker': 'schwab'
+    } for trade_id, hours, side, price in rows]
+
+
+class TestJournalFallback(unittest.TestCase):
+    """Cache miss: computa en el momento sin tocar el resultado memorizado"""
+
+    def setUp(self):
+        self.manager = server_fastapi.cache.manager
+        self.saved = (self.manager.schwab, self.manager.coinbase)
+        self.manager.schwab = StubBroker(make_trades())
+        self.manager.coinbase = None
+        self.manager.metrics_memo.clear()
+
+    def tearDown(self):
+        self.manager.schwab, self.manager.coinbase = self.saved
+        self.manager.metrics_memo.clear()
+
+    def call(self, endpoint, *args, **kwargs) -> dict:
+        response = asyncio.run(endpoint(*args, **kwargs))
+        return json.loads(response.body)
+
+    def test_summary_then_full_keeps_trades(self):
+        summary = self.call(server_fastapi.get_journal, days=5, include_trades=False)
+        self.assertNotIn('trades', summary)
+
+        full = self.call(server_fastapi.get_journal, days=5, include_trades=True)
+        self.assertEqual(len(full['trades']), 3)
+
+    def test_broker_summary_then_full_keeps_trades(self):
+        summary = self.call(server_fastapi.get_journal_by_broker, 'schwab', days=5, include_trades=False)
+        self.assertNotIn('trades', summary)
+        self.assertEqual(summary['broker'], 'schwab')
+
+        full = self.call(server_fastapi.get_journal_by_broker, 'schwab', days=5, include_trades=True)
+        self.assertEqual(len(full['trades']), 3)
+        self.assertEqual(full['broker'], 'schwab')
+
+        # El tag del broker va en la copia, no en el resultado memorizado
+        memoized = self.manager.compute_metrics(self.manager.schwab.trades, days=5,
+                                                current_prices={'HOOD': 35.0},
+                                                ledger_key='schwab_5')
+        self.assertNotIn('broker', memoized)
+
+
+class TestServerModules(unittest.TestCase):
+    """Módulos y archivos que usa el server al importarse"""
+
+    def test_single_scheduler_and_quote_cache(self):
+        self.assertIs(server_fastapi.get_scheduler, request_scheduler.get_scheduler)
+        self.assertIs(server_fastapi.get_quote_cache, quote_cache.get_quote_cache)
+        self.assertNotIn('managers.request_scheduler', sys.modules)
+        self.assertNotIn('managers.quote_cache', sys.modules)
+
+    def test_isolated_from_hub_databases(self):
+        manager = server_fastapi.cache.manager
+        for adapter in (manager.schwab, manager.coinbase):
+            self.assertEqual(adapter.store.path, TRADE_DB)
+        self.assertIsNone(server_fastapi.get_scheduler().budget)
+
+    def test_sync_adapters_by_default(self):
+        manager = server_fastapi.cache.manager
+        for adapter in (manager.schwab, manager.coinbase):
+            self.assertNotIsInstance(adapter, (AsyncSchwabAdapter, AsyncCoinbaseAdapter))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Test suite para trades_query - paginación de trades en servidor
+
+Valida filtros, orden por campo, que recorrer todas las páginas por
+cursor (o por start_row) entregue cada trade exactamente una vez en el
+orden pedido, y que un cursor siga siendo válido cuando llegan trades
+nuevos entre páginas.
+"""
+
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Agregar path del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from hub.journal.fifo_ledger import FifoLedger
+from hub.journal import trades_query
+from hub.journal.trades_query import TradeIndex, query_trades, filter_trades
+
+
+def make_trade(i: int, symbol: str, side: str, price: float, broker: str = 'schwab') -> dict:
+    return {
+        'id': f"t{i:03d}",
+        'datetime': f"2025-03-{1 + i % 28:02d}T{10 + i % 8:02d}:00:00+00:00",
+        'symbol': symbol,
+        'side': side,
+        'quantity': 1.0,
+        'price': price,
+        'fee': 0.0,
+        'broker': broker
+    }
+
+
+TRADES = [make_trade(i, ['NU', 'HOOD', 'BTC-USD'][i % 3], 'BUY' if i % 2 == 0 else 'SELL',
+                     10.0 + (i * 7) % 13, 'coinbase' if i % 3 == 2 else 'schwab')
+          for i in range(60)]
+
+
+def records():
+    ledger = FifoLedger()
+    ledger.sync(TRADES)
+    return ledger.trades_since(None)
+
+
+def walk(recs, **kwargs):
+    """Todas las páginas siguiendo next_cursor"""
+    rows, cursor = [], None
+    while True:
+        page = query_trades(recs, cursor=cursor, **kwargs)
+        rows.extend(page['rows'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return rows, page['last_row']
+
+
+class TestTradesQuery(unittest.TestCase):
+    """Filtros, orden y paginación por cursor / offset"""
+
+    def test_cursor_walk_covers_all_in_order(self):
+        recs = records()
+        for sort in ('datetime', 'pl_usd', 'symbol', 'price'):
+            for descending in (True, False):
+                rows, total = walk(recs, sort=sort, descending=descending, limit=7)
+                self.assertEqual(total, len(TRADES))
+                self.assertEqual(sorted(r['id'] for r in rows), sorted(t['id'] for t in TRADES))
+                values = [r[sort] for r in rows]
+                self.assertEqual(values, sorted(values, reverse=descending), (sort, descending))
+
+    def test_offset_matches_cursor(self):
+        recs = records()
+        by_cursor, _ = walk(recs, sort='pl_usd', limit=10)
+        by_offset = []
+        for start in range(0, len(TRADES), 10):
+            by_offset.extend(query_trades(recs, sort='pl_usd', start_row=start, limit=10)['rows'])
+        self.assertEqual([r['id'] for r in by_offset], [r['id'] for r in by_cursor])
+
+    def test_filters(self):
+        recs = records()
+        nu_sells = filter_trades(recs, symbol='nu', side='SELL')
+        self.assertTrue(nu_sells)
+        self.assertTrue(all(r.symbol == 'NU' and r.trade['side'] == 'SELL' for r in nu_sells))
+
+        in_range = query_trades(recs, date_from='2025-03-05', date_to='2025-03-06', limit=1000)
+        self.assertTrue(in_range['rows'])
+        self.assertEqual(in_range['last_row'], len(in_range['rows']))
+        self.assertTrue(all(r['datetime'][:10] in ('2025-03-05', '2025-03-06')
+                            for r in in_range['rows']))
+
+        coinbase = query_trades(recs, broker='coinbase,robinhood', limit=1000)
+        self.assertEqual(coinbase['last_row'], sum(1 for t in TRADES if t['broker'] == 'coinbase'))
+
+    def test_cursor_stable_with_new_trades(self):
+        """Trades nuevos (más recientes) no corren la página siguiente"""
+        recs = records()
+        first = query_trades(recs, limit=10)
+        rest, _ = walk(recs, limit=10)
+
+        newer = dict(make_trade(99, 'NU', 'BUY', 10.0), datetime='2025-04-01T10:00:00+00:00')
+        ledger = FifoLedger()
+        ledger.sync(TRADES + [newer])
+        second = query_trades(ledger.trades_since(None), cursor=first['next_cursor'], limit=10)
+        self.assertEqual([r['id'] for r in second['rows']], [r['id'] for r in rest[10:20]])
+
+    def test_invalid_sort_and_cursor(self):
+        with self.assertRaises(ValueError):
+            query_trades(records(), sort='nope')
+        with self.assertRaises(ValueError):
+            query_trades(records(), cursor='%%%')
+        cursor = query_trades(records(), sort='symbol', limit=5)['next_cursor']
+        with self.assertRaises(ValueError):
+            query_trades(records(), sort='price', cursor=cursor)
+
+
+class TestTradeIndex(unittest.TestCase):
+    """Un snapshot se ordena una vez por campo; las páginas no reordenan"""
+
+    def test_pages_match_query_and_sort_once(self):
+        recs = records()
+        index = TradeIndex(recs)
+        queries = ({'sort': 'pl_usd'}, {'sort': 'pl_usd', 'symbol': 'NU'},
+                   {'sort': 'price', 'descending': False, 'side': 'BUY'})
+        expected = [query_trades(recs, limit=1000, **query)['rows'] for query in queries]
+        calls = []
+
+        def counting_sorted(*args, **kwargs):
+            calls.append(1)
+            return sorted(*args, **kwargs)
+
+        with patch.object(trades_query, 'sorted', counting_sorted, create=True):
+            for query, want in zip(queries, expected):
+                rows, cursor = [], None
+                while True:
+                    page = index.query(cursor=cursor, limit=7, **query)
+                    rows.extend(page['rows'])
+                    cursor = page['next_cursor']
+                    if cursor is None:
+                        break
+                self.assertEqual(rows, want)
+        # Solo las dos vistas base; las filtradas salen de ellas sin ordenar
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
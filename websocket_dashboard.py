@@ -74,10 +74,14 @@ app = FastAPI(lifespan=lifespan)
 
 
 async def update_schwab_data():
-    """Actualiza datos de Schwab cada 5 segundos"""
+    """Actualiza datos de Schwab cada 5 segundos (más espaciado tras un 429)"""
+    throttled_in_a_row = 0
     while True:
+        delay = 5
         try:
             from hub.managers.schwab_token_manager import SchwabTokenManager
+            from hub.managers.request_scheduler import (Priority, backoff_seconds, get_scheduler,
+                                                        retry_after_seconds)
             import requests
             
             token_manager = SchwabTokenManager(config_path="hub")
@@ -85,12 +89,21 @@ async def update_schwab_data():
             
             headers = {"Authorization": f"Bearer {token}"}
             
-            # GET /v1/accounts
+            # GET /v1/accounts (turno compartido con el journal y los quotes)
+            scheduler = get_scheduler()
+            await scheduler.acquire_async("schwab", "accounts", Priority.ACCOUNT)
             resp = requests.get(
                 "https://api.schwabapi.com/trader/v1/accounts",
                 headers=headers,
                 timeout=10
             )
+            if resp.status_code == 429:
+                # Pausa el cupo compartido y espacia este loop (Retry-After, backoff)
+                throttled_in_a_row += 1
+                scheduler.throttled("schwab", retry_after_seconds(resp.headers))
+                delay = max(delay, backoff_seconds(resp.headers, throttled_in_a_row))
+            else:
+                throttled_in_a_row = 0
             
             if resp.status_code == 200:
                 accounts_data = resp.json()
@@ -129,16 +142,20 @@ async def update_schwab_data():
             state["schwab"]["connected"] = False
             logger.error(f"❌ Error Schwab: {e}")
         
-        await asyncio.sleep(5)
+        await asyncio.sleep(delay)
 
 
 async def update_coinbase_data():
-    """Actualiza datos de Coinbase cada 5 segundos"""
+    """Actualiza datos de Coinbase cada 5 segundos (más espaciado tras un 429)"""
     import importlib
     
+    throttled_in_a_row = 0
     while True:
+        delay = 5
         try:
             import requests
+            from hub.managers.request_scheduler import (Priority, backoff_seconds, get_scheduler,
+                                                        retry_after_seconds)
             
             # Reimportar para evitar issues de módulo cacheado
             import sys
@@ -163,12 +180,20 @@ async def update_coinbase_data():
                 "Content-Type": "application/json"
             }
             
-            # GET /api/v3/brokerage/accounts
+            # GET /api/v3/brokerage/accounts (turno compartido con el journal y los quotes)
+            scheduler = get_scheduler()
+            await scheduler.acquire_async("coinbase", "accounts", Priority.ACCOUNT)
             resp = requests.get(
                 "https://api.coinbase.com/api/v3/brokerage/accounts",
                 headers=headers,
                 timeout=10
             )
+            if resp.status_code == 429:
+                throttled_in_a_row += 1
+                scheduler.throttled("coinbase", retry_after_seconds(resp.headers))
+                delay = max(delay, backoff_seconds(resp.headers, throttled_in_a_row))
+            else:
+                throttled_in_a_row = 0
             
             if resp.status_code == 200:
                 data = resp.json()
@@ -200,7 +225,7 @@ async def update_coinbase_data():
             logger.error(f"❌ Error Coinbase: {e}")
             logger.debug(f"Traceback: {traceback.format_exc()}")
         
-        await asyncio.sleep(5)
+        await asyncio.sleep(delay)
 
 
 @app.get("/")